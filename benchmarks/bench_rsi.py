@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+RSI Benchmark for AurumBotX-v4
+Times IncrementalRSI against a full ta.momentum.RSIIndicator recompute
+(equivalence is covered by tests/test_indicators.py)
+
+Usage: python benchmarks/bench_rsi.py [--bars N] [--ticks N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from indicators import IncrementalRSI  # noqa: E402
+
+
+def random_walk(n, seed=0, start=87000.0):
+    """Generate a reproducible price series (with some flat steps)"""
+    rng = random.Random(seed)
+    prices = [start]
+    for _ in range(n - 1):
+        step = 0.0 if rng.random() < 0.05 else rng.gauss(0, start * 0.002)
+        prices.append(max(1.0, prices[-1] + step))
+    return prices
+
+
+def bench_per_tick(bars, ticks, window=14):
+    """Cost of producing one new RSI value: full ta recompute vs one update"""
+    import pandas as pd
+    import ta
+
+    closes = random_walk(bars + ticks, seed=42)
+
+    started = time.perf_counter()
+    for i in range(bars, bars + ticks):
+        ta.momentum.RSIIndicator(pd.Series(closes[i - bars:i]), window=window).rsi().iloc[-1]
+    ta_per_tick = (time.perf_counter() - started) / ticks
+
+    rsi = IncrementalRSI(window)
+    for close in closes[:bars]:
+        rsi.update(close)
+    started = time.perf_counter()
+    for close in closes[bars:]:
+        rsi.update(close)
+    inc_per_tick = (time.perf_counter() - started) / ticks
+
+    return ta_per_tick, inc_per_tick
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IncrementalRSI micro-benchmark")
+    parser.add_argument("--bars", type=int, nargs="+", default=[14, 1000, 10000], help="Window sizes for ta recompute")
+    parser.add_argument("--ticks", type=int, default=200, help="Ticks timed per window size")
+    args = parser.parse_args()
+
+    print(f"{'bars':>8} {'ta/tick':>12} {'incremental/tick':>18} {'speedup':>10}")
+    for bars in args.bars:
+        ta_tick, inc_tick = bench_per_tick(bars, args.ticks)
+        print(f"{bars:>8} {ta_tick * 1e6:>10.1f}us {inc_tick * 1e6:>16.2f}us {ta_tick / inc_tick:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark for AurumBotX-v4
+Times cold starts in fresh interpreters with -X importtime: importing the
+runner, a no-op cycle (daily limit reached) and importing the API server
+
+Every run uses a temporary STATE_DIR/LOG_DIR and the call replay harness, so
+no testnet or OpenAI access is needed. --ref runs the same scenarios against
+the src/ of another commit (e.g. --ref HEAD~1) for a before/after table.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N] [--ref GIT_REF]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import bench_config, write_recording  # noqa: E402
+
+SCENARIOS = {
+    "import runner": "import wallet_runner_hyperliquid",
+    "no-op cycle": ("import json, sys\n"
+                    "import wallet_runner_hyperliquid as runner\n"
+                    "runner.LOGGER.console = False\n"
+                    "runner.execute_cycle(json.load(open(sys.argv[1])))"),
+    "import api_server": "import api_server"
+}
+
+
+def setup_sandbox():
+    """Temporary state/log dirs, replay recording and a wallet at its daily trade limit"""
+    sandbox = tempfile.mkdtemp(prefix="aurum_startup_")
+    state_dir = os.path.join(sandbox, "hyperliquid_trading")
+    os.makedirs(state_dir)
+    write_recording(os.path.join(sandbox, "calls.jsonl"))
+    config = bench_config("startup")
+    with open(os.path.join(sandbox, "config.json"), "w") as f:
+        json.dump(config, f)
+    with open(os.path.join(state_dir, "startup_state.json"), "w") as f:
+        json.dump({"wallet_name": "startup", "initial_capital": 10000.0, "current_capital": 10000.0,
+                   "current_level": "TURTLE", "total_trades": 12, "winning_trades": 0, "losing_trades": 0,
+                   "open_position": None, "daily_trades": config["max_daily_trades"],
+                   "last_trade_date": datetime.now().strftime("%Y-%m-%d"), "bear_market_skipped": 0,
+                   "low_confidence_skipped": 0, "journal_offset": 0}, f)
+    env = dict(os.environ, STATE_DIR=state_dir, LOG_DIR=os.path.join(sandbox, "logs"),
+               CALL_REPLAY_FILE=os.path.join(sandbox, "calls.jsonl"), CALL_REPLAY_LATENCY="zero")
+    env.pop("CALL_RECORD_FILE", None)
+    env.pop("PROFILE_CYCLES", None)
+    return sandbox, env
+
+
+def extract_ref(ref, target):
+    """src/ of a git ref into target (returns its src path)"""
+    os.makedirs(target, exist_ok=True)
+    archive = subprocess.run(["git", "-C", ROOT, "archive", ref, "src"], capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+    return os.path.join(target, "src")
+
+
+def parse_importtime(stderr):
+    """(total import seconds, {module imported by a top-level module: cumulative seconds})"""
+    total, children = 0.0, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            total += int(cumulative) / 1e6
+        elif depth == 1:
+            children[name.strip()] = children.get(name.strip(), 0.0) + int(cumulative) / 1e6
+    return total, children
+
+
+def run_scenario(code, src, env, cwd, runs):
+    """(median wall seconds, median import seconds, importtime modules of the median run)"""
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code, os.path.join(cwd, "config.json")],
+                                 cwd=src, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.strip().splitlines()[-1])
+        results.append((wall, *parse_importtime(process.stderr)))
+    results.sort(key=lambda result: result[0])
+    median = results[len(results) // 2]
+    return statistics.median(r[0] for r in results), statistics.median(r[1] for r in results), median[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AurumBotX startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--top", type=int, default=8, help="Slowest direct imports shown per scenario")
+    parser.add_argument("--ref", default=None, help="Also run against the src/ of this git ref")
+    args = parser.parse_args()
+
+    sandbox, env = setup_sandbox()
+    try:
+        trees = {"current": os.path.join(ROOT, "src")}
+        if args.ref:
+            trees[args.ref] = extract_ref(args.ref, os.path.join(sandbox, "ref"))
+        results = {}
+        for tree, src in trees.items():
+            for name, code in SCENARIOS.items():
+                journal = os.path.join(env["STATE_DIR"], "startup_journal.jsonl")
+                if os.path.exists(journal):
+                    os.remove(journal)  # every scenario starts from the same daily-limit state
+                results[tree, name] = run_scenario(code, src, env, sandbox, args.runs)
+
+        for name in SCENARIOS:
+            print(f"\n{name}")
+            for tree in trees:
+                wall, imports, modules = results[tree, name]
+                print(f"  {tree:<12} wall {wall * 1000:8.1f}ms   imports {imports * 1000:8.1f}ms")
+            if args.ref:
+                before, after = results[args.ref, name][0], results["current", name][0]
+                print(f"  {'change':<12} wall {(after / before - 1) * 100:+7.1f}%")
+            slowest = sorted(results["current", name][2].items(), key=lambda item: -item[1])[:args.top]
+            print("  slowest imports: " + ", ".join(f"{module} {seconds * 1000:.1f}ms" for module, seconds in slowest))
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for AurumBotX-v4
+Times the cycle hot path, state persistence, every API route and the
+hourly monitor report, and stores the results per commit so regressions
+show up across commits
+
+Everything runs in a temporary sandbox: the Hyperliquid Info client and the
+LLM are served by the call replay harness (zero latency), so no testnet
+access or OPENAI_API_KEY is needed.
+
+Results: benchmarks/results/<commit>.json (commit = short HEAD sha, with a
+"-dirty" suffix for uncommitted trees). Each run is compared with the
+results of the parent commit (or --compare REF) and slower benchmarks are
+flagged.
+
+Usage: python benchmarks/bench_suite.py [--filter TEXT] [--sizes 1000,100000,1000000] [--quick]
+                                        [--repeat N] [--compare REF] [--threshold PCT]
+                                        [--fail-on-regression] [--no-save]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PAIRS = ["BTC", "ETH", "SOL", "ARB", "AVAX", "MATIC"]
+MIN_TIMING = 0.05  # seconds; calls per timing are raised until one timing takes this long
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+BENCHMARKS = []
+
+
+def benchmark(name, sizes=False):
+    """Register setup(size) -> callable; sizes=True runs it once per --sizes value"""
+    def register(setup):
+        BENCHMARKS.append((name, setup, sizes))
+        return setup
+    return register
+
+
+# -- sandbox --------------------------------------------------------------------
+
+
+def write_recording(path, pairs=PAIRS, bars=300):
+    """Synthetic Info / LLM recording for the replay harness"""
+    now = int(time.time() * 1000)
+    step = 3600 * 1000
+    start = now - now % step - bars * step
+    mids = {pair: str(100.0 * (i + 1)) for i, pair in enumerate(pairs)}
+    entries = [
+        {"call": "all_mids", "key": None, "latency": 0.0, "response": mids},
+        {"call": "meta", "key": None, "latency": 0.0,
+         "response": {"universe": [{"name": pair, "szDecimals": 3, "funding": "0.0001"} for pair in pairs]}},
+        {"call": "chat", "key": None, "latency": 0.0,
+         "response": {"choices": [{"message": {"content": "HOLD|55|benchmark"}}]}}
+    ]
+    for i, pair in enumerate(pairs):
+        price = 100.0 * (i + 1)
+        candles = []
+        for bar in range(bars):
+            close = price * (1 + 0.01 * ((bar * 7919 + i) % 13 - 6) / 6)
+            candles.append({"t": start + bar * step, "T": start + (bar + 1) * step - 1,
+                            "o": str(close), "h": str(close * 1.01), "l": str(close * 0.99), "c": str(close), "v": "1"})
+        entries.append({"call": "candles_snapshot", "key": f"{pair}/1h", "latency": 0.0, "response": candles})
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def make_trades(count, start=None):
+    """Synthetic trade history alternating BUY / closing SELL records"""
+    start = start or datetime(2024, 1, 1)
+    trades = []
+    for i in range(count):
+        timestamp = (start + timedelta(minutes=30 * i)).isoformat()
+        pair = PAIRS[i % 3]
+        if i % 2 == 0:
+            trades.append({"timestamp": timestamp, "pair": pair, "action": "BUY", "price": 100.0 + i % 50,
+                           "quantity": 0.1, "trade_size_usd": 10.0, "confidence": 70.0,
+                           "reasoning": "benchmark", "trend": "SIDEWAYS"})
+        else:
+            pnl = (i % 7 - 3) * 0.1
+            trades.append({"timestamp": timestamp, "pair": pair, "action": "SELL", "price": 100.0 + i % 50,
+                           "quantity": 0.1, "trade_size_usd": 10.0, "confidence": 70.0,
+                           "reasoning": "Exit: take_profit", "pnl": pnl, "pnl_pct": pnl * 10,
+                           "result": "won" if pnl > 0 else "lost", "exit_reason": "take_profit"})
+    return trades
+
+
+def make_state(wallet, trades):
+    from performance import build_performance
+    return {
+        "wallet_name": wallet, "initial_capital": 10000.0, "current_capital": 10000.0,
+        "current_level": "TURTLE", "total_trades": len(trades), "winning_trades": 0, "losing_trades": 0,
+        "trade_history": trades, "open_position": None, "daily_trades": 0, "last_trade_date": None,
+        "bear_market_skipped": 0, "low_confidence_skipped": 0, "performance": build_performance(trades),
+        "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"
+    }
+
+
+def setup_sandbox():
+    """Temporary working directory and environment; must run before the bot modules are imported"""
+    sandbox = tempfile.mkdtemp(prefix="aurum_bench_")
+    recording = os.path.join(sandbox, "calls.jsonl")
+    write_recording(recording)
+    os.environ.update({
+        "STATE_DIR": os.path.join(sandbox, "hyperliquid_trading"),
+        "LOG_DIR": os.path.join(sandbox, "logs"),
+        "CALL_REPLAY_FILE": recording,
+        "CALL_REPLAY_LATENCY": "zero",
+        "DECISION_CACHE_TTL": "0",
+        "MARKET_FEED": "rest",
+        "POSITION_CHECK_INTERVAL": "0"
+    })
+    os.environ.pop("CALL_RECORD_FILE", None)
+    os.chdir(sandbox)
+    logging.disable(logging.INFO)  # api_server logs every request and config update
+    return sandbox
+
+
+def runner_module():
+    import wallet_runner_hyperliquid as runner
+    runner.LOGGER.console = False
+    return runner
+
+
+def bench_config(wallet="bench"):
+    return {"wallet_name": wallet, "initial_capital": 10000.0, "trading_pairs": PAIRS, "min_confidence": 60.0,
+            "take_profit_pct": 8.0, "stop_loss_pct": 2.0, "max_holding_hours": 24, "max_daily_trades": 12,
+            "emergency_stop_loss_pct": 30.0}
+
+
+# -- benchmarks -----------------------------------------------------------------
+
+
+@benchmark("cycle.execute_cycle")
+def bench_execute_cycle(size=None):
+    """One full cycle: snapshot, 6 pairs analyzed (RSI + LLM), HOLD, state saved"""
+    runner = runner_module()
+    from market_snapshot import MarketSnapshot
+    config = bench_config()
+    snapshot = MarketSnapshot(runner.get_hyperliquid_info(), ttl=runner.MARKET_SNAPSHOT_TTL)
+    runner.execute_cycle(config, snapshot)  # backfills candles once
+    return lambda: runner.execute_cycle(config, snapshot)
+
+
+@benchmark("cycle.get_live_price")
+def bench_get_live_price(size=None):
+    runner = runner_module()
+    from market_snapshot import MarketSnapshot
+    snapshot = MarketSnapshot(runner.get_hyperliquid_info(), ttl=runner.MARKET_SNAPSHOT_TTL)
+    return lambda: runner.get_live_price(snapshot, "ETH")
+
+
+@benchmark("cycle.calculate_rsi_full", sizes=True)
+def bench_calculate_rsi_full(size):
+    """Stateless RSI over a series of `size` closes"""
+    import numpy as np
+    runner = runner_module()
+    closes = 100 + np.cumsum(np.sin(np.arange(size) * 0.37))
+    data = {"timestamp": np.arange(size, dtype=np.int64), "close": closes}
+    return lambda: runner.calculate_rsi(data)
+
+
+@benchmark("cycle.calculate_rsi_tick", sizes=True)
+def bench_calculate_rsi_tick(size):
+    """Stateful RSI after `size` bars: the live 14-bar window with one new bar per call"""
+    import numpy as np
+    runner = runner_module()
+    total = size + 1_000_000
+    closes = 100 + np.cumsum(np.sin(np.arange(total) * 0.37))
+    timestamps = np.arange(total, dtype=np.int64)
+    symbol = f"BENCH{size}"
+    runner.RSI_ENGINE.reset(symbol)
+    runner.calculate_rsi({"timestamp": timestamps[:size], "close": closes[:size]}, symbol=symbol)
+    position = [size]
+
+    def tick():
+        end = position[0] = position[0] + 1
+        runner.calculate_rsi({"timestamp": timestamps[end - 14:end], "close": closes[end - 14:end]}, symbol=symbol)
+    return tick
+
+
+def _stored_state(runner, size):
+    from state_store import get_store
+    config = bench_config(f"history{size}")
+    state_file = runner.get_state_file(config["wallet_name"])
+    if not os.path.exists(state_file):
+        get_store(state_file).save(make_state(config["wallet_name"], make_trades(size)), checkpoint=True)
+    return config, state_file
+
+
+@benchmark("state.save_state", sizes=True)
+def bench_save_state(size):
+    """Record one trade and save (journal append, periodic checkpoint and compaction amortized)"""
+    from performance import record_trade
+    runner = runner_module()
+    config, _ = _stored_state(runner, size)
+    state = runner.load_state(config)
+    trade = make_trades(1)[0]
+
+    def save():
+        state["trade_history"].append(dict(trade))
+        record_trade(state["performance"], state["trade_history"][-1])
+        state["total_trades"] += 1
+        runner.save_state(state)
+    return save
+
+
+@benchmark("state.load_state_cold", sizes=True)
+def bench_load_state_cold(size):
+    """Load from disk in a fresh store (new process / other writer)"""
+    from state_store import StateStore
+    runner = runner_module()
+    _, state_file = _stored_state(runner, size)
+    return lambda: StateStore(state_file).load()
+
+
+@benchmark("state.load_state_cached", sizes=True)
+def bench_load_state_cached(size):
+    """Load when nothing changed on disk (same process as the writer)"""
+    runner = runner_module()
+    config, _ = _stored_state(runner, size)
+    runner.load_state(config)
+    return lambda: runner.load_state(config)
+
+
+API_HISTORY = 10_000
+
+
+def _api_client():
+    import api_server as api
+    from market_snapshot import MarketSnapshot
+    from pathlib import Path
+    from state_store import get_store
+    runner = runner_module()
+    if getattr(api, "_bench_ready", False):
+        return api, api.app.test_client()
+    state_file = Path(runner.get_state_file(api.WALLET_NAME))
+    get_store(state_file).save(make_state(api.WALLET_NAME, make_trades(API_HISTORY)), checkpoint=True)
+    config_file = Path(os.getcwd()) / "config.json"
+    with open(config_file, "w") as f:
+        json.dump(bench_config(api.WALLET_NAME), f)
+    api.STATE_FILE = state_file
+    api.CONFIG_FILE = config_file
+    api._market_snapshot = MarketSnapshot(runner.get_hyperliquid_info(), ttl=api.MARKET_SNAPSHOT_TTL)
+    api._bench_ready = True
+    return api, api.app.test_client()
+
+
+def _api_routes():
+    """(name, method, url) for every route of api_server"""
+    import api_server as api
+    routes = []
+    for rule in api.app.url_map.iter_rules():
+        if rule.endpoint == "static":
+            continue
+        url = rule.rule.replace("<int:trade_id>", "1")
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            routes.append((f"{method} {url}", method, url))
+            if url == "/api/bot/trades":
+                routes.append((f"{method} {url}?page=50", method, url + "?page=50&per_page=100"))
+            if url == "/api/bot/performance":
+                routes.append((f"{method} {url}?days=30", method, url + "?days=30"))
+    return routes
+
+
+def _register_api_benchmarks():
+    for name, method, url in _api_routes():
+        def cold(size=None, method=method, url=url):
+            """Response built from the state (caches cleared)"""
+            api, client = _api_client()
+            body = json.dumps(bench_config(api.WALLET_NAME)) if method == "POST" else None
+
+            def request():
+                api._response_cache.clear()
+                api._file_cache.clear()
+                response = client.open(url, method=method, data=body, content_type="application/json")
+                assert response.status_code < 500, f"{url}: {response.status_code}"
+            return request
+        benchmark(f"api.{name}")(cold)
+        if method == "GET":
+            def revalidate(size=None, url=url):
+                """Conditional GET answered with 304 from the cached ETag"""
+                api, client = _api_client()
+                etag = client.get(url).headers.get("ETag")
+                headers = {"If-None-Match": etag} if etag else {}
+                return lambda: client.get(url, headers=headers)
+            benchmark(f"api.{name} (304)")(revalidate)
+
+
+MONITOR_CYCLE = [
+    "================================================================================",
+    "🔄 CYCLE START - Hyperliquid Testnet",
+    "================================================================================",
+    "--- Analyzing BTC ---",
+    "💰 Price: $87,000.50 (+0.01% 24h)",
+    "📈 Trend: SIDEWAYS",
+    "📊 RSI (14): 49.94",
+    "🤖 AI Recommendation: HOLD (Confidence: 55.0%)",
+    "⏸️  AI recommends HOLD - skipping",
+    "✅ CYCLE COMPLETE"
+]
+
+
+def _monitor_log(lines):
+    """bot_output.log with `lines` lines ending today"""
+    path = f"bot_output_{lines}.log"
+    if not os.path.exists(path):
+        day = datetime.now().strftime("%Y-%m-%d")
+        block = "".join(f"[{day} 12:00:00] [INFO] {line}\n" for line in MONITOR_CYCLE)
+        with open(path, "w") as f:
+            f.write(block * (lines // len(MONITOR_CYCLE)))
+    return path
+
+
+def _monitor(lines):
+    import hourly_monitor as monitor
+    runner = runner_module()
+    from state_store import get_store
+    state_file = runner.get_state_file("monitor")
+    if not os.path.exists(state_file):
+        get_store(state_file).save(make_state("monitor", make_trades(1000)), checkpoint=True)
+    monitor.STATE_FILE = state_file
+    monitor.LOG_FILE = _monitor_log(lines)
+    return monitor
+
+
+def _quiet(function):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            function()
+    return run
+
+
+@benchmark("monitor.report_cold", sizes=True)
+def bench_monitor_cold(size):
+    """Report with a fresh scanner: the whole log of `size` lines is scanned"""
+    monitor = _monitor(size)
+
+    def report():
+        monitor._scanner = None
+        if os.path.exists(monitor.SCAN_STATE_FILE):
+            os.remove(monitor.SCAN_STATE_FILE)
+        monitor.generate_report(bot_status={"running": True, "pid": 1})
+    return _quiet(report)
+
+
+@benchmark("monitor.report_incremental", sizes=True)
+def bench_monitor_incremental(size):
+    """Report after one more cycle was appended to a log of `size` lines"""
+    monitor = _monitor(size)
+    monitor._scanner = None
+    if os.path.exists(monitor.SCAN_STATE_FILE):
+        os.remove(monitor.SCAN_STATE_FILE)
+    _quiet(lambda: monitor.generate_report(bot_status={"running": True, "pid": 1}))()
+    day = datetime.now().strftime("%Y-%m-%d")
+    block = "".join(f"[{day} 12:00:00] [INFO] {line}\n" for line in MONITOR_CYCLE)
+
+    def report():
+        with open(monitor.LOG_FILE, "a") as f:
+            f.write(block)
+        monitor.generate_report(bot_status={"running": True, "pid": 1})
+    return _quiet(report)
+
+
+# -- runner ---------------------------------------------------------------------
+
+
+def time_callable(function, repeat):
+    """(min, median) seconds per call over `repeat` timings"""
+    function()  # warm-up
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_TIMING or number >= 1 << 16:
+            break
+        number *= 4
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return min(timings), statistics.median(timings), number
+
+
+def git_commit():
+    """Short HEAD sha, '-dirty' when the tree has uncommitted changes (None outside git)"""
+    try:
+        sha = subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "-C", ROOT, "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_results(ref, current):
+    """Stored results to compare with: REF (commit or file), else the parent commit, else the newest"""
+    if ref and os.path.exists(ref):
+        path = ref
+    else:
+        try:
+            commit = subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", ref or "HEAD~1"],
+                                    capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = ref
+        path = os.path.join(RESULTS_DIR, f"{commit}.json")
+        if not os.path.exists(path):
+            path = None
+        if path is None and not ref and os.path.isdir(RESULTS_DIR):
+            stored = [os.path.join(RESULTS_DIR, name) for name in os.listdir(RESULTS_DIR)
+                      if name.endswith(".json") and name != f"{current}.json"]
+            path = max(stored, key=os.path.getmtime) if stored else None
+    if path is None:
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AurumBotX benchmark suite")
+    parser.add_argument("--filter", default=None, help="Only benchmarks whose name contains TEXT")
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="Trade-history / series / log sizes for sized benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Sizes 1000,100000 only")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per benchmark")
+    parser.add_argument("--compare", default=None, help="Commit or results file to compare with")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Slowdown (%%) reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 when a regression is found")
+    parser.add_argument("--no-save", action="store_true", help="Do not write benchmarks/results/<commit>.json")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    sizes = [1000, 100000] if args.quick else [int(size) for size in args.sizes.split(",")]
+    commit = git_commit()
+    sandbox = setup_sandbox()
+    _register_api_benchmarks()
+
+    results = {}
+    try:
+        print(f"{'benchmark':<52} {'min':>12} {'median':>12} {'calls':>7}")
+        for name, setup, sized in BENCHMARKS:
+            for size in (sizes if sized else [None]):
+                label = f"{name}[{size}]" if size is not None else name
+                if args.filter and args.filter not in label:
+                    continue
+                try:
+                    best, median, number = time_callable(setup(size), args.repeat)
+                except Exception as e:
+                    print(f"{label:<52} ❌ {type(e).__name__}: {e}")
+                    continue
+                results[label] = {"min": best, "median": median, "number": number}
+                print(f"{label:<52} {best * 1e3:>10.3f}ms {median * 1e3:>10.3f}ms {number:>7}")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    previous = previous_results(args.compare, commit)
+    regressions = []
+    if previous:
+        print(f"\nCompared with {previous.get('commit')} ({previous.get('date')}):")
+        for label, result in results.items():
+            before = previous["results"].get(label)
+            if not before:
+                continue
+            change = (result["min"] / before["min"] - 1) * 100
+            marker = "⚠️ " if change > args.threshold else "  "
+            if change > args.threshold:
+                regressions.append(label)
+            print(f"{marker}{label:<50} {before['min'] * 1e3:>10.3f}ms -> {result['min'] * 1e3:>10.3f}ms "
+                  f"({change:+.1f}%)")
+        print(f"\n{len(regressions)} regressions above {args.threshold:.0f}%" if regressions
+              else "\n✅ No regressions")
+
+    if not args.no_save and commit:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit}.json")
+        with open(path, "w") as f:
+            json.dump({"commit": commit, "date": datetime.now().isoformat(timespec="seconds"),
+                       "python": platform.python_version(), "machine": platform.platform(),
+                       "results": results}, f, indent=2)
+        print(f"💾 Results saved: {os.path.relpath(path, ROOT)}")
+    sys.exit(1 if regressions and args.fail_on_regression else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,7 +39,7 @@ readonly PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
 readonly LOG_DIR="${PROJECT_ROOT}/logs"
 readonly LOG_FILE="${LOG_DIR}/bot_loop.log"
 readonly PID_FILE="${PROJECT_ROOT}/.bot_pid"
-readonly BOT_SCRIPT="${PROJECT_ROOT}/main.py"
+readonly BOT_SCRIPT="${PROJECT_ROOT}/src/wallet_runner_hyperliquid.py"
 readonly VENV_PATH="${PROJECT_ROOT}/venv"
 readonly PYTHON_BIN="${VENV_PATH}/bin/python3"
 
@@ -191,7 +191,10 @@ handle_sigint() {
 
 handle_sighup() {
     log INFO "SIGHUP received - reloading configuration..."
-    # Add configuration reload logic here if needed
+    # Forward to the daemon, which reloads its config before the next cycle
+    if bot_is_running; then
+        kill -HUP "$(cat "$PID_FILE")" 2>/dev/null || true
+    fi
 }
 
 setup_signal_handlers() {
@@ -219,7 +222,8 @@ start_bot() {
     # Start the bot process
     if cd "$PROJECT_ROOT"; then
         # Run bot in background and capture PID
-        "$PYTHON_BIN" "$BOT_SCRIPT" >> "$LOG_FILE" 2>&1 &
+        # --daemon keeps the bot resident; this loop only restarts it on crash
+        "$PYTHON_BIN" "$BOT_SCRIPT" --daemon >> "$LOG_FILE" 2>&1 &
         local bot_pid=$!
         echo "$bot_pid" > "$PID_FILE"
         
@@ -3,14 +3,25 @@ API Server for AurumBotX-v4
 Exposes REST endpoints to read bot state and trade history
 """
 
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 import logging
 
+from market_snapshot import MarketSnapshot
+from metrics import REGISTRY, read_dumps, render
+from performance import PERFORMANCE_KEY, build_performance, daily_sharpe, summarize_bucket
+from price_feed import PriceBus, WebsocketFeed
+from state_store import get_trade_db, read_state, state_file_sizes, state_version as read_state_version
+from trade_db import wallet_from_state_file
+
 app = Flask(__name__)
 CORS(app)
 
@@ -21,29 +32,143 @@ logger = logging.getLogger(__name__)
 # Configuration
 STATE_FILE = Path(__file__).parent.parent / "hyperliquid_trading" / "hyperliquid_testnet_10k_state.json"
 CONFIG_FILE = Path(__file__).parent.parent / "config" / "hyperliquid_testnet_10k.json"
+WALLET_NAME = wallet_from_state_file(STATE_FILE)
+MARKET_SNAPSHOT_TTL = float(os.getenv("MARKET_SNAPSHOT_TTL", "5"))
+MARKET_FEED = os.getenv("MARKET_FEED", "rest")  # rest | ws (prices streamed into an in-process bus)
+RESPONSE_CACHE_SIZE = int(os.getenv("API_RESPONSE_CACHE_SIZE", "256"))
+METRICS_DIR = Path(os.getenv("METRICS_DIR", STATE_FILE.parent / "metrics"))  # runner metrics dumps
 
-def load_state():
-    """Load bot state from JSON file"""
+API_REQUESTS = REGISTRY.counter("aurum_api_requests_total", "API requests", ("route", "method", "status"))
+API_SECONDS = REGISTRY.histogram("aurum_api_request_seconds", "API request latency", ("route", "method"))
+STATE_BYTES = REGISTRY.gauge("aurum_state_file_bytes", "Size of the wallet state files", ("wallet", "file"))
+
+# Shared across requests; refreshed at most once per TTL
+_market_snapshot = None
+_market_feed = None
+
+# Parsed files and serialized responses, reused until the source files change
+_file_cache = {}
+_response_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def file_signature(path):
+    """(mtime_ns, size) of path, None if it does not exist"""
     try:
-        if STATE_FILE.exists():
-            with open(STATE_FILE, 'r') as f:
-                return json.load(f)
+        st = os.stat(path)
+    except OSError:
         return None
+    return st.st_mtime_ns, st.st_size
+
+def state_version():
+    """Version token of the bot state; changes whenever the runner saves"""
+    return read_state_version(STATE_FILE)
+
+def config_version():
+    """Version token of the bot config file"""
+    return file_signature(CONFIG_FILE)
+
+def load_state():
+    """Load bot state (snapshot + journal replay, reused while unchanged on disk)"""
+    try:
+        return read_state(STATE_FILE)
     except Exception as e:
         logger.error(f"Error loading state: {e}")
         return None
 
 def load_config():
-    """Load bot configuration from JSON file"""
+    """Load bot configuration from JSON file (parsed once per file version)"""
+    path = str(CONFIG_FILE)
     try:
-        if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        return None
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        with _cache_lock:
+            cached = _file_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with open(path, 'r') as f:
+            config = json.load(f)
+        with _cache_lock:
+            _file_cache[path] = (signature, config)
+        return config
     except Exception as e:
         logger.error(f"Error loading config: {e}")
         return None
 
+def cached_response(build, *versions):
+    """Serve build() as JSON, reusing the serialized body while versions are unchanged
+
+    The ETag is derived from the request and the source versions, so a client
+    sending it back in If-None-Match gets a 304 without the body being rebuilt.
+    Error responses (status != 200) are never cached.
+    """
+    key = request.full_path
+    etag = hashlib.sha1(repr((key, versions)).encode()).hexdigest()
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    with _cache_lock:
+        cached = _response_cache.get(key)
+        if cached is not None and cached[0] == etag:
+            _response_cache.move_to_end(key)
+    if cached is None or cached[0] != etag:
+        result = build()
+        payload, status = result if isinstance(result, tuple) else (result, 200)
+        if status != 200:
+            return jsonify(payload), status
+        cached = (etag, app.json.dumps(payload) + "\n")
+        with _cache_lock:
+            _response_cache[key] = cached
+            _response_cache.move_to_end(key)
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    
+    response = app.response_class(cached[1], mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"  # always revalidate
+    return response
+
+def get_market_snapshot():
+    """Get the process-wide market snapshot (Info client built on first use)"""
+    global _market_snapshot, _market_feed
+    if _market_snapshot is None:
+        from hyperliquid.info import Info
+        from hyperliquid.utils import constants
+        
+        config = load_config() or {}
+        testnet = config.get("hyperliquid_testnet", True)
+        api_url = constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
+        bus = None
+        if MARKET_FEED == "ws":
+            bus = PriceBus()
+            _market_feed = WebsocketFeed(bus, lambda: Info(api_url, skip_ws=False),
+                                         log=lambda message, level="INFO": logger.info(message)).start()
+        _market_snapshot = MarketSnapshot(Info(api_url, skip_ws=True), ttl=MARKET_SNAPSHOT_TTL, bus=bus)
+    return _market_snapshot
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Count and time every request by route template"""
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    API_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    if "started" in g:
+        API_SECONDS.observe(time.perf_counter() - g.started, route=route, method=request.method)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: this server's requests plus the runner processes' last dumps"""
+    for name, size in state_file_sizes(STATE_FILE).items():
+        STATE_BYTES.set(size, wallet=WALLET_NAME, file=name)
+    body = render([(REGISTRY.dump(), {"process": "api"})] + read_dumps(METRICS_DIR))
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -56,127 +181,189 @@ def health():
 @app.route('/api/bot/status', methods=['GET'])
 def bot_status():
     """Get current bot status"""
-    state = load_state()
-    config = load_config()
+    def build():
+        state = load_state()
+        config = load_config()
+        
+        if not state:
+            return {"error": "Bot state not found"}, 404
+        
+        return {
+            "capital_current": state.get("capital_current", 0),
+            "capital_initial": state.get("capital_initial", 0),
+            "trades_total": state.get("trades_total", 0),
+            "trades_won": state.get("trades_won", 0),
+            "trades_lost": state.get("trades_lost", 0),
+            "last_updated": state.get("last_updated"),
+            "trading_level": state.get("trading_level", "TURTLE"),
+            "position": state.get("position"),
+            "config": config
+        }
     
-    if not state:
-        return jsonify({"error": "Bot state not found"}), 404
+    return cached_response(build, state_version(), config_version())
+
+def db_trades_page(db, page, per_page):
+    """Get a trade page from SQLite with keyset pagination on seq"""
+    trade_count = db.trade_count(WALLET_NAME)
+    if trade_count is None:
+        return {"error": "Bot state not found"}, 404
     
-    return jsonify({
-        "capital_current": state.get("capital_current", 0),
-        "capital_initial": state.get("capital_initial", 0),
-        "trades_total": state.get("trades_total", 0),
-        "trades_won": state.get("trades_won", 0),
-        "trades_lost": state.get("trades_lost", 0),
-        "last_updated": state.get("last_updated"),
-        "trading_level": state.get("trading_level", "TURTLE"),
-        "position": state.get("position"),
-        "config": config
-    })
+    filters = {key: request.args.get(key) for key in ("pair", "action", "since", "until")}
+    after = request.args.get('after', None, type=int)
+    offset = 0
+    if after is None:
+        if any(filters.values()):
+            # No cursor: fall back to OFFSET; follow next_after for cheap paging
+            offset = (page - 1) * per_page
+        else:
+            # seq is dense (0..n-1), so page N maps straight onto a key range
+            after = (page - 1) * per_page - 1
+    
+    trades, last_seq = db.list_trades(WALLET_NAME, after=after, limit=per_page, offset=offset, **filters)
+    if not any(filters.values()):
+        total = trade_count  # maintained with every save, no COUNT(*)
+    elif page == 1 and request.args.get('after') is None:
+        total = db.count_trades(WALLET_NAME, **filters)  # filtered totals are counted on the first page only
+    else:
+        total = None
+    
+    return {
+        "trades": trades,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page if total is not None else None,
+        "next_after": last_seq if len(trades) == per_page else None
+    }
 
 @app.route('/api/bot/trades', methods=['GET'])
 def bot_trades():
     """Get trade history"""
-    state = load_state()
-    
-    if not state:
-        return jsonify({"error": "Bot state not found"}), 404
-    
-    trades = state.get("trade_history", [])
-    
     # Support pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
-    
-    start = (page - 1) * per_page
-    end = start + per_page
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 1000)
     
-    paginated_trades = trades[start:end]
+    def build():
+        db = get_trade_db(str(STATE_FILE.parent))
+        if db is not None:
+            return db_trades_page(db, page, per_page)
+        
+        state = load_state()
+        
+        if not state:
+            return {"error": "Bot state not found"}, 404
+        
+        trades = state.get("trade_history", [])
+        
+        start = (page - 1) * per_page
+        end = start + per_page
+        
+        paginated_trades = trades[start:end]
+        
+        return {
+            "trades": paginated_trades,
+            "total": len(trades),
+            "page": page,
+            "per_page": per_page,
+            "pages": (len(trades) + per_page - 1) // per_page
+        }
     
-    return jsonify({
-        "trades": paginated_trades,
-        "total": len(trades),
-        "page": page,
-        "per_page": per_page,
-        "pages": (len(trades) + per_page - 1) // per_page
-    })
+    return cached_response(build, state_version())
 
 @app.route('/api/bot/trades/<int:trade_id>', methods=['GET'])
 def bot_trade_detail(trade_id):
     """Get specific trade details"""
-    state = load_state()
-    
-    if not state:
-        return jsonify({"error": "Bot state not found"}), 404
-    
-    trades = state.get("trade_history", [])
-    
-    if trade_id < 0 or trade_id >= len(trades):
-        return jsonify({"error": "Trade not found"}), 404
+    def build():
+        db = get_trade_db(str(STATE_FILE.parent))
+        if db is not None:
+            trade = db.get_trade(WALLET_NAME, trade_id)
+            if trade is None:
+                return {"error": "Trade not found"}, 404
+            return trade
+        
+        state = load_state()
+        
+        if not state:
+            return {"error": "Bot state not found"}, 404
+        
+        trades = state.get("trade_history", [])
+        
+        if trade_id < 0 or trade_id >= len(trades):
+            return {"error": "Trade not found"}, 404
+        
+        return trades[trade_id]
     
-    return jsonify(trades[trade_id])
+    return cached_response(build, state_version())
 
 @app.route('/api/bot/performance', methods=['GET'])
 def bot_performance():
     """Get performance metrics"""
-    state = load_state()
-    
-    if not state:
-        return jsonify({"error": "Bot state not found"}), 404
-    
-    trades = state.get("trade_history", [])
-    
-    # Calculate performance metrics
-    total_trades = len(trades)
-    won_trades = state.get("trades_won", 0)
-    lost_trades = state.get("trades_lost", 0)
-    
-    win_rate = (won_trades / total_trades * 100) if total_trades > 0 else 0
-    
-    # Calculate PnL
-    capital_initial = state.get("capital_initial", 10000)
-    capital_current = state.get("capital_current", capital_initial)
-    pnl = capital_current - capital_initial
-    pnl_percentage = (pnl / capital_initial * 100) if capital_initial > 0 else 0
-    
-    # Group trades by pair
-    trades_by_pair = {}
-    for trade in trades:
-        pair = trade.get("pair", "UNKNOWN")
-        if pair not in trades_by_pair:
-            trades_by_pair[pair] = {
-                "total": 0,
-                "won": 0,
-                "lost": 0,
-                "pnl": 0
-            }
-        trades_by_pair[pair]["total"] += 1
-        if trade.get("result") == "won":
-            trades_by_pair[pair]["won"] += 1
-        elif trade.get("result") == "lost":
-            trades_by_pair[pair]["lost"] += 1
+    def build():
+        db = get_trade_db(str(STATE_FILE.parent))
+        if db is not None:
+            # Aggregates live in the scalar state: skip loading the trade rows
+            state = db.load_state(WALLET_NAME, with_history=False)
+        else:
+            state = load_state()
+        
+        if not state:
+            return {"error": "Bot state not found"}, 404
+        
+        performance = state.get(PERFORMANCE_KEY)
+        if performance is None:
+            # Legacy state without aggregates: O(trades) rebuild
+            if db is not None:
+                state = load_state() or state
+            performance = build_performance(state.get("trade_history", []))
+        
+        # Calculate performance metrics (O(pairs))
+        overall = summarize_bucket(performance["overall"])
+        
+        # Calculate PnL
+        capital_initial = state.get("capital_initial", state.get("initial_capital", 10000))
+        capital_current = state.get("capital_current", state.get("current_capital", capital_initial))
+        pnl = capital_current - capital_initial
+        pnl_percentage = (pnl / capital_initial * 100) if capital_initial > 0 else 0
+        
+        response = {
+            "total_trades": overall["total"],
+            "won_trades": overall["won"],
+            "lost_trades": overall["lost"],
+            "win_rate": overall["win_rate"],
+            "capital_initial": capital_initial,
+            "capital_current": capital_current,
+            "pnl": pnl,
+            "pnl_percentage": pnl_percentage,
+            "realized_pnl": overall["pnl"],
+            "max_drawdown": overall["max_drawdown"],
+            "sharpe_per_trade": overall["sharpe"],
+            "sharpe_daily": daily_sharpe(performance),
+            "trades_by_pair": {pair: summarize_bucket(bucket)
+                               for pair, bucket in performance["by_pair"].items()}
+        }
+        
+        # Optional per-day breakdown: ?days=N returns the last N days
+        days = request.args.get('days', 0, type=int)
+        if days > 0:
+            recent = sorted(performance["by_day"])[-days:]
+            response["trades_by_day"] = {day: summarize_bucket(performance["by_day"][day]) for day in recent}
+        
+        return response
     
-    return jsonify({
-        "total_trades": total_trades,
-        "won_trades": won_trades,
-        "lost_trades": lost_trades,
-        "win_rate": win_rate,
-        "capital_initial": capital_initial,
-        "capital_current": capital_current,
-        "pnl": pnl,
-        "pnl_percentage": pnl_percentage,
-        "trades_by_pair": trades_by_pair
-    })
+    return cached_response(build, state_version())
 
 @app.route('/api/bot/config', methods=['GET'])
 def bot_config():
     """Get bot configuration"""
-    config = load_config()
-    
-    if not config:
-        return jsonify({"error": "Bot config not found"}), 404
+    def build():
+        config = load_config()
+        
+        if not config:
+            return {"error": "Bot config not found"}, 404
+        
+        return config
     
-    return jsonify(config)
+    return cached_response(build, config_version())
 
 @app.route('/api/bot/config', methods=['POST'])
 def update_bot_config():
@@ -184,11 +371,15 @@ def update_bot_config():
     try:
         data = request.get_json()
         
-        config = load_config() or {}
+        config = dict(load_config() or {})  # don't mutate the cached object
         config.update(data)
         
         with open(CONFIG_FILE, 'w') as f:
             json.dump(config, f, indent=2)
+        with _cache_lock:
+            # Coarse mtime clocks could miss a same-size rewrite
+            _file_cache.pop(str(CONFIG_FILE), None)
+            _response_cache.clear()
         
         logger.info(f"Bot config updated: {data}")
         return jsonify({"status": "success", "config": config})
@@ -196,15 +387,36 @@ def update_bot_config():
         logger.error(f"Error updating config: {e}")
         return jsonify({"error": str(e)}), 400
 
+@app.route('/api/market/prices', methods=['GET'])
+def market_prices():
+    """Get live prices for the configured trading pairs"""
+    config = load_config() or {}
+    pairs = request.args.get('pairs')
+    pairs = pairs.split(',') if pairs else config.get("trading_pairs", [])
+    
+    try:
+        snapshot = get_market_snapshot().refresh()
+    except Exception as e:
+        logger.error(f"Error fetching market snapshot: {e}")
+        return jsonify({"error": "Market data unavailable"}), 503
+    
+    return jsonify({
+        "prices": snapshot.get_prices(pairs),
+        "snapshot_age": snapshot.age()
+    })
+
 @app.route('/api/bot/state', methods=['GET'])
 def bot_state():
     """Get complete bot state"""
-    state = load_state()
-    
-    if not state:
-        return jsonify({"error": "Bot state not found"}), 404
+    def build():
+        state = load_state()
+        
+        if not state:
+            return {"error": "Bot state not found"}, 404
+        
+        return state
     
-    return jsonify(state)
+    return cached_response(build, state_version())
 
 @app.errorhandler(404)
 def not_found(error):
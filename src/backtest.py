@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+Backtest for AurumBotX-v4
+Replays candles from the local candle store through the execute_cycle
+trading rules and reports the resulting performance
+
+Per bar and pair (vectorized with NumPy/pandas): 24h change and trend, RSI,
+the AI decision (pluggable decider), confidence threshold and bear filter.
+Trades are then walked in time order with the live rules: one open position
+at a time, one trade per cycle (pairs in config order), daily trade limit,
+position sizing (1% of capital like the live cycle, or per level with
+--sizing level) and the position watcher exits (emergency stop, stop loss,
+take profit, max holding time) checked against each bar's low/high.
+Positions open at the close of their bar; the max holding exit fills at the
+open of the first bar starting after the holding time, the first price the
+live watcher sees past it.
+
+The live bot approximates the 24h change with the funding rate; here it is
+the actual change of the close over the previous 24h.
+
+Deciders:
+    rsi       deterministic stub: BUY when RSI is oversold, confidence grows
+              with the distance below the threshold
+    recorded  AI decisions replayed from JSON lines, e.g. the bot's own
+              logs/*.jsonl ("🤖 AI Recommendation" records carry ts, pair,
+              action and confidence)
+
+Usage: python src/backtest.py [CONFIG] [--interval 1m] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+                              [--decider rsi|recorded] [--decisions FILE ...] [--sizing fixed|level]
+                              [--cycle-interval SECONDS] [--json FILE]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore, interval_ms
+from performance import build_performance, daily_sharpe, summarize_bucket
+from position_watcher import close_position, open_position
+from trading_rules import TREND_THRESHOLD_PCT, order_quantity, position_size_usd, trading_level
+
+DAY_MS = 86400 * 1000
+RSI_WINDOW = 14
+EXIT_SCAN_BARS = 4096  # bars compared per step while looking for a position's exit
+
+
+class MarketData:
+    """OHLC of several pairs aligned on their common bar times"""
+
+    def __init__(self, ts, pairs, opens, highs, lows, closes, interval):
+        self.ts = ts          # int64 bar open times (ms), shape (n,)
+        self.pairs = pairs    # config order
+        self.open = opens     # float64, shape (pairs, n)
+        self.high = highs
+        self.low = lows
+        self.close = closes
+        self.interval = interval
+
+    def __len__(self):
+        return len(self.ts)
+
+    @classmethod
+    def from_store(cls, store, pairs, interval="1m", start_ms=None, end_ms=None):
+        """Load closed bars of pairs from a CandleStore (pairs without data are dropped)"""
+        windows = {}
+        for pair in pairs:
+            bars = store.window(pair, interval)
+            if len(bars["ts"]):
+                windows[pair] = bars
+        if not windows:
+            raise ValueError(f"No {interval} candles for {', '.join(pairs)}")
+        ts = None
+        for bars in windows.values():
+            ts = np.asarray(bars["ts"]) if ts is None else np.intersect1d(ts, bars["ts"], assume_unique=True)
+        if start_ms is not None:
+            ts = ts[ts >= start_ms]
+        if end_ms is not None:
+            ts = ts[ts < end_ms]
+        kept = list(windows)
+        columns = {column: np.empty((len(kept), len(ts))) for column in ("open", "high", "low", "close")}
+        for row, pair in enumerate(kept):
+            index = np.searchsorted(windows[pair]["ts"], ts)
+            for column, values in columns.items():
+                values[row] = np.asarray(windows[pair][column])[index]
+        return cls(np.array(ts, dtype=np.int64), kept, columns["open"], columns["high"], columns["low"],
+                   columns["close"], interval)
+
+
+def rsi_series(closes, window=RSI_WINDOW):
+    """RSI of every bar, same smoothing as IncrementalRSI / ta (NaN while warming up)"""
+    if len(closes) == 0:
+        return np.empty(0)
+    diff = np.diff(closes, prepend=closes[0])  # first observation is a zero change
+    ewm = dict(alpha=1.0 / window, adjust=False, min_periods=window)
+    up = pd.Series(np.where(diff > 0, diff, 0.0)).ewm(**ewm).mean().to_numpy()
+    down = pd.Series(np.where(diff < 0, -diff, 0.0)).ewm(**ewm).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + up / down)
+    return np.where(down == 0, np.where(np.isnan(up), np.nan, 100.0), rsi)
+
+
+def change_series(ts, closes, lookback_ms=DAY_MS):
+    """Percent change of each close against the last close at least lookback_ms older (NaN before)"""
+    index = np.searchsorted(ts, ts - lookback_ms, side="right") - 1
+    valid = index >= 0
+    change = np.full(len(ts), np.nan)
+    change[valid] = (closes[valid] / closes[index[valid]] - 1) * 100
+    return change
+
+
+class RsiStubDecider:
+    """Deterministic stand-in for the LLM: BUY below an RSI threshold"""
+
+    name = "rsi"
+
+    def __init__(self, buy_below=35.0, base_confidence=50.0, slope=2.0):
+        self.buy_below = buy_below
+        self.base_confidence = base_confidence
+        self.slope = slope  # confidence points per RSI point below the threshold
+
+    def decide(self, pair, ts, close, change_24h, rsi):
+        """(buy, confidence) arrays for every bar of pair"""
+        buy = rsi < self.buy_below
+        confidence = np.clip(self.base_confidence + (self.buy_below - rsi) * self.slope, 0.0, 100.0)
+        return buy, np.where(buy, confidence, 0.0)
+
+
+class RecordedDecider:
+    """Replays recorded AI decisions; each holds until the next one for its pair or max_age"""
+
+    name = "recorded"
+
+    def __init__(self, records, max_age=3600.0):
+        self.max_age_ms = int(max_age * 1000)
+        by_pair = {}
+        for record in records:
+            if record.get("action") is None or record.get("pair") is None:
+                continue
+            ts = record["ts"]
+            ts_ms = int(ts) if isinstance(ts, (int, float)) else int(datetime.fromisoformat(ts).timestamp() * 1000)
+            by_pair.setdefault(record["pair"], []).append(
+                (ts_ms, record["action"] == "BUY", float(record.get("confidence") or 0.0)))
+        self.decisions = {pair: np.array(sorted(rows), dtype=np.float64) for pair, rows in by_pair.items()}
+
+    @classmethod
+    def from_files(cls, paths, **kwargs):
+        """Load JSON lines (bot logs or {"ts", "pair", "action", "confidence"} records)"""
+        records = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            continue
+        return cls(records, **kwargs)
+
+    def decide(self, pair, ts, close, change_24h, rsi):
+        rows = self.decisions.get(pair)
+        if rows is None or not len(rows):
+            return np.zeros(len(ts), dtype=bool), np.zeros(len(ts))
+        # Bars decide at their close: use the latest decision made before the bar ended
+        bar_end = ts + (int(np.diff(ts).min()) if len(ts) > 1 else 0)
+        index = np.searchsorted(rows[:, 0], bar_end, side="right") - 1
+        valid = index >= 0
+        valid[valid] &= bar_end[valid] - rows[index[valid], 0] <= self.max_age_ms
+        buy = np.zeros(len(ts), dtype=bool)
+        confidence = np.zeros(len(ts))
+        buy[valid] = rows[index[valid], 1] > 0
+        confidence[valid] = rows[index[valid], 2]
+        return buy, np.where(buy, confidence, 0.0)
+
+
+def _iso(ts_ms):
+    return datetime.fromtimestamp(ts_ms / 1000).isoformat()
+
+
+class Backtest:
+    """Config-independent signals of a market, replayed with run(config)"""
+
+    ARRAYS = ("rsi", "change", "buy", "confidence")
+
+    def __init__(self, market, decider, rsi_window=RSI_WINDOW):
+        self.market = market
+        self.decider_name = decider.name
+        self.rsi = np.vstack([rsi_series(closes, rsi_window) for closes in market.close])
+        self.change = np.vstack([change_series(market.ts, closes) for closes in market.close])
+        buys, confidences = [], []
+        for row, pair in enumerate(market.pairs):
+            buy, confidence = decider.decide(pair, market.ts, market.close[row], self.change[row], self.rsi[row])
+            buys.append(buy)
+            confidences.append(confidence)
+        # No RSI (warm-up) or no 24h history: the live cycle skips the pair
+        warm = ~np.isnan(self.rsi) & ~np.isnan(self.change)
+        self.buy = np.vstack(buys) & warm
+        self.confidence = np.vstack(confidences)
+        self.bearish = self.change < -TREND_THRESHOLD_PCT
+
+    def save(self, directory):
+        """Write market and signals as .npy files (for memory-mapped loading elsewhere)"""
+        os.makedirs(directory, exist_ok=True)
+        market = self.market
+        arrays = {"ts": market.ts, "open": market.open, "high": market.high, "low": market.low,
+                  "close": market.close}
+        arrays.update({name: getattr(self, name) for name in self.ARRAYS})
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"pairs": market.pairs, "interval": market.interval, "decider": self.decider_name}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """Backtest over arrays written by save(), memory-mapped read-only by default"""
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ("ts", "open", "high", "low", "close") + cls.ARRAYS}
+        backtest = cls.__new__(cls)
+        backtest.market = MarketData(arrays["ts"], meta["pairs"], arrays["open"], arrays["high"], arrays["low"],
+                                     arrays["close"], meta["interval"])
+        backtest.decider_name = meta["decider"]
+        for name in cls.ARRAYS:
+            setattr(backtest, name, arrays[name])
+        backtest.bearish = backtest.change < -TREND_THRESHOLD_PCT
+        return backtest
+
+    def cycle_mask(self, cycle_interval):
+        """Bars at which a cycle runs (the first bar of every cycle_interval)"""
+        ts = self.market.ts
+        step = int(cycle_interval * 1000)
+        if step <= interval_ms(self.market.interval):
+            return np.ones(len(ts), dtype=bool)
+        slot = ts // step
+        mask = np.ones(len(ts), dtype=bool)
+        mask[1:] = slot[1:] != slot[:-1]
+        return mask
+
+    def _exit(self, row, entry, position, state, config, max_hold_ms):
+        """First bar after entry where a watcher exit fires: (bar, price, reason)
+
+        The position opens at the close of the entry bar and the max holding time
+        runs from there. Like the live watcher, the max holding exit fills at the
+        first price at or after that moment: the open of the first bar starting
+        then, whose open is also checked against the levels first.
+        """
+        market = self.market
+        last = len(market) - 1
+        crossing = None
+        end = last
+        if max_hold_ms:
+            deadline = int(market.ts[entry]) + interval_ms(market.interval) + max_hold_ms
+            crossing = int(np.searchsorted(market.ts, deadline))  # first bar opening at/after the deadline
+            end = min(last, crossing - 1)
+        entry_price = position["entry_price"]
+
+        # Same order as evaluate_exit: emergency stop, stop loss, take profit
+        levels = []
+        emergency_pct = config.get("emergency_stop_loss_pct")
+        if emergency_pct:
+            floor = state["initial_capital"] * (1 - emergency_pct / 100)
+            levels.append(("emergency_stop", entry_price + (floor - state["current_capital"]) / position["quantity"],
+                           market.low, False))
+        if config.get("stop_loss_pct"):
+            levels.append(("stop_loss", entry_price * (1 - config["stop_loss_pct"] / 100), market.low, False))
+        if config.get("take_profit_pct"):
+            levels.append(("take_profit", entry_price * (1 + config["take_profit_pct"] / 100), market.high, True))
+
+        lo = entry + 1
+        while lo <= end:
+            hi = min(end, lo + EXIT_SCAN_BARS - 1)
+            best = None
+            for reason, level, prices, above in levels:
+                window = prices[row, lo:hi + 1]
+                hits = window >= level if above else window <= level
+                if hits.any():
+                    bar = lo + int(hits.argmax())
+                    if best is None or bar < best[0]:
+                        # Gaps through the level fill at the open
+                        opened = market.open[row, bar]
+                        best = (bar, float(max(opened, level) if above else min(opened, level)), reason)
+            if best is not None:
+                return best
+            lo = hi + 1
+        if crossing is not None and crossing <= last:
+            opened = float(market.open[row, crossing])
+            for reason, level, _, above in levels:
+                if opened >= level if above else opened <= level:
+                    return crossing, opened, reason
+            return crossing, opened, "max_holding_time"
+        if crossing is not None and market.ts[last] + interval_ms(market.interval) >= deadline:
+            return last, float(market.close[row, last]), "max_holding_time"  # the last bar closes past it
+        return last, float(market.close[row, last]), "end_of_data"
+
+    def run(self, config, sizing="fixed", cycle_interval=None):
+        """Replay the market with config; returns the report dict"""
+        started = time.monotonic()
+        market = self.market
+        n = len(market)
+        if cycle_interval is None:
+            cycle_interval = float(config.get("cycle_interval_hours", 1)) * 3600
+        min_confidence = config.get("min_confidence", 60.0)
+        max_daily = config.get("max_daily_trades", 12)
+        max_hold_ms = int(config.get("max_holding_hours", 0) * 3600 * 1000)
+        sizing_config = config if sizing == "level" else None
+
+        cycles = self.cycle_mask(cycle_interval)
+        low_confidence = self.buy & (self.confidence < min_confidence) & cycles
+        bear_market = self.buy & ~low_confidence & self.bearish & cycles
+        eligible = self.buy & ~(self.confidence < min_confidence) & ~self.bearish & cycles
+        # next_entry[i]: first bar >= i where some pair passes every filter
+        candidates = np.where(eligible.any(axis=0), np.arange(n), n)
+        next_entry = np.append(np.minimum.accumulate(candidates[::-1])[::-1], n)
+
+        capital = float(config.get("initial_capital", 10000.0))
+        state = {"initial_capital": capital, "current_capital": capital, "open_position": None,
+                 "trade_history": [], "winning_trades": 0, "losing_trades": 0, "emergency_stop": False}
+        exits = {}
+        daily = {}
+        equity = [(int(market.ts[0]) if n else 0, capital)]
+
+        i = next_entry[0] if n else 0
+        while i < n:
+            day = _iso(market.ts[i])[:10]
+            if daily.get(day, 0) >= max_daily:
+                midnight = datetime.fromisoformat(day) + timedelta(days=1)
+                i = next_entry[min(n, int(np.searchsorted(market.ts, midnight.timestamp() * 1000)))]
+                continue
+            trade = None
+            for row in np.flatnonzero(eligible[:, i]):  # config order, first tradable pair wins
+                price = float(market.close[row, i])
+                size = position_size_usd(state["current_capital"], sizing_config)
+                quantity = order_quantity(size, price)
+                if quantity is None:
+                    continue
+                trade = {"timestamp": _iso(market.ts[i]), "pair": market.pairs[row], "action": "BUY",
+                         "price": price, "quantity": quantity, "trade_size_usd": size,
+                         "confidence": float(self.confidence[row, i]), "reasoning": self.decider_name,
+                         "level": trading_level(state["current_capital"], config)}
+                break
+            if trade is None:
+                i = next_entry[i + 1]
+                continue
+
+            state["trade_history"].append(trade)
+            daily[day] = daily.get(day, 0) + 1
+            position = state["open_position"] = open_position(trade)
+            bar, price, reason = self._exit(row, i, position, state, config, max_hold_ms)
+            closed = close_position(state, price, reason, now=datetime.fromtimestamp(market.ts[bar] / 1000))
+            exits[reason] = exits.get(reason, 0) + 1
+            equity.append((int(market.ts[bar]), state["current_capital"]))
+            if state["emergency_stop"] or closed["exit_reason"] == "end_of_data":
+                break
+            # The watcher closed it during bar `bar`; the cycle at that bar's close may trade again
+            i = next_entry[bar] if bar > i else next_entry[i + 1]
+
+        return self._report(config, state, exits, equity, low_confidence, bear_market,
+                            time.monotonic() - started)
+
+    def _report(self, config, state, exits, equity, low_confidence, bear_market, elapsed):
+        market = self.market
+        performance = build_performance(state["trade_history"])
+        overall = summarize_bucket(performance["overall"])
+        initial = state["initial_capital"]
+        final = state["current_capital"]
+        curve = np.array([value for _, value in equity])
+        drawdown = float(((np.maximum.accumulate(curve) - curve) / np.maximum.accumulate(curve)).max() * 100)
+        return {
+            "pairs": market.pairs,
+            "interval": market.interval,
+            "bars": len(market),
+            "from": _iso(market.ts[0]) if len(market) else None,
+            "to": _iso(market.ts[-1]) if len(market) else None,
+            "decider": self.decider_name,
+            "initial_capital": initial,
+            "final_capital": final,
+            "return_pct": (final / initial - 1) * 100,
+            "max_drawdown_pct": drawdown,
+            "trades": overall["total"],
+            "won": overall["won"],
+            "lost": overall["lost"],
+            "win_rate": overall["win_rate"],
+            "pnl": overall["pnl"],
+            "sharpe_per_trade": overall["sharpe"],
+            "sharpe_daily": daily_sharpe(performance),
+            "exits": exits,
+            "emergency_stop": state["emergency_stop"],
+            "low_confidence_skipped": int(low_confidence.sum()),
+            "bear_market_skipped": int(bear_market.sum()),
+            "by_pair": {pair: summarize_bucket(bucket) for pair, bucket in performance["by_pair"].items()},
+            "trade_history": state["trade_history"],
+            "elapsed_s": elapsed
+        }
+
+
+def format_report(report):
+    """Human-readable summary of a backtest report"""
+    sharpe = lambda value: f"{value:.2f}" if value is not None else "n/a"
+    lines = [
+        "=" * 60,
+        f"📊 BACKTEST - {', '.join(report['pairs'])} ({report['interval']}, {report['bars']:,} bars)",
+        f"   {report['from']} -> {report['to']}  decider: {report['decider']}",
+        "=" * 60,
+        f"💰 Capital: ${report['initial_capital']:,.2f} -> ${report['final_capital']:,.2f} "
+        f"({report['return_pct']:+.2f}%)",
+        f"📉 Max drawdown: {report['max_drawdown_pct']:.2f}%",
+        f"🔢 Trades: {report['trades']} (won {report['won']}, lost {report['lost']}, "
+        f"win rate {report['win_rate']:.1f}%)",
+        f"📈 Sharpe: {sharpe(report['sharpe_per_trade'])} per trade, {sharpe(report['sharpe_daily'])} daily (annualized)",
+        "🚪 Exits: " + (", ".join(f"{reason} {count}" for reason, count in sorted(report["exits"].items())) or "none"),
+        f"⏭️  Skipped signals: {report['low_confidence_skipped']} low confidence, "
+        f"{report['bear_market_skipped']} bear market",
+    ]
+    if report["emergency_stop"]:
+        lines.append("🛑 Emergency stop triggered - trading halted")
+    if report["by_pair"]:
+        lines.append("")
+        lines.append(f"{'Pair':<8}{'Trades':>8}{'Win %':>8}{'PnL':>14}{'Max DD':>12}")
+        for pair, bucket in report["by_pair"].items():
+            lines.append(f"{pair:<8}{bucket['total']:>8}{bucket['win_rate']:>8.1f}"
+                         f"{bucket['pnl']:>+14,.2f}{bucket['max_drawdown']:>12,.2f}")
+    lines.append(f"\n⏱️  Replayed in {report['elapsed_s']:.2f}s")
+    return "\n".join(lines)
+
+
+def _date_ms(value):
+    return int(datetime.fromisoformat(value).timestamp() * 1000) if value else None
+
+
+def add_market_arguments(parser):
+    """Arguments selecting the replayed market, decider and trading rules (shared with sweep.py)"""
+    parser.add_argument("config", nargs="?", default="config/hyperliquid_testnet_10k.json", help="Wallet config")
+    parser.add_argument("--interval", default="1m", help="Candle interval to replay")
+    parser.add_argument("--candle-dir", default=os.getenv(
+        "CANDLE_DIR", os.path.join(os.getenv("STATE_DIR", "./hyperliquid_trading"), "candles")))
+    parser.add_argument("--from", dest="start", default=None, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", default=None, help="Day after the last one (YYYY-MM-DD)")
+    parser.add_argument("--pairs", default=None, help="Comma-separated pairs (default: config trading_pairs)")
+    parser.add_argument("--decider", choices=("rsi", "recorded"), default="rsi")
+    parser.add_argument("--decisions", nargs="*", default=None,
+                        help="Recorded decisions (JSON lines); default: logs/*.jsonl")
+    parser.add_argument("--buy-below", type=float, default=35.0, help="rsi decider: BUY below this RSI")
+    parser.add_argument("--sizing", choices=("fixed", "level"), default="fixed",
+                        help="fixed: 1%% like the live cycle, level: config position_sizing per level")
+    parser.add_argument("--cycle-interval", type=float, default=None,
+                        help="Seconds between cycles (default: config cycle_interval_hours)")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AurumBotX Backtest")
+    add_market_arguments(parser)
+    parser.add_argument("--json", default=None, help="Write the full report (with trades) to this file")
+    return parser.parse_args(argv)
+
+
+def make_decider(args):
+    """Decider selected on the command line"""
+    if args.decider == "recorded":
+        paths = args.decisions or sorted(glob.glob(os.path.join(os.getenv("LOG_DIR", "./logs"), "*.jsonl")))
+        return RecordedDecider.from_files(paths, max_age=args.cycle_interval or 3600.0)
+    return RsiStubDecider(buy_below=args.buy_below)
+
+
+def load_backtest(args, config):
+    """Backtest over the market selected by add_market_arguments() (exits on missing data)"""
+    pairs = args.pairs.split(",") if args.pairs else config.get("trading_pairs", ["BTC", "ETH", "SOL"])
+    loaded = time.monotonic()
+    try:
+        market = MarketData.from_store(CandleStore(args.candle_dir, read_only=True), pairs, args.interval,
+                                       _date_ms(args.start), _date_ms(args.end))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    backtest = Backtest(market, make_decider(args))
+    print(f"🕯️  Loaded {len(market):,} bars x {len(market.pairs)} pairs and computed signals "
+          f"in {time.monotonic() - loaded:.2f}s")
+    return backtest
+
+
+def main():
+    """Command line entry point"""
+    args = parse_args()
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    backtest = load_backtest(args, config)
+    report = backtest.run(config, sizing=args.sizing, cycle_interval=args.cycle_interval)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"💾 Report saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Bot Logger for AurumBotX-v4
+Buffered log backend: human-readable console lines plus daily text and
+JSON-lines files with size rotation
+
+<log_dir>/<prefix>_YYYYMMDD.log    same "[time] [LEVEL] message" lines as the console
+<log_dir>/<prefix>_YYYYMMDD.jsonl  {"ts", "level", "msg", "cycle_id", "pair", "latency_ms", ...}
+
+Records are buffered in memory and written in batches: when the buffer is
+full, when the flush interval has elapsed, on WARNING/ERROR, on flush() and
+at exit. With background=True a writer thread does the periodic flushes.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+FLUSH_LEVELS = ("WARNING", "ERROR", "CRITICAL")
+
+
+class BotLogger:
+    """Buffered console + file logger with per-thread structured fields"""
+
+    def __init__(self, log_dir, prefix, buffer_size=64, flush_interval=1.0, max_bytes=50 * 1024 * 1024,
+                 backups=5, json_lines=True, console=True, background=False):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.json_lines = json_lines
+        self.console = console
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._files = {}  # extension -> (day, file object)
+        self._lock = threading.Lock()        # buffer and console (not reentrant: never log from a signal handler)
+        self._write_lock = threading.Lock()  # files; held from the buffer swap to the write
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._writer = None
+        os.makedirs(log_dir, exist_ok=True)
+        if background:
+            self.start_writer()
+        atexit.register(self.close)
+
+    # -- structured context --------------------------------------------------
+
+    def _fields(self):
+        fields = getattr(self._local, "fields", None)
+        if fields is None:
+            fields = self._local.fields = {}
+        return fields
+
+    def bind(self, **fields):
+        """Attach fields to every record logged from this thread (None removes one)"""
+        current = self._fields()
+        for key, value in fields.items():
+            if value is None:
+                current.pop(key, None)
+            else:
+                current[key] = value
+
+    def bound(self):
+        """Copy of the fields bound to this thread (to carry into worker threads)"""
+        return dict(self._fields())
+
+    @contextmanager
+    def context(self, **fields):
+        """Bind fields for the duration of a block"""
+        previous = self.bound()
+        self.bind(**fields)
+        try:
+            yield
+        finally:
+            self._local.fields = previous
+
+    # -- logging -------------------------------------------------------------
+
+    def log(self, message, level="INFO", **fields):
+        """Print the console line and buffer the record for the log files"""
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] [{level}] {message}"
+        record = {"ts": now.isoformat(timespec="milliseconds"), "level": level, "msg": message}
+        record.update(self._fields())
+        record.update(fields)
+
+        with self._lock:
+            if self.console:
+                # One write per line keeps lines from worker threads intact
+                sys.stdout.write(line + "\n")
+            self._buffer.append((timestamp[:10].replace("-", ""), line, record))
+            due = (len(self._buffer) >= self.buffer_size or level in FLUSH_LEVELS
+                   or (self._writer is None and time.monotonic() - self._last_flush >= self.flush_interval))
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the log files"""
+        # Swap and write under one lock: a flush() racing the writer thread cannot land its
+        # batch before an older one; log() only waits on the buffer lock, not on the files
+        with self._write_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+            if self.console:
+                sys.stdout.flush()
+            if not records:
+                return
+            try:
+                self._write(records)
+            except OSError as e:
+                sys.stderr.write(f"[logger] write failed, {len(records)} records dropped: {e}\n")
+
+    def _write(self, records):
+        day = None
+        text, jsonl = [], []
+        for record_day, line, record in records:
+            if record_day != day and text:
+                self._emit(day, text, jsonl)
+                text, jsonl = [], []
+            day = record_day
+            text.append(line)
+            if self.json_lines:
+                jsonl.append(json.dumps(record, ensure_ascii=False, default=str))
+        self._emit(day, text, jsonl)
+
+    def _emit(self, day, text, jsonl):
+        self._append("log", day, text)
+        if jsonl:
+            self._append("jsonl", day, jsonl)
+
+    def _append(self, extension, day, lines):
+        f = self._open(extension, day)
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        if self.max_bytes and f.tell() >= self.max_bytes:
+            self._rotate(extension, day)
+
+    def _path(self, extension, day):
+        return os.path.join(self.log_dir, f"{self.prefix}_{day}.{extension}")
+
+    def _open(self, extension, day):
+        """Current file for extension, switching to a new one when the day changes"""
+        current = self._files.get(extension)
+        if current is not None and current[0] == day:
+            return current[1]
+        if current is not None:
+            current[1].close()
+        f = open(self._path(extension, day), "a", encoding="utf-8")
+        self._files[extension] = (day, f)
+        return f
+
+    def _rotate(self, extension, day):
+        """Size rotation: file -> file.1 -> file.2 ... (keeping `backups` files)"""
+        self._files.pop(extension)[1].close()
+        path = self._path(extension, day)
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    # -- background writer ---------------------------------------------------
+
+    def start_writer(self):
+        """Flush from a background thread every flush_interval seconds"""
+        if self._writer is not None:
+            return
+        self._stop.clear()
+        self._writer = threading.Thread(target=self._run_writer, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def _run_writer(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the writer thread, flush and close the files"""
+        self._stop.set()
+        writer, self._writer = self._writer, None
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout=5)
+        self.flush()
+        with self._write_lock:
+            for _, f in self._files.values():
+                f.close()
+            self._files.clear()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Call Recorder for AurumBotX-v4
+Records Hyperliquid Info calls (all_mids, meta, candles_snapshot) and LLM
+chat completions to a JSON-lines file, and replays them offline with the
+recorded latencies, scaled latencies or none at all
+
+Recording line: {"call": "all_mids", "key": ..., "latency": 0.123, "response": ...}
+                (or "error" instead of "response" when the call raised)
+
+Replay serves, for each call, the next recorded response with the same key
+(chat completions are keyed on model + messages), falling back to the next
+response of the same call in recording order, and wraps around when the
+recording runs out.
+
+Usage: python src/call_recorder.py info FILE
+"""
+
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+INFO_CALLS = ("all_mids", "meta", "candles_snapshot")
+
+
+def _jsonable(value):
+    """Plain JSON data of an SDK / OpenAI response object"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return value
+
+
+def _namespace(value):
+    """Attribute access over recorded dicts (response.choices[0].message.content)"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{name: _namespace(item) for name, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+def call_key(call, args=(), kwargs=None):
+    """Replay key of a call: candle requests by symbol/interval, chat by model + messages"""
+    kwargs = kwargs or {}
+    if call == "candles_snapshot":
+        return "/".join(str(arg) for arg in args[:2])
+    if call == "chat":
+        payload = json.dumps([kwargs.get("model"), kwargs.get("messages")], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    return None
+
+
+class CallRecorder:
+    """Appends calls to a JSON-lines recording"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def call(self, call, function, *args, **kwargs):
+        """Run function(*args, **kwargs) and record its result, error and latency"""
+        entry = {"call": call, "key": call_key(call, args, kwargs)}
+        started = time.monotonic()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as e:
+            entry.update(latency=time.monotonic() - started, error=f"{type(e).__name__}: {e}")
+            self._write(entry)
+            raise
+        entry.update(latency=time.monotonic() - started, response=_jsonable(result))
+        self._write(entry)
+        return result
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.count += 1
+
+
+class CallReplayer:
+    """Serves recorded responses in place of the live calls"""
+
+    def __init__(self, entries, latency_scale=1.0):
+        self.latency_scale = latency_scale  # 1.0 = original latencies, 0 = no delay
+        self.served = 0
+        self._by_key = defaultdict(list)   # (call, key) -> entries
+        self._by_call = defaultdict(list)  # call -> entries in recording order
+        self._cursors = {}
+        self._lock = threading.Lock()
+        for entry in entries:
+            self._by_key[(entry["call"], entry.get("key"))].append(entry)
+            self._by_call[entry["call"]].append(entry)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()], **kwargs)
+
+    def _next(self, group, entries):
+        position = self._cursors.get(group, 0)
+        self._cursors[group] = position + 1
+        return entries[position % len(entries)]
+
+    def call(self, call, *args, **kwargs):
+        """Recorded outcome of the call (sleeps the recorded latency, re-raises recorded errors)"""
+        key = call_key(call, args, kwargs)
+        with self._lock:
+            if self._by_key.get((call, key)):
+                entry = self._next((call, key), self._by_key[(call, key)])
+            elif self._by_call.get(call):
+                entry = self._next(call, self._by_call[call])
+            else:
+                raise LookupError(f"No recorded {call} calls")
+            self.served += 1
+        if self.latency_scale and entry.get("latency"):
+            time.sleep(entry["latency"] * self.latency_scale)
+        if "error" in entry:
+            raise RuntimeError(f"Recorded error: {entry['error']}")
+        return entry["response"]
+
+
+class RecordingInfo:
+    """Info proxy recording all_mids / meta / candles_snapshot"""
+
+    def __init__(self, info, recorder):
+        self._info = info
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attribute = getattr(self._info, name)
+        if name not in INFO_CALLS:
+            return attribute
+        return lambda *args, **kwargs: self._recorder.call(name, attribute, *args, **kwargs)
+
+
+class ReplayingInfo:
+    """Offline Info answering from a recording"""
+
+    def __init__(self, replayer):
+        self._replayer = replayer
+
+    def all_mids(self):
+        return self._replayer.call("all_mids")
+
+    def meta(self):
+        return self._replayer.call("meta")
+
+    def candles_snapshot(self, name, interval, start_time, end_time):
+        return self._replayer.call("candles_snapshot", name, interval, start_time, end_time)
+
+
+def parse_latency(value):
+    """'original' -> 1.0, 'zero' -> 0.0, or a scale factor like '0.5'"""
+    value = str(value).strip().lower()
+    if value in ("", "original"):
+        return 1.0
+    if value == "zero":
+        return 0.0
+    return float(value)
+
+
+class CallHarness:
+    """Record or replay mode for the runner's Info client and LLM calls"""
+
+    def __init__(self, record_file=None, replay_file=None, latency="original"):
+        if record_file and replay_file:
+            raise ValueError("Recording and replaying at the same time is not supported")
+        self.recorder = CallRecorder(record_file) if record_file else None
+        self.replayer = CallReplayer.from_file(replay_file, latency_scale=parse_latency(latency)) \
+            if replay_file else None
+
+    @property
+    def mode(self):
+        return "replay" if self.replayer is not None else "record"
+
+    def info(self, factory):
+        """Info for REST calls: recording proxy around factory(), or the replayed one (factory unused)"""
+        if self.replayer is not None:
+            return ReplayingInfo(self.replayer)
+        return RecordingInfo(factory(), self.recorder)
+
+    def wrap_completion(self, create):
+        """Chat completion function recording create(**kwargs), or replaying it"""
+        if self.replayer is not None:
+            return lambda **kwargs: _namespace(self.replayer.call("chat", **kwargs))
+        return lambda **kwargs: self.recorder.call("chat", create, **kwargs)
+
+
+def summarize(path):
+    """Per-call counts and latency stats of a recording"""
+    stats = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            item = stats.setdefault(entry["call"], {"count": 0, "errors": 0, "latencies": []})
+            item["count"] += 1
+            item["errors"] += "error" in entry
+            item["latencies"].append(entry.get("latency") or 0.0)
+    return stats
+
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    if len(args) != 2 or args[0] != "info":
+        print(__doc__)
+        sys.exit(1)
+    for call, item in sorted(summarize(args[1]).items()):
+        latencies = sorted(item["latencies"])
+        print(f"{call:>18}: {item['count']:>6} calls, {item['errors']} errors, latency avg "
+              f"{sum(latencies) / len(latencies) * 1000:.1f}ms, p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+              f"max {latencies[-1] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
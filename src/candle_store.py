@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Candle Store for AurumBotX-v4
+Local OHLCV history per symbol and interval, kept as append-only columnar
+files that are read back as memory-mapped NumPy arrays
+
+Layout: <root>/<interval>/<symbol>/{ts,open,high,low,close,volume}.bin
+        plus partial.json holding the bar that is still being built.
+Timestamps are bar open times in milliseconds (Hyperliquid convention).
+NumPy is imported on first access, so opening the store costs no import.
+
+Usage: python src/candle_store.py import SYMBOL INTERVAL FILE [FILE ...]
+       python src/candle_store.py info [SYMBOL]
+"""
+
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+DTYPES = {"ts": "int64", "open": "float64", "high": "float64",
+          "low": "float64", "close": "float64", "volume": "float64"}
+ITEM_SIZE = 8  # bytes per value, every column is 64-bit
+INTERVAL_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def interval_ms(interval):
+    """Convert an interval like '1m', '15m', '1h', '1d' to milliseconds"""
+    try:
+        return int(interval[:-1]) * INTERVAL_UNITS[interval[-1]] * 1000
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported interval: {interval}")
+
+
+class CandleSeries:
+    """Append-only OHLCV columns for one symbol and interval"""
+
+    def __init__(self, path, interval, read_only=False):
+        self.path = path
+        self.interval = interval
+        self.read_only = read_only  # another process appends; never truncate
+        self.step = interval_ms(interval)
+        self.partial = None  # [ts, open, high, low, close, volume] of the open bar
+        self._maps = {}
+        self._mapped_len = -1
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        if not read_only:
+            self._repair()
+        self._load_partial()
+
+    def _column_file(self, column):
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _repair(self):
+        """Truncate columns to a common length (after a crash mid-append)"""
+        lengths = []
+        for column in COLUMNS:
+            file_path = self._column_file(column)
+            size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            lengths.append(size // ITEM_SIZE)
+        rows = min(lengths)
+        if rows != max(lengths):
+            for column in COLUMNS:
+                with open(self._column_file(column), "ab") as f:
+                    f.truncate(rows * ITEM_SIZE)
+
+    def _load_partial(self):
+        try:
+            with open(os.path.join(self.path, "partial.json"), "r") as f:
+                self.partial = json.load(f)
+        except (OSError, ValueError):
+            self.partial = None
+
+    def _save_partial(self):
+        partial_file = os.path.join(self.path, "partial.json")
+        tmp_path = f"{partial_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.partial, f)
+        os.replace(tmp_path, partial_file)
+
+    def __len__(self):
+        file_path = self._column_file("ts")
+        return os.path.getsize(file_path) // ITEM_SIZE if os.path.exists(file_path) else 0
+
+    def _columns(self):
+        """Memory-mapped columns, re-mapped only when the files have grown"""
+        rows = len(self)
+        if rows != self._mapped_len:
+            import numpy as np
+            if rows == 0:
+                self._maps = {column: np.empty(0, dtype=DTYPES[column]) for column in COLUMNS}
+            else:
+                self._maps = {column: np.memmap(self._column_file(column), dtype=DTYPES[column],
+                                                mode="r", shape=(rows,))
+                              for column in COLUMNS}
+            self._mapped_len = rows
+        return self._maps
+
+    def _last_ts(self):
+        ts = self._columns()["ts"]
+        return int(ts[-1]) if len(ts) else None
+
+    def last_ts(self):
+        """Open time of the newest closed bar (None if empty)"""
+        with self._lock:
+            return self._last_ts()
+
+    def window(self, limit=None, columns=COLUMNS):
+        """Zero-copy views over the last `limit` closed bars"""
+        with self._lock:
+            maps = self._columns()
+        if limit is None:
+            return {column: maps[column] for column in columns}
+        return {column: maps[column][-limit:] for column in columns}
+
+    def append(self, bars):
+        """Append closed bars (dict of equal-length arrays), skipping ones not newer than the last"""
+        with self._lock:
+            return self._append(bars)
+
+    def _append(self, bars):
+        import numpy as np
+        ts = np.asarray(bars["ts"], dtype=np.int64)
+        if len(ts) == 0:
+            return 0
+        last = self._last_ts()
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[1:] = ts[1:] > ts[:-1]  # drop duplicates
+        if last is not None:
+            keep &= ts > last
+        if not keep.any():
+            return 0
+        # ts goes last: len() follows it, so concurrent readers never map a half-written row
+        for column in COLUMNS[::-1]:
+            values = np.asarray(bars[column], dtype=DTYPES[column])[order][keep]
+            with open(self._column_file(column), "ab") as f:
+                values.tofile(f)
+        return int(keep.sum())
+
+    def record(self, ts_ms, price, volume=0.0):
+        """Fold a sampled price into the open bar, closing it when a new bar starts"""
+        bucket = int(ts_ms) - int(ts_ms) % self.step
+        price = float(price)
+        with self._lock:
+            partial = self.partial
+            if partial is not None and bucket < partial[0]:
+                return  # late sample
+            if partial is not None and bucket == partial[0]:
+                partial[2] = max(partial[2], price)
+                partial[3] = min(partial[3], price)
+                partial[4] = price
+                partial[5] += volume
+            else:
+                if partial is not None:
+                    self._append({column: [partial[i]] for i, column in enumerate(COLUMNS)})
+                self.partial = [bucket, price, price, price, price, volume]
+            self._save_partial()
+
+    def backfill(self, info, symbol, limit):
+        """Fetch closed candles newer than the last stored bar from Hyperliquid"""
+        now = int(time.time() * 1000)
+        last = self.last_ts()
+        start = last + self.step if last is not None else now - (limit + 1) * self.step
+        if now < start + self.step:
+            return 0  # no closed bar missing
+        candles = info.candles_snapshot(symbol, self.interval, start, now)
+        closed = [c for c in candles if int(c["T"]) < now]
+        if not closed:
+            return 0
+        return self.append(candles_to_columns(closed))
+
+
+class CandleStore:
+    """Collection of CandleSeries under one root directory"""
+
+    def __init__(self, root, read_only=False):
+        self.root = root
+        self.read_only = read_only
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, symbol, interval="1h"):
+        """Get (or open) the series for symbol and interval"""
+        key = (symbol, interval)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = CandleSeries(os.path.join(self.root, interval, symbol), interval,
+                                                                 read_only=self.read_only)
+            return series
+
+    def window(self, symbol, interval="1h", limit=None):
+        """Zero-copy views over the last `limit` closed bars of symbol"""
+        return self.series(symbol, interval).window(limit)
+
+    def record_mids(self, mids, ts_ms=None, symbols=None, interval="1h"):
+        """Sample mid prices (e.g. from info.all_mids()) into the open bars"""
+        ts_ms = ts_ms if ts_ms is not None else int(time.time() * 1000)
+        for symbol in symbols if symbols is not None else mids:
+            if symbol in mids:
+                self.series(symbol, interval).record(ts_ms, mids[symbol])
+
+    def import_file(self, file_path, symbol, interval="1h"):
+        """Bulk-import candles from CSV (ts,open,high,low,close[,volume]) or Hyperliquid JSON"""
+        if file_path.endswith(".json"):
+            with open(file_path, "r") as f:
+                columns = candles_to_columns(json.load(f))
+        else:
+            columns = read_csv_candles(file_path)
+        return self.series(symbol, interval).append(columns)
+
+    def symbols(self, interval=None):
+        """List (symbol, interval) pairs present on disk"""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for iv in sorted(os.listdir(self.root)):
+            if interval and iv != interval:
+                continue
+            iv_dir = os.path.join(self.root, iv)
+            if os.path.isdir(iv_dir):
+                found.extend((symbol, iv) for symbol in sorted(os.listdir(iv_dir)))
+        return found
+
+
+def candles_to_columns(candles):
+    """Convert Hyperliquid candle dicts (t/o/h/l/c/v) to column arrays"""
+    import numpy as np
+    return {
+        "ts": np.array([int(c["t"]) for c in candles], dtype=np.int64),
+        "open": np.array([float(c["o"]) for c in candles]),
+        "high": np.array([float(c["h"]) for c in candles]),
+        "low": np.array([float(c["l"]) for c in candles]),
+        "close": np.array([float(c["c"]) for c in candles]),
+        "volume": np.array([float(c.get("v", 0)) for c in candles])
+    }
+
+
+def read_csv_candles(file_path):
+    """Read a candle CSV; timestamps in seconds are converted to milliseconds"""
+    import numpy as np
+    with open(file_path, "r", newline="") as f:
+        rows = [row for row in csv.reader(f) if row]
+    if rows and not rows[0][0].replace(".", "", 1).isdigit():
+        rows = rows[1:]  # header
+    data = np.array([[float(v) for v in row[:6]] + [0.0] * (6 - len(row[:6])) for row in rows])
+    if len(data) == 0:
+        data = np.empty((0, 6))
+    ts = data[:, 0].astype(np.int64)
+    if len(ts) and ts.max() < 10 ** 11:
+        ts *= 1000
+    return {"ts": ts, "open": data[:, 1], "high": data[:, 2], "low": data[:, 3],
+            "close": data[:, 4], "volume": data[:, 5]}
+
+
+def main():
+    """Command line entry point"""
+    root = os.getenv("CANDLE_DIR", os.path.join(os.getenv("STATE_DIR", "./hyperliquid_trading"), "candles"))
+    store = CandleStore(root)
+    args = sys.argv[1:]
+
+    if len(args) >= 4 and args[0] == "import":
+        symbol, interval = args[1], args[2]
+        for file_path in args[3:]:
+            added = store.import_file(file_path, symbol, interval)
+            print(f"✅ {file_path}: {added} bars imported into {symbol} {interval}")
+    elif args and args[0] == "info":
+        for symbol, interval in store.symbols():
+            if len(args) > 1 and symbol != args[1]:
+                continue
+            series = store.series(symbol, interval)
+            bars = series.window()
+            if len(bars["ts"]):
+                first = time.strftime("%Y-%m-%d %H:%M", time.gmtime(bars["ts"][0] / 1000))
+                last = time.strftime("%Y-%m-%d %H:%M", time.gmtime(bars["ts"][-1] / 1000))
+                print(f"{symbol:>8} {interval:>4} {len(series):>10} bars  {first} -> {last} UTC")
+            else:
+                print(f"{symbol:>8} {interval:>4} {0:>10} bars")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
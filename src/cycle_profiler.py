@@ -0,0 +1,151 @@
+"""
+Cycle Profiler for AurumBotX-v4
+Opt-in profiling of the next N trading cycles of a running bot
+
+Armed by PROFILE_CYCLES at startup or by SIGUSR1 at runtime. Each profiled
+cycle writes one file under <LOG_DIR>/profiles:
+
+sample    <time>_<wallet>_<pid>.folded  stacks of the cycle thread and the
+                                        analysis pool, sampled every
+                                        PROFILE_INTERVAL seconds, in folded
+                                        format (flamegraph.pl, speedscope)
+cprofile  <time>_<wallet>_<pid>.prof    cProfile stats of the cycle thread
+                                        only (pstats, snakeviz, flameprof)
+
+When not armed, profile() costs one attribute check per cycle.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+PROFILE_MODES = ("sample", "cprofile")
+IDLE_FRAMES = {("_worker", "thread.py")}  # pool threads waiting for work
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread counting the folded stacks of selected threads"""
+
+    def __init__(self, interval=0.005, thread_ids=(), thread_prefixes=()):
+        self.interval = interval
+        self.thread_ids = set(thread_ids)
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _selected(self):
+        """{ident: name} of the sampled threads"""
+        return {thread.ident: thread.name for thread in threading.enumerate()
+                if thread.ident in self.thread_ids or thread.name.startswith(self.thread_prefixes)}
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            threads = self._selected()
+            frames = sys._current_frames()
+            self.samples += 1
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                code = frame.f_code
+                if (code.co_name, os.path.basename(code.co_filename)) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(name.rstrip("0123456789_"))  # one root per thread pool, not per thread
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CycleProfiler:
+    """Profiles the next N cycles passed through profile()"""
+
+    def __init__(self, output_dir, mode="sample", interval=0.005, thread_prefixes=("analysis",), log=None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r} (expected {' | '.join(PROFILE_MODES)})")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.interval = interval
+        self.thread_prefixes = thread_prefixes
+        self.log = log or (lambda message, level="INFO": None)
+        self.remaining = 0
+        self._lock = threading.Lock()
+
+    def arm(self, cycles):
+        """Profile the next `cycles` cycles (adds to any still pending); not from a signal handler"""
+        with self._lock:
+            self.remaining += max(0, int(cycles))
+        self.log(f"🔬 Profiling the next {self.remaining} cycles ({self.mode}) into {self.output_dir}")
+
+    def profile(self, name="cycle"):
+        """Context manager around one cycle: profiles it while armed, no-op otherwise"""
+        if not self.remaining:
+            return nullcontext()
+        with self._lock:
+            if not self.remaining:
+                return nullcontext()
+            self.remaining -= 1
+        return self._profiled(name)
+
+    def _path(self, name, suffix):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.output_dir, f"{stamp}_{name}_{os.getpid()}{suffix}")
+
+    @contextmanager
+    def _profiled(self, name):
+        started = time.perf_counter()
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:  # another profiler is active (e.g. a concurrent wallet's cycle)
+                self.log(f"⚠️  Cycle not profiled: {e}", "WARNING")
+                yield
+                return
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = self._path(name, ".prof")
+                profiler.dump_stats(path)
+                self.log(f"🔬 Profile written: {path} ({time.perf_counter() - started:.2f}s cycle)")
+            return
+
+        sampler = StackSampler(self.interval, thread_ids=(threading.get_ident(),),
+                               thread_prefixes=self.thread_prefixes).start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = self._path(name, ".folded")
+            sampler.write_folded(path)
+            self.log(f"🔬 Profile written: {path} ({sampler.samples} samples, "
+                     f"{time.perf_counter() - started:.2f}s cycle)")
@@ -0,0 +1,114 @@
+"""
+Decision Cache for AurumBotX-v4
+Content-addressed cache of AI trading decisions keyed on normalized prompt inputs
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RSI_BAND_WIDTH = 5.0  # RSI points per band
+
+
+def decision_key(pair, trend, rsi_value, trade_history, model=None):
+    """Hash the normalized prompt inputs that drive an AI decision"""
+    recent = [
+        [t.get("timestamp", "")[:10], t.get("pair"), t.get("action"),
+         round(float(t.get("price", 0)), 2), round(float(t.get("confidence", 0)), 1)]
+        for t in trade_history[-5:]
+    ]
+    payload = {
+        "pair": pair,
+        "trend": trend,
+        "rsi_band": int(rsi_value // RSI_BAND_WIDTH) if rsi_value == rsi_value else None,  # NaN -> None
+        "history": recent,
+        "model": model
+    }
+    normalized = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """TTL + LRU cache of decisions with an optional JSON file backing store"""
+
+    def __init__(self, ttl=900, max_entries=1024, path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, decision)
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if path:
+            self.load()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        """Get a cached decision, or None on miss/expiry"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                    self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key, decision):
+        """Store a decision, evicting the least recently used entries"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, dict(decision))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def load(self):
+        """Load unexpired entries from the backing file"""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, expires_at, decision in data.get("entries", []):
+                if expires_at > now:
+                    self._entries[key] = (expires_at, decision)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Write entries to the backing file (atomic rename, only if changed)"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            now = time.time()
+            entries = [[key, expires_at, decision]
+                       for key, (expires_at, decision) in self._entries.items() if expires_at > now]
+            self._dirty = False
+        with self._save_lock:  # one writer at a time on the shared tmp file
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(tmp_path, self.path)
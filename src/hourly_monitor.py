@@ -2,23 +2,44 @@
 """
 AurumBotX Hourly Monitor
 Tracks bot activity and generates hourly reports
+
+Watches the wallet state for changes and reports on a schedule plus right
+away on events: a new trade, a closed position, the daily trade limit being
+hit, and the bot stopping or starting.
+
+Usage: python src/hourly_monitor.py [--once]
 """
 
+import argparse
 import json
 import os
+import signal
+import threading
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from state_store import read_state, state_version, write_json_atomic
+
 STATE_FILE = "hyperliquid_trading/hyperliquid_testnet_10k_state.json"
+CONFIG_FILE = "config/hyperliquid_testnet_10k.json"
 LOG_FILE = "bot_output.log"
 REPORT_DIR = "monitoring_reports"
+SCAN_STATE_FILE = os.path.join(REPORT_DIR, "log_scan.json")  # byte offset + per-day counters
+SCAN_KEEP_DAYS = 31
+TAIL_BLOCK_SIZE = 64 * 1024
+REPORT_INTERVAL = float(os.getenv("MONITOR_REPORT_INTERVAL", "3600"))  # scheduled reports, seconds
+POLL_MIN = float(os.getenv("MONITOR_POLL_MIN", "0.2"))  # state polling backs off from here...
+POLL_MAX = float(os.getenv("MONITOR_POLL_MAX", "0.5"))  # ...up to here while nothing changes
+RETRY_MIN = 5.0
+RETRY_MAX = 300.0
+
+STOP_EVENT = threading.Event()
 
 def load_state():
     """Load current wallet state"""
     try:
-        with open(STATE_FILE, "r") as f:
-            return json.load(f)
+        return read_state(STATE_FILE)
     except Exception as e:
         return None
 
@@ -37,18 +58,108 @@ def get_bot_status():
     except:
         return {"running": False, "pid": None}
 
+class LogScanner:
+    """Incremental log reader: only bytes appended since the last scan are parsed
+
+    The byte offset and the per-day cycle counters are persisted, so a restart
+    resumes where the previous scan stopped. A file that shrank or was replaced
+    (rotation, truncation) is rescanned from the start.
+    """
+    
+    def __init__(self, log_file, state_file):
+        self.log_file = log_file
+        self.state_file = state_file
+        self.offset = 0
+        self.inode = None
+        self.cycles_by_day = {}
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.state_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("log_file") != self.log_file:
+            return
+        self.offset = data.get("offset", 0)
+        self.inode = data.get("inode")
+        self.cycles_by_day = data.get("cycles_by_day", {})
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        write_json_atomic(self.state_file, {
+            "log_file": self.log_file,
+            "offset": self.offset,
+            "inode": self.inode,
+            "cycles_by_day": self.cycles_by_day
+        }, fsync=False)
+    
+    def scan(self):
+        """Parse lines appended since the last scan; returns the number of new lines"""
+        try:
+            st = os.stat(self.log_file)
+        except OSError:
+            return 0
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.inode = st.st_ino
+            self.offset = 0
+            self.cycles_by_day = {}
+        if st.st_size == self.offset:
+            return 0
+        
+        with open(self.log_file, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        end = data.rfind(b"\n") + 1  # leave a partial last line for the next scan
+        lines = data[:end].splitlines()
+        for raw in lines:
+            self._parse(raw.decode("utf-8", errors="replace"))
+        self.offset += end
+        
+        if len(self.cycles_by_day) > SCAN_KEEP_DAYS:
+            for day in sorted(self.cycles_by_day)[:-SCAN_KEEP_DAYS]:
+                del self.cycles_by_day[day]
+        self._save()
+        return len(lines)
+    
+    def _parse(self, line):
+        if "CYCLE START" in line and line.startswith("["):
+            day = line[1:11]
+            self.cycles_by_day[day] = self.cycles_by_day.get(day, 0) + 1
+    
+    def cycles_on(self, day):
+        return self.cycles_by_day.get(day, 0)
+
+_scanner = None
+
+def get_scanner():
+    """Process-wide log scanner (offset survives across reports)"""
+    global _scanner
+    if _scanner is None:
+        _scanner = LogScanner(LOG_FILE, SCAN_STATE_FILE)
+    return _scanner
+
+def tail_lines(path, n, block_size=TAIL_BLOCK_SIZE):
+    """Last n lines of a file, reading fixed-size blocks backwards from the end"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= n:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + data
+    lines = data.splitlines()[-n:]
+    return [line.decode("utf-8", errors="replace") for line in lines]
+
 def count_cycles_today():
     """Count how many cycles executed today"""
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        count = 0
-        
-        with open(LOG_FILE, "r") as f:
-            for line in f:
-                if today in line and "CYCLE START" in line:
-                    count += 1
-        
-        return count
+        scanner = get_scanner()
+        scanner.scan()
+        return scanner.cycles_on(datetime.now().strftime("%Y-%m-%d"))
     except:
         return 0
 
@@ -56,39 +167,34 @@ def get_latest_prices():
     """Extract latest prices from log"""
     prices = {}
     try:
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()
-        
         # Read last 100 lines
-        for line in lines[-100:]:
-            if "💰 Price:" in line:
-                # Extract pair and price
-                parts = line.split("---")
-                if len(parts) > 1:
-                    pair = parts[1].strip().replace("Analyzing", "").strip().replace("---", "")
-                    
-                    # Find price
-                    if "$" in line:
-                        price_str = line.split("$")[1].split("(")[0].strip()
-                        try:
-                            price = float(price_str.replace(",", ""))
-                            prices[pair] = price
-                        except:
-                            pass
+        pair = None
+        for line in tail_lines(LOG_FILE, 100):
+            if "--- Analyzing" in line:
+                # Price lines follow the "--- Analyzing PAIR ---" header
+                pair = line.split("--- Analyzing", 1)[1].replace("---", "").strip()
+            elif "💰 Price:" in line and pair and "$" in line:
+                price_str = line.split("$")[1].split("(")[0].strip()
+                try:
+                    prices[pair] = float(price_str.replace(",", ""))
+                except:
+                    pass
         
         return prices
     except:
         return {}
 
-def generate_report():
-    """Generate hourly monitoring report"""
+def generate_report(state=None, bot_status=None, reason=None):
+    """Generate monitoring report (state/bot status are loaded unless given)"""
     
     # Create report directory
     os.makedirs(REPORT_DIR, exist_ok=True)
     
     # Load data
-    state = load_state()
-    bot_status = get_bot_status()
+    if state is None:
+        state = load_state()
+    if bot_status is None:
+        bot_status = get_bot_status()
     cycles_today = count_cycles_today()
     prices = get_latest_prices()
     
@@ -99,6 +205,8 @@ def generate_report():
     report.append("=" * 80)
     report.append(f"🤖 AurumBotX Hourly Report - {timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
     report.append("=" * 80)
+    if reason:
+        report.append(f"⚡ Trigger: {reason}")
     report.append("")
     
     # Bot Status
@@ -155,7 +263,8 @@ def generate_report():
     
     # Save report
     report_text = "\n".join(report)
-    report_file = os.path.join(REPORT_DIR, f"report_{timestamp.strftime('%Y%m%d_%H%M%S')}.txt")
+    suffix = f"_{reason.split(':')[0].replace(' ', '_')}" if reason else ""
+    report_file = os.path.join(REPORT_DIR, f"report_{timestamp.strftime('%Y%m%d_%H%M%S')}{suffix}.txt")
     
     with open(report_file, "w") as f:
         f.write(report_text)
@@ -169,29 +278,126 @@ def generate_report():
     
     return report_file
 
+_config_cache = (None, 12)  # (config file (mtime_ns, size), max_daily_trades)
+
+def load_max_daily_trades():
+    """Daily trade limit from the bot config (12 if unavailable), re-read when the file changes"""
+    global _config_cache
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return 12
+    signature = (st.st_mtime_ns, st.st_size)
+    if signature == _config_cache[0]:
+        return _config_cache[1]
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            limit = json.load(f).get("max_daily_trades", 12)
+    except Exception:
+        return _config_cache[1]  # caught mid-write: keep the last limit read
+    _config_cache = (signature, limit)
+    return limit
+
+class MonitorView:
+    """In-memory view of the bot, refreshed only when the state changes on disk"""
+    
+    def __init__(self):
+        self.version = None
+        self.state = None
+        self.bot_status = None
+        self.max_daily_trades = load_max_daily_trades()
+    
+    def poll(self):
+        """Refresh the view; returns the list of event descriptions since the last poll"""
+        events = []
+        
+        bot_status = get_bot_status()
+        if self.bot_status is not None and bot_status["running"] != self.bot_status["running"]:
+            events.append("bot started" if bot_status["running"] else "bot stopped")
+        self.bot_status = bot_status
+        
+        version = state_version(STATE_FILE)
+        if version == self.version:
+            return events
+        self.version = version
+        previous, self.state = self.state, load_state()
+        if previous is None or self.state is None:
+            return events
+        
+        new_trades = self.state.get("total_trades", 0) - previous.get("total_trades", 0)
+        if new_trades > 0:
+            last = self.state.get("trade_history", [])[-1:]
+            detail = f" ({last[0].get('action')} {last[0].get('pair')})" if last else ""
+            events.append(f"trade: {new_trades} new{detail}")
+        
+        if previous.get("open_position") and not self.state.get("open_position"):
+            last = self.state.get("trade_history", [])[-1:]
+            detail = f" ({last[0].get('pair')} {last[0].get('exit_reason')})" if last and last[0].get("exit_reason") else ""
+            events.append(f"position closed{detail}")
+        
+        limit = self.max_daily_trades = load_max_daily_trades()
+        if self.state.get("daily_trades", 0) >= limit > previous.get("daily_trades", 0):
+            events.append(f"daily limit: {self.state['daily_trades']}/{limit} trades")
+        return events
+
+def _handle_shutdown(signum, frame):
+    """Signal handler: stop the monitor loop"""
+    STOP_EVENT.set()
+
+def run_monitor():
+    """Watch the state and report on schedule and on events"""
+    view = MonitorView()
+    view.poll()
+    next_report = time.monotonic()
+    poll_interval = POLL_MIN
+    retry_delay = RETRY_MIN
+    
+    while not STOP_EVENT.is_set():
+        try:
+            events = view.poll()
+            now = time.monotonic()
+            if events or now >= next_report:
+                reason = "; ".join(events) if events else None
+                print(f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Generating report..."
+                      + (f" ({reason})" if reason else ""))
+                report_file = generate_report(view.state, view.bot_status, reason=reason)
+                print(f"✅ Report saved: {report_file}")
+                if now >= next_report:
+                    next_report = now + REPORT_INTERVAL
+                    print(f"⏳ Next scheduled report in {REPORT_INTERVAL / 60:.0f} min")
+            
+            # Poll fast right after activity, back off while the bot is idle
+            poll_interval = POLL_MIN if events else min(poll_interval * 2, POLL_MAX)
+            retry_delay = RETRY_MIN
+            STOP_EVENT.wait(poll_interval)
+        
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            print(f"⏳ Retrying in {retry_delay:.0f}s...")
+            STOP_EVENT.wait(retry_delay)
+            retry_delay = min(retry_delay * 2, RETRY_MAX)
+
 def main():
     """Main monitoring loop"""
+    parser = argparse.ArgumentParser(description="AurumBotX Hourly Monitor")
+    parser.add_argument("--once", action="store_true", help="Generate one report and exit (cron)")
+    args = parser.parse_args()
+    
+    if args.once:
+        report_file = generate_report()
+        print(f"✅ Report saved: {report_file}")
+        return
+    
     print("🚀 AurumBotX Hourly Monitor Started")
     print(f"📁 Reports will be saved to: {REPORT_DIR}/")
     print("")
     
-    while True:
-        try:
-            print(f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Generating report...")
-            report_file = generate_report()
-            print(f"✅ Report saved: {report_file}")
-            print(f"⏳ Next report in 1 hour...")
-            
-            # Sleep for 1 hour
-            time.sleep(3600)
-            
-        except KeyboardInterrupt:
-            print("\n\n🛑 Monitor stopped by user")
-            break
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            print("⏳ Retrying in 1 hour...")
-            time.sleep(3600)
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    try:
+        run_monitor()
+    except KeyboardInterrupt:
+        pass
+    print("\n\n🛑 Monitor stopped")
 
 if __name__ == "__main__":
     main()
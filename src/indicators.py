@@ -0,0 +1,155 @@
+"""
+Indicators for AurumBotX-v4
+Incremental (O(1) per tick) technical indicators with persistable state
+"""
+
+import json
+import os
+import threading
+
+
+class IncrementalRSI:
+    """Streaming RSI, numerically equivalent to ta.momentum.RSIIndicator
+
+    Uses the same smoothing as ta: an EMA with alpha = 1/window over gains
+    and losses, seeded with a zero first observation.
+    """
+
+    __slots__ = ("window", "alpha", "count", "last_close", "last_ts", "avg_up", "avg_down")
+
+    def __init__(self, window=14):
+        self.window = window
+        self.alpha = 1.0 / window
+        self.count = 0
+        self.last_close = None
+        self.last_ts = None
+        self.avg_up = 0.0
+        self.avg_down = 0.0
+
+    def _smoothed(self, close):
+        """Averages after applying close (without committing them)"""
+        if self.last_close is None:
+            return 0.0, 0.0
+        diff = close - self.last_close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        return (self.avg_up + self.alpha * (up - self.avg_up),
+                self.avg_down + self.alpha * (down - self.avg_down))
+
+    def _rsi(self, avg_up, avg_down, count):
+        if count < self.window:
+            return None
+        if avg_down == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+
+    def update(self, close, ts=None):
+        """Add a closed bar and return the new RSI (None until warmed up)"""
+        close = float(close)
+        self.avg_up, self.avg_down = self._smoothed(close)
+        self.last_close = close
+        self.count += 1
+        if ts is not None:
+            self.last_ts = ts
+        return self.value
+
+    def peek(self, close):
+        """RSI as if close were the next bar, without changing state"""
+        avg_up, avg_down = self._smoothed(float(close))
+        return self._rsi(avg_up, avg_down, self.count + 1)
+
+    @property
+    def value(self):
+        """Current RSI (None until window bars have been seen)"""
+        return self._rsi(self.avg_up, self.avg_down, self.count)
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        rsi = cls(data.get("window", 14))
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(rsi, slot, data[slot])
+        return rsi
+
+
+class RSIEngine:
+    """Per-symbol IncrementalRSI states that can be saved and restored"""
+
+    def __init__(self, window=14, path=None):
+        self.window = window
+        self.path = path
+        self._states = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, symbol):
+        """Get (or create) the RSI state for symbol"""
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is None:
+                state = self._states[symbol] = IncrementalRSI(self.window)
+            return state
+
+    def last_ts(self, symbol):
+        """Timestamp of the last bar fed for symbol (None if none)"""
+        with self._lock:
+            state = self._states.get(symbol)
+            return state.last_ts if state is not None else None
+
+    def update_series(self, symbol, timestamps, closes):
+        """Feed only the bars newer than the last one seen and return the RSI"""
+        state = self.get(symbol)
+        with self._lock:
+            last_ts = state.last_ts
+            # Walk back from the end: usually only the newest bar is new
+            start = len(closes)
+            while start > 0 and (last_ts is None or timestamps[start - 1] > last_ts):
+                start -= 1
+            for i in range(start, len(closes)):
+                state.update(closes[i], int(timestamps[i]))
+            return state.value
+
+    def reset(self, symbol=None):
+        """Drop the state of one symbol (or all)"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop(symbol, None)
+
+    def load(self):
+        """Restore states from the backing file"""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for symbol, state in data.items():
+                if state.get("window") == self.window:
+                    self._states[symbol] = IncrementalRSI.from_dict(state)
+
+    def save(self):
+        """Persist states to the backing file (atomic rename)"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {symbol: state.to_dict() for symbol, state in self._states.items()}
+        with self._save_lock:  # one writer at a time on the shared tmp file
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+
+def compute_rsi(closes, window=14):
+    """One-shot RSI over a list of closes (None if fewer than window bars)"""
+    rsi = IncrementalRSI(window)
+    for close in closes:
+        rsi.update(close)
+    return rsi.value
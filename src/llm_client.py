@@ -0,0 +1,148 @@
+"""
+LLM Client for AurumBotX-v4
+Shared OpenAI client with pooled connections, timeouts, bounded retries
+and a limit on in-flight requests
+"""
+
+import os
+import random
+import threading
+import time
+
+from metrics import REGISTRY
+
+# Configuration
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per request
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# One in-flight request per analysis worker by default: a lower limit queues the extra pairs of a cycle
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", os.getenv("ANALYSIS_WORKERS", "6")))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+_client = None
+_client_lock = threading.Lock()
+_transport = None  # replaces client.chat.completions.create when set (record/replay harness)
+_semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "successes": 0,
+    "errors": 0,
+    "timeouts": 0,
+    "retries": 0,
+    "in_flight": 0,
+    "latency_total": 0.0,
+    "latency_max": 0.0,
+    "latency_last": None
+}
+LLM_SECONDS = REGISTRY.histogram("aurum_llm_request_seconds", "LLM request latency per attempt", ("outcome",))
+LLM_RETRIES = REGISTRY.counter("aurum_llm_retries_total", "LLM requests retried after a retryable error")
+
+
+def get_client():
+    """Get the shared OpenAI client (created once, HTTP connections pooled)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported on first use: openai/httpx take longer to load than a no-op cycle runs
+                import httpx
+                from openai import OpenAI, DefaultHttpxClient
+                _client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    timeout=LLM_TIMEOUT,
+                    max_retries=0,  # retries are handled here, with jitter
+                    http_client=DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=LLM_MAX_CONCURRENCY,
+                            max_keepalive_connections=LLM_MAX_CONCURRENCY
+                        )
+                    )
+                )
+    return _client
+
+
+def set_transport(transport):
+    """Send completions through transport(**kwargs) instead of the OpenAI client (None restores it)"""
+    global _transport
+    _transport = transport
+
+
+def create_completion(**kwargs):
+    """One completion request through the configured transport (no retries)"""
+    if _transport is not None:
+        return _transport(**kwargs)
+    return get_client().chat.completions.create(**kwargs)
+
+
+def is_retryable(error):
+    """True for timeouts, connection errors, rate limits and 5xx responses"""
+    from openai import APIConnectionError, APIStatusError
+    if isinstance(error, APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given retry attempt"""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _record(latency, error=None):
+    """Update latency and error counters for one request"""
+    timed_out = False
+    if error is not None:
+        from openai import APITimeoutError
+        timed_out = isinstance(error, APITimeoutError)
+    outcome = "success" if error is None else ("timeout" if timed_out else "error")
+    LLM_SECONDS.observe(latency, outcome=outcome)
+    with _stats_lock:
+        _stats["in_flight"] -= 1
+        _stats["latency_total"] += latency
+        _stats["latency_max"] = max(_stats["latency_max"], latency)
+        _stats["latency_last"] = latency
+        if error is None:
+            _stats["successes"] += 1
+        else:
+            _stats["errors"] += 1
+            if timed_out:
+                _stats["timeouts"] += 1
+
+
+def chat_completion(**kwargs):
+    """Create a chat completion with timeout, bounded retries and concurrency limit"""
+    attempt = 0
+    while True:
+        with _semaphore:
+            with _stats_lock:
+                _stats["requests"] += 1
+                _stats["in_flight"] += 1
+            started = time.monotonic()
+            try:
+                response = create_completion(**kwargs)
+            except Exception as e:
+                _record(time.monotonic() - started, e)
+                if attempt >= LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+            else:
+                _record(time.monotonic() - started)
+                return response
+
+        # Back off outside the semaphore so other callers are not blocked
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+        LLM_RETRIES.inc()
+        with _stats_lock:
+            _stats["retries"] += 1
+
+
+def get_llm_stats():
+    """Get a copy of the LLM latency and error counters"""
+    with _stats_lock:
+        stats = dict(_stats)
+    completed = stats["successes"] + stats["errors"]
+    stats["latency_avg"] = stats["latency_total"] / completed if completed else None
+    return stats
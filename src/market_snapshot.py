@@ -0,0 +1,113 @@
+"""
+Market Snapshot for AurumBotX-v4
+Fetches all_mids/meta once and serves every trading pair from the cached copy
+
+With a price bus (websocket feed) attached, mids come from the bus while it
+is fresh and REST is only used for meta and as a fallback.
+"""
+
+import threading
+import time
+
+DEFAULT_TTL = 5.0  # seconds
+STREAMED_META_TTL = 60.0  # meta refresh period while mids are streamed
+
+
+class MarketSnapshot:
+    """Cached all_mids + meta view shared by every pair of a cycle"""
+
+    def __init__(self, info, ttl=DEFAULT_TTL, bus=None):
+        self.info = info
+        self.ttl = ttl
+        self.bus = bus
+        self.mids = {}
+        self.assets = {}
+        self.fetched_at = None  # time.monotonic() of last refresh
+        self.mids_at = None     # time.monotonic() of last all_mids fetch
+        self.meta_at = None     # time.monotonic() of last meta fetch
+        self.refreshes = 0
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        """True if the cached data is younger than the TTL"""
+        return self.fetched_at is not None and time.monotonic() - self.fetched_at < self.ttl
+
+    def age(self):
+        """Seconds since the last refresh (None if never fetched)"""
+        if self.fetched_at is None:
+            return None
+        return time.monotonic() - self.fetched_at
+
+    def refresh(self, force=False):
+        """Fetch mids and meta unless the cached copy is still within TTL"""
+        with self._lock:
+            if force or not self.is_fresh():
+                streamed = self._streamed_mids()
+                mids = streamed if streamed is not None else self.info.all_mids()
+                # Funding in meta moves slowly: with a live stream it is refreshed less often
+                meta_ttl = STREAMED_META_TTL if streamed is not None else 0
+                if force or self.meta_at is None or time.monotonic() - self.meta_at >= meta_ttl:
+                    meta = self.info.meta()
+                    # name -> asset index replaces the per-symbol linear scan of universe
+                    self.assets = {asset.get("name"): asset for asset in meta.get("universe", [])}
+                    self.meta_at = time.monotonic()
+                self.mids = mids
+                self.fetched_at = self.mids_at = time.monotonic()
+                self.refreshes += 1
+        return self
+
+    def refresh_mids(self, max_age):
+        """Re-fetch only all_mids when older than max_age (fast path for price watchers)"""
+        with self._lock:
+            streamed = self._streamed_mids()
+            if streamed is not None:
+                self.mids = streamed
+            elif self.mids_at is None or time.monotonic() - self.mids_at >= max_age:
+                self.mids = self.info.all_mids()
+                self.mids_at = time.monotonic()
+        return self
+
+    def _streamed_mids(self):
+        """Mids from the attached bus if it is fresh, else None"""
+        if self.bus is not None and self.bus.is_fresh():
+            return self.bus.mids
+        return None
+
+    def get_price(self, symbol):
+        """Get price data for symbol, or None if the symbol is not listed"""
+        return _price_data(symbol, self.mids, self.assets)
+
+    def get_prices(self, symbols):
+        """Get price data for several symbols from the same mids and meta, even across a refresh"""
+        with self._lock:
+            mids, assets = self.mids, self.assets
+        return {symbol: _price_data(symbol, mids, assets) for symbol in symbols}
+
+
+def _price_data(symbol, mids, assets):
+    if symbol not in mids:
+        return None
+
+    price = float(mids[symbol])
+    symbol_data = assets.get(symbol)
+
+    if symbol_data:
+        # Funding rate as proxy for 24h change (Hyperliquid doesn't provide 24h change directly)
+        funding = symbol_data.get("funding", "0")
+        return {
+            "symbol": symbol,
+            "price": price,
+            "change_24h": float(funding) * 100,  # Approximate
+            "volume": 0,  # Not easily available
+            "high_24h": price * 1.02,  # Estimate
+            "low_24h": price * 0.98   # Estimate
+        }
+
+    return {
+        "symbol": symbol,
+        "price": price,
+        "change_24h": 0,
+        "volume": 0,
+        "high_24h": price,
+        "low_24h": price
+    }
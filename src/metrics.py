@@ -0,0 +1,187 @@
+"""
+Metrics for AurumBotX-v4
+Minimal Prometheus-style counters, gauges and histograms with labels, and
+timing spans for the stages of a trading cycle
+
+The runner dumps its registry as JSON (METRICS_DIR/<process>.json) after
+every cycle; api_server merges those dumps with its own registry and serves
+them in the Prometheus text format on /metrics, with a `process` label.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Metric:
+    """One metric family; samples are keyed by label values"""
+
+    def __init__(self, name, help, kind, labels=(), buckets=None):
+        self.name = name
+        self.help = help
+        self.kind = kind  # counter | gauge | histogram
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets or LATENCY_BUCKETS) if kind == "histogram" else None
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def observe(self, value, **labels):
+        """Add one histogram observation (per-bucket counts, the last bucket is +Inf)"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            sample["counts"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def dump(self):
+        with self._lock:
+            samples = [[list(key), dict(value, counts=list(value["counts"])) if isinstance(value, dict) else value]
+                       for key, value in self._values.items()]
+        return {"name": self.name, "help": self.help, "type": self.kind, "labels": list(self.labels),
+                "buckets": list(self.buckets) if self.buckets else None, "samples": samples}
+
+
+class Registry:
+    """Metric families of one process"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, help, kind, labels, buckets=None):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(name, help, kind, labels, buckets)
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._get(name, help, "counter", labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._get(name, help, "gauge", labels)
+
+    def histogram(self, name, help, labels=(), buckets=None):
+        return self._get(name, help, "histogram", labels, buckets)
+
+    def dump(self):
+        """JSON-serializable copy of every family"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {"updated": time.time(), "metrics": [metric.dump() for metric in metrics]}
+
+    def write(self, path):
+        """Dump to path (atomic rename; concurrent writers in one process are serialized)"""
+        data = json.dumps(self.dump(), separators=(",", ":"))
+        with self._lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(f"{path}.tmp", "w") as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("aurum_cycle_stage_seconds", "Duration of execute_cycle stages",
+                                   ("stage", "pair"))
+
+
+def span(stage, pair=""):
+    """Time one cycle stage (per pair when given) into aurum_cycle_stage_seconds"""
+    return STAGE_SECONDS.time(stage=stage, pair=pair or "")
+
+
+def read_dumps(directory):
+    """(dump, {"process": name}) for every METRICS_DIR/<name>.json (unreadable files are skipped)"""
+    dumps = []
+    for path in sorted(glob.glob(os.path.join(str(directory), "*.json"))):
+        try:
+            with open(path, "r") as f:
+                dumps.append((json.load(f), {"process": os.path.splitext(os.path.basename(path))[0]}))
+        except (OSError, ValueError):
+            continue
+    return dumps
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [(name, value) for name, value in zip(names, values) if value != ""]
+    pairs += list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(dumps):
+    """Prometheus text exposition of [(dump, const_labels), ...]; families merged by name"""
+    families = {}
+    updated = []
+    for dump, const_labels in dumps:
+        if "updated" in dump:
+            updated.append((const_labels, dump["updated"]))
+        for metric in dump["metrics"]:
+            family = families.setdefault(metric["name"], {"metric": metric, "samples": []})
+            family["samples"].extend((const_labels, metric, sample) for sample in metric["samples"])
+
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['metric']['help']}")
+        lines.append(f"# TYPE {name} {family['metric']['type']}")
+        for const_labels, metric, (values, value) in family["samples"]:
+            names = metric["labels"]
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, values, const_labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + [float("inf")], value["counts"]):
+                cumulative += count
+                labels = _labels(names, values, {**const_labels, "le": _number(float(bound))})
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, values, const_labels)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(names, values, const_labels)} {value['count']}")
+    if updated:
+        lines.append("# HELP aurum_metrics_updated_timestamp_seconds When the process last dumped its metrics")
+        lines.append("# TYPE aurum_metrics_updated_timestamp_seconds gauge")
+        for const_labels, timestamp in updated:
+            lines.append(f"aurum_metrics_updated_timestamp_seconds{_labels((), (), const_labels)} {timestamp!r}")
+    return "\n".join(lines) + "\n"
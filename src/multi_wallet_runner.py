@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+AurumBotX Multi-Wallet Runner
+Runs every wallet config found in a directory inside one process
+
+All wallets share one market snapshot (and websocket feed), the LLM client
+pool, the decision cache, the candle store / RSI state and the analysis
+thread pool; each wallet keeps its own state file, limits and schedule.
+Cycles are scheduled on one asyncio event loop and executed on a bounded
+thread pool (MULTI_WALLET_CONCURRENCY cycles at a time).
+
+With --workers N the wallets are sharded (by wallet name hash) across N
+worker processes. The coordinator process owns the market connection: it
+publishes all_mids/meta into shared memory, samples and backfills the
+candle store, and collects the workers' cycle and trade events. Each worker
+runs the single-process scheduler above over its shard and keeps its own
+log file, decision cache and RSI state.
+
+Usage: python src/multi_wallet_runner.py [CONFIG_DIR] [--interval SECONDS] [--max-cycles N] [--workers N]
+SIGTERM/SIGINT stop after the running cycles, SIGHUP re-reads CONFIG_DIR
+(new wallets start, removed ones stop, changed configs apply next cycle),
+SIGUSR1 profiles the next cycles (see src/cycle_profiler.py).
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import wallet_runner_hyperliquid as runner
+from candle_store import CandleStore
+from market_snapshot import MarketSnapshot
+from position_watcher import PositionWatcher
+from shared_snapshot import SharedSnapshotInfo, SharedSnapshotWriter
+from state_store import checkpoint_all
+
+WALLET_CONFIG_DIR = os.getenv("WALLET_CONFIG_DIR", "config")
+MULTI_WALLET_CONCURRENCY = int(os.getenv("MULTI_WALLET_CONCURRENCY", "8"))  # cycles running at once
+MULTI_WALLET_WORKERS = int(os.getenv("MULTI_WALLET_WORKERS", "1"))  # worker processes, 1 = single process
+PUBLISH_INTERVAL = float(os.getenv("SHARED_SNAPSHOT_INTERVAL", "0.5"))  # seconds between shared snapshots
+WORKER_STOP_TIMEOUT = 120.0  # seconds a worker gets to finish its running cycles
+
+log = runner.log
+
+
+def load_wallet_configs(config_dir):
+    """Load every *.json wallet config in config_dir: {wallet_name: config}"""
+    configs = {}
+    for path in sorted(glob.glob(os.path.join(config_dir, "*.json"))):
+        try:
+            with open(path, "r") as f:
+                config = json.load(f)
+        except Exception as e:
+            log(f"⚠️  Skipping {path}: {e}", "WARNING")
+            continue
+        wallet = config.get("wallet_name") if isinstance(config, dict) else None
+        if not wallet:
+            continue  # not a wallet config
+        if wallet in configs:
+            log(f"⚠️  Skipping {path}: wallet {wallet} already defined", "WARNING")
+            continue
+        config["config_file"] = path
+        configs[wallet] = config
+    return configs
+
+
+def shard_of(wallet_name, shards):
+    """Worker index of a wallet (stable across restarts and config reloads)"""
+    return zlib.crc32(wallet_name.encode("utf-8")) % shards
+
+
+class WalletSlot:
+    """Schedule of one wallet"""
+
+    def __init__(self, config):
+        self.config = config
+        self.cycles = 0
+        self.stop = asyncio.Event()
+        self.task = None
+
+    @property
+    def name(self):
+        return self.config["wallet_name"]
+
+
+class MultiWalletRunner:
+    """Schedules the cycles of many wallets on one event loop"""
+
+    def __init__(self, config_dir, interval=None, max_cycles=None, shard=None, snapshot_factory=None,
+                 on_event=None):
+        self.config_dir = config_dir
+        self.interval = interval
+        self.max_cycles = max_cycles
+        self.shard = shard  # (index, count): only run the wallets of this shard
+        self.snapshot_factory = snapshot_factory
+        self.on_event = on_event  # called with cycle/trade event dicts (from executor threads)
+        self.slots = {}
+        self.retired = []  # removed on reload, finishing their current cycle
+        self.snapshot = None
+        self.bus = None
+        self.feed = None
+        self.watcher = None
+        self._snapshot_lock = threading.Lock()
+        self._shutdown = asyncio.Event()
+        self._reload = False
+        self._wakeup = asyncio.Event()
+
+    def load_configs(self):
+        """Wallet configs of this runner's shard"""
+        configs = load_wallet_configs(self.config_dir)
+        if self.shard is None:
+            return configs
+        index, count = self.shard
+        return {name: config for name, config in configs.items() if shard_of(name, count) == index}
+
+    # -- shared resources -----------------------------------------------------
+
+    def get_snapshot(self):
+        """Shared market snapshot, (re)connected on demand"""
+        with self._snapshot_lock:
+            if self.snapshot is None:
+                if self.snapshot_factory is not None:
+                    self.snapshot = self.snapshot_factory()
+                else:
+                    self.snapshot = MarketSnapshot(runner.get_hyperliquid_info(testnet=True),
+                                                   ttl=runner.MARKET_SNAPSHOT_TTL, bus=self.bus)
+                    log("✅ Connected to Hyperliquid Testnet (shared by all wallets)")
+            return self.snapshot
+
+    def _emit(self, event, wallet, **fields):
+        if self.on_event is not None:
+            self.on_event({"event": event, "wallet": wallet, **fields})
+
+    def _emit_trade(self, wallet, trade):
+        self._emit("trade", wallet, pair=trade.get("pair"), action=trade.get("action"),
+                   price=trade.get("price"), pnl=trade.get("pnl"), exit_reason=trade.get("exit_reason"))
+
+    def _run_cycle(self, config, snapshot):
+        """Run one cycle, reporting the trades it recorded"""
+        if self.on_event is None:
+            runner.execute_cycle(config, snapshot)
+            return
+        # Held across the count so watcher exits are not attributed to the cycle
+        with runner.state_lock(config["wallet_name"]):
+            before = len(runner.load_state(config)["trade_history"])
+            runner.execute_cycle(config, snapshot)
+            trades = runner.load_state(config)["trade_history"][before:]
+        for trade in trades:
+            self._emit_trade(config["wallet_name"], trade)
+
+    def _watch_tick(self):
+        """One watcher thread for all wallets; mids are fetched at most once per tick"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+        for slot in list(self.slots.values()):
+            trade = runner.watch_open_position(slot.config, snapshot)
+            if trade is not None:
+                self._emit_trade(slot.name, trade)
+
+    # -- scheduling ---------------------------------------------------------
+
+    async def _sleep(self, slot, seconds):
+        """Sleep unless the wallet (or the runner) is stopped first"""
+        try:
+            await asyncio.wait_for(slot.stop.wait(), timeout=max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _wallet_loop(self, slot, delay):
+        loop = asyncio.get_running_loop()
+        await self._sleep(slot, delay)  # stagger wallets across the interval
+        next_run = loop.time()
+        while not slot.stop.is_set():
+            started = loop.time()
+            try:
+                snapshot = await loop.run_in_executor(None, self.get_snapshot)
+                await loop.run_in_executor(None, self._run_cycle, slot.config, snapshot)
+                ok = True
+            except Exception as e:
+                log(f"❌ [{slot.name}] Cycle error: {e}", "ERROR", wallet=slot.name)
+                self.snapshot = None  # reconnect on the next cycle
+                ok = False
+            slot.cycles += 1
+            now = loop.time()
+            log(f"⏱️  [{slot.name}] Cycle {slot.cycles} took {now - started:.2f}s",
+                wallet=slot.name, latency_ms=round((now - started) * 1000, 1))
+            self._emit("cycle", slot.name, cycle=slot.cycles, ok=ok, latency_ms=round((now - started) * 1000, 1))
+
+            if self.max_cycles and slot.cycles >= self.max_cycles:
+                break
+            interval = runner.get_cycle_interval(slot.config, self.interval)
+            next_run += interval
+            if next_run < now:
+                next_run = now + interval
+            await self._sleep(slot, next_run - now)
+        self._wakeup.set()
+
+    def _start(self, config, delay=0.0):
+        slot = WalletSlot(config)
+        slot.task = asyncio.get_running_loop().create_task(self._wallet_loop(slot, delay))
+        self.slots[slot.name] = slot
+        log(f"👛 Wallet {slot.name} scheduled ({config['config_file']})", wallet=slot.name)
+
+    def _apply_configs(self):
+        """Start new wallets, stop removed ones, swap changed configs"""
+        configs = self.load_configs()
+        for name in list(self.slots):
+            if name not in configs:
+                log(f"👋 Wallet {name} removed - stopping after its current cycle", wallet=name)
+                slot = self.slots.pop(name)
+                slot.stop.set()
+                self.retired.append(slot)
+        for name, config in configs.items():
+            if name in self.slots:
+                self.slots[name].config = config  # used from the next cycle
+            else:
+                self._start(config)
+        log(f"🔁 Configs reloaded - {len(self.slots)} wallets")
+
+    def _signal_shutdown(self):
+        log("🛑 Shutdown requested - stopping after the running cycles")
+        self._shutdown.set()
+        self._wakeup.set()
+
+    def _signal_reload(self):
+        self._reload = True
+        self._wakeup.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=MULTI_WALLET_CONCURRENCY,
+                                                     thread_name_prefix="wallet"))
+        for signum, handler in ((signal.SIGTERM, self._signal_shutdown), (signal.SIGINT, self._signal_shutdown),
+                                (getattr(signal, "SIGHUP", None), self._signal_reload),
+                                (getattr(signal, "SIGUSR1", None), runner.request_profile)):
+            if signum is not None:
+                try:
+                    loop.add_signal_handler(signum, handler)
+                except (NotImplementedError, RuntimeError):
+                    pass  # not the main thread / unsupported platform
+
+        configs = self.load_configs()
+        if not configs and self.shard is not None:
+            log(f"💤 No wallets in shard {self.shard[0]}/{self.shard[1]} yet")
+        elif not configs:
+            log(f"❌ No wallet configs found in {self.config_dir}", "ERROR")
+            return 0
+
+        if runner.MARKET_FEED == "ws" and self.snapshot_factory is None:
+            pairs = sorted({pair for config in configs.values() for pair in config.get("trading_pairs", [])})
+            self.feed, self.bus = runner.start_market_feed(pairs)
+        if runner.POSITION_CHECK_INTERVAL > 0:
+            self.watcher = PositionWatcher(self._watch_tick, interval=runner.POSITION_CHECK_INTERVAL,
+                                           on_error=lambda e: log(f"Position watcher error: {e}", "WARNING")).start()
+
+        shard = f" (shard {self.shard[0]}/{self.shard[1]})" if self.shard is not None else ""
+        log(f"🕒 Multi-wallet mode: {len(configs)} wallets from {self.config_dir}{shard}")
+        for i, config in enumerate(configs.values()):
+            # Spread first cycles over the interval so wallets don't all hit the LLM at once
+            spread = runner.get_cycle_interval(config, self.interval) / len(configs)
+            self._start(config, delay=i * min(spread, 60.0))
+
+        while not self._shutdown.is_set():
+            if self._reload:
+                self._reload = False
+                self._apply_configs()
+            if (self.slots or self.max_cycles) and all(slot.task.done() for slot in self.slots.values()):
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+
+        slots = list(self.slots.values()) + self.retired
+        for slot in slots:
+            slot.stop.set()
+        await asyncio.gather(*(slot.task for slot in slots), return_exceptions=True)
+
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.feed is not None:
+            self.feed.stop()
+        checkpoint_all()
+        total = sum(slot.cycles for slot in slots)
+        log(f"👋 Multi-wallet runner stopped after {total} cycles")
+        return total
+
+
+def _worker_path(path, index):
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker{index}{ext}"
+
+
+def _worker_main(index, count, config_dir, shm_name, events, interval=None, max_cycles=None):
+    """Worker process: run the wallets of one shard against the coordinator's shared snapshot"""
+    # The coordinator samples/backfills candles; workers only read the columns
+    runner.CANDLE_WRITER = False
+    runner.CANDLE_STORE = CandleStore(runner.CANDLE_DIR, read_only=True)
+    # Files written by one process only: own log, metrics dump, decision cache and RSI state
+    runner.METRICS_FILE = _worker_path(runner.METRICS_FILE, index)
+    runner.LOGGER = runner.create_logger(f"hyperliquid_trading_worker{index}")
+    for cache in (runner.DECISION_CACHE, runner.RSI_ENGINE):
+        if cache.path:
+            cache.path = _worker_path(cache.path, index)
+            cache.load()
+    runner.LOGGER.start_writer()
+    runner.LOGGER.bind(worker=index)
+
+    shared = SharedSnapshotInfo(shm_name)
+    factory = lambda: MarketSnapshot(shared, ttl=min(runner.MARKET_SNAPSHOT_TTL, PUBLISH_INTERVAL))
+    on_event = lambda event: events.put({**event, "worker": index})
+    try:
+        asyncio.run(MultiWalletRunner(config_dir, interval=interval, max_cycles=max_cycles, shard=(index, count),
+                                      snapshot_factory=factory, on_event=on_event).run())
+    finally:
+        shared.close()
+        runner.LOGGER.close()
+
+
+class ShardedRunner:
+    """Coordinator: one market connection, wallets sharded across worker processes"""
+
+    def __init__(self, config_dir, workers, interval=None, max_cycles=None):
+        self.config_dir = config_dir
+        self.workers = workers
+        self.interval = interval
+        self.max_cycles = max_cycles
+        self.pairs = []
+        self.snapshot = None
+        self.shared = None
+        self.processes = []
+        self.totals = {"cycles": 0, "errors": 0, "trades": 0, "exits": 0, "pnl": 0.0}
+        self._events = None
+        self._recorded = -1  # snapshot.refreshes last sampled into the candle store
+
+    def _load_pairs(self):
+        configs = load_wallet_configs(self.config_dir)
+        self.pairs = sorted({pair for config in configs.values() for pair in config.get("trading_pairs", [])})
+        return configs
+
+    def _publish(self):
+        """Refresh the market snapshot, share it and keep the candle store current"""
+        self.snapshot.refresh()
+        self.snapshot.refresh_mids(PUBLISH_INTERVAL)
+        self.shared.publish_snapshot(self.snapshot)
+        if self.snapshot.refreshes != self._recorded:
+            self._recorded = self.snapshot.refreshes
+            for pair in self.pairs:
+                # Backfills missing closed bars, then samples the mid into the open bar
+                runner.get_historical_data(self.snapshot.info, pair, mid=self.snapshot.mids.get(pair))
+
+    def _handle_event(self, event):
+        totals = self.totals
+        wallet = event["wallet"]
+        if event["event"] == "cycle":
+            totals["cycles"] += 1
+            totals["errors"] += not event.get("ok", True)
+        elif event["event"] == "trade":
+            if event.get("pnl") is None:
+                totals["trades"] += 1
+                log(f"📬 [{wallet}] {event['action']} {event['pair']} @ ${event['price']:,.2f} "
+                    f"(worker {event['worker']})", wallet=wallet, pair=event["pair"])
+            else:
+                totals["exits"] += 1
+                totals["pnl"] += event["pnl"]
+                log(f"📬 [{wallet}] Closed {event['pair']} ({event.get('exit_reason')}) PnL ${event['pnl']:+,.2f} "
+                    f"(worker {event['worker']})", wallet=wallet, pair=event["pair"])
+
+    def _drain_events(self, timeout=0.0):
+        """Handle queued worker events, waiting up to timeout for the first one"""
+        try:
+            event = self._events.get(timeout=timeout) if timeout else self._events.get_nowait()
+            while True:
+                self._handle_event(event)
+                event = self._events.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _signal_workers(self, signum):
+        for process in self.processes:
+            if process.is_alive():
+                try:
+                    os.kill(process.pid, signum)
+                except OSError:
+                    pass
+
+    def run(self):
+        runner.install_signal_handlers()
+        configs = self._load_pairs()
+        if not configs:
+            log(f"❌ No wallet configs found in {self.config_dir}", "ERROR")
+            return 0
+
+        bus = feed = None
+        if runner.MARKET_FEED == "ws":
+            feed, bus = runner.start_market_feed(self.pairs)
+        self.snapshot = MarketSnapshot(runner.get_hyperliquid_info(testnet=True),
+                                       ttl=runner.MARKET_SNAPSHOT_TTL, bus=bus)
+        log("✅ Connected to Hyperliquid Testnet (shared by all worker processes)")
+        self.shared = SharedSnapshotWriter()
+        self._publish()  # workers start with data in place
+
+        # spawn: workers must not inherit the coordinator's threads, locks and open log files
+        context = multiprocessing.get_context("spawn")
+        self._events = context.Queue()
+        runner.LOGGER.flush()
+        for index in range(self.workers):
+            process = context.Process(target=_worker_main, name=f"wallet-worker-{index}",
+                                      args=(index, self.workers, self.config_dir, self.shared.name, self._events,
+                                            self.interval, self.max_cycles))
+            process.start()
+            self.processes.append(process)
+        shards = [sum(shard_of(name, self.workers) == i for name in configs) for i in range(self.workers)]
+        log(f"🧩 Sharded mode: {len(configs)} wallets across {self.workers} workers {shards}")
+
+        try:
+            while not runner.SHUTDOWN_EVENT.is_set() and any(p.is_alive() for p in self.processes):
+                if runner.RELOAD_EVENT.is_set():
+                    runner.RELOAD_EVENT.clear()
+                    self._load_pairs()
+                    self._signal_workers(signal.SIGHUP)
+                if runner.PROFILE_EVENT.is_set():
+                    runner.PROFILE_EVENT.clear()
+                    self._signal_workers(signal.SIGUSR1)  # the coordinator runs no cycles itself
+                started = time.monotonic()
+                try:
+                    self._publish()
+                except Exception as e:
+                    log(f"⚠️  Market snapshot refresh failed: {e}", "WARNING")
+                self._drain_events(timeout=max(0.01, PUBLISH_INTERVAL - (time.monotonic() - started)))
+        finally:
+            runner.log_shutdown_signal()
+            self._signal_workers(signal.SIGTERM)
+            deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+            for process in self.processes:
+                while process.is_alive() and time.monotonic() < deadline:
+                    self._drain_events(timeout=0.2)
+                    process.join(timeout=0.1)
+                if process.is_alive():
+                    log(f"⚠️  {process.name} did not stop in time - killing it", "WARNING")
+                    process.kill()
+                    process.join()
+            self._drain_events()
+            if feed is not None:
+                feed.stop()
+            self.shared.close()
+
+        totals = self.totals
+        log(f"👋 Sharded runner stopped: {totals['cycles']} cycles ({totals['errors']} errors), "
+            f"{totals['trades']} trades, {totals['exits']} exits (PnL ${totals['pnl']:+,.2f})")
+        return totals["cycles"]
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AurumBotX Multi-Wallet Runner")
+    parser.add_argument("config_dir", nargs="?", default=WALLET_CONFIG_DIR, help="Directory of wallet configs")
+    parser.add_argument("--interval", type=float, default=None, help="Cycle interval in seconds for every wallet")
+    parser.add_argument("--max-cycles", type=int, default=None, help="Stop each wallet after N cycles")
+    parser.add_argument("--workers", type=int, default=MULTI_WALLET_WORKERS,
+                        help="Shard wallets across N worker processes (1 = single process)")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    runner.LOGGER.start_writer()
+    log("🚀 AurumBotX Multi-Wallet Runner")
+    log(f"📁 Config Dir: {args.config_dir}")
+    log(f"📂 State Dir: {runner.STATE_DIR}")
+    try:
+        if args.workers > 1:
+            ShardedRunner(args.config_dir, args.workers, interval=args.interval, max_cycles=args.max_cycles).run()
+        else:
+            asyncio.run(MultiWalletRunner(args.config_dir, interval=args.interval, max_cycles=args.max_cycles).run())
+    except Exception as e:
+        import traceback
+        log(f"❌ Fatal error: {e}", "ERROR")
+        log(traceback.format_exc(), "ERROR")
+        runner.LOGGER.close()
+        sys.exit(1)
+    runner.LOGGER.close()
+
+
+if __name__ == "__main__":
+    main()
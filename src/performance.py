@@ -0,0 +1,161 @@
+"""
+Performance Aggregates for AurumBotX-v4
+Running per-pair and per-day trade statistics, updated as trades are recorded
+
+state["performance"] = {
+    "overall": bucket,
+    "by_pair": {pair: bucket},
+    "by_day":  {"YYYY-MM-DD": bucket},
+    "daily":   {"sum": .., "sq_sum": .., "count": ..}   daily PnL moments (Sharpe inputs)
+}
+
+A bucket holds trade/win/loss counts, realized PnL with its running peak and
+max drawdown, and the sum / sum of squares of per-trade returns. Opening
+trades count towards "total"; closing trades (records carrying "pnl") move
+wins/losses, PnL and returns.
+"""
+
+import math
+
+PERFORMANCE_KEY = "performance"
+
+
+def new_bucket():
+    """Empty aggregate bucket"""
+    return {
+        "total": 0,
+        "won": 0,
+        "lost": 0,
+        "pnl": 0.0,
+        "peak_pnl": 0.0,
+        "max_drawdown": 0.0,
+        "returns_sum": 0.0,
+        "returns_sq_sum": 0.0,
+        "returns_count": 0
+    }
+
+
+def new_performance():
+    """Empty aggregates for a new wallet"""
+    return {
+        "overall": new_bucket(),
+        "by_pair": {},
+        "by_day": {},
+        "daily": {"sum": 0.0, "sq_sum": 0.0, "count": 0}
+    }
+
+
+def trade_return(trade):
+    """Realized return of a closing trade as a fraction (None if unknown)"""
+    if trade.get("pnl_pct") is not None:
+        return float(trade["pnl_pct"]) / 100.0
+    size = trade.get("trade_size_usd")
+    if trade.get("pnl") is not None and size:
+        return float(trade["pnl"]) / float(size)
+    return None
+
+
+def bucket_keys(trade):
+    """(pair, day) of the buckets a trade record is folded into"""
+    return trade.get("pair", "UNKNOWN"), str(trade.get("timestamp", ""))[:10] or "unknown"
+
+
+def _update_bucket(bucket, trade, pnl, ret):
+    if trade.get("pnl") is None:
+        bucket["total"] += 1
+    result = trade.get("result")
+    if result == "won":
+        bucket["won"] += 1
+    elif result == "lost":
+        bucket["lost"] += 1
+    if pnl:
+        bucket["pnl"] += pnl
+        bucket["peak_pnl"] = max(bucket["peak_pnl"], bucket["pnl"])
+        bucket["max_drawdown"] = max(bucket["max_drawdown"], bucket["peak_pnl"] - bucket["pnl"])
+    if ret is not None:
+        bucket["returns_sum"] += ret
+        bucket["returns_sq_sum"] += ret * ret
+        bucket["returns_count"] += 1
+
+
+def record_trade(performance, trade):
+    """Fold one trade record into the aggregates (O(1))"""
+    pnl = float(trade.get("pnl") or 0.0)
+    ret = trade_return(trade)
+    pair, day = bucket_keys(trade)
+
+    day_bucket = performance["by_day"].get(day)
+    if day_bucket is None:
+        day_bucket = performance["by_day"][day] = new_bucket()
+        performance["daily"]["count"] += 1
+    previous_day_pnl = day_bucket["pnl"]
+
+    _update_bucket(performance["overall"], trade, pnl, ret)
+    _update_bucket(performance["by_pair"].setdefault(pair, new_bucket()), trade, pnl, ret)
+    _update_bucket(day_bucket, trade, pnl, ret)
+
+    # Only this day's PnL changed: swap its contribution in the daily moments
+    daily = performance["daily"]
+    daily["sum"] += day_bucket["pnl"] - previous_day_pnl
+    daily["sq_sum"] += day_bucket["pnl"] ** 2 - previous_day_pnl ** 2
+    return performance
+
+
+def performance_delta(performance, trades):
+    """The aggregates that folding `trades` changed: overall, daily and their pairs and days"""
+    keys = [bucket_keys(trade) for trade in trades]
+    return {
+        "overall": performance["overall"],
+        "daily": performance["daily"],
+        "by_pair": {pair: performance["by_pair"][pair] for pair, _ in keys if pair in performance["by_pair"]},
+        "by_day": {day: performance["by_day"][day] for _, day in keys if day in performance["by_day"]}
+    }
+
+
+def apply_delta(performance, delta):
+    """Overwrite the buckets carried by a performance_delta() (idempotent)"""
+    performance["overall"] = delta["overall"]
+    performance["daily"] = delta["daily"]
+    performance["by_pair"].update(delta["by_pair"])
+    performance["by_day"].update(delta["by_day"])
+    return performance
+
+
+def build_performance(trades):
+    """Aggregates for an existing trade history (migration / legacy fallback)"""
+    performance = new_performance()
+    for trade in trades:
+        record_trade(performance, trade)
+    return performance
+
+
+def sharpe(total, sq_total, count):
+    """Mean / sample standard deviation from running moments (None if undefined)"""
+    if count < 2:
+        return None
+    mean = total / count
+    variance = (sq_total - count * mean * mean) / (count - 1)
+    if variance <= 0:
+        return None
+    return mean / math.sqrt(variance)
+
+
+def summarize_bucket(bucket):
+    """Bucket as served by the API (adds win rate and per-trade Sharpe)"""
+    closed = bucket["won"] + bucket["lost"]
+    return {
+        "total": bucket["total"],
+        "won": bucket["won"],
+        "lost": bucket["lost"],
+        "win_rate": (bucket["won"] / closed * 100) if closed > 0 else 0,
+        "pnl": bucket["pnl"],
+        "max_drawdown": bucket["max_drawdown"],
+        "sharpe": sharpe(bucket["returns_sum"], bucket["returns_sq_sum"], bucket["returns_count"])
+    }
+
+
+def daily_sharpe(performance):
+    """Sharpe ratio of daily realized PnL, annualized over 365 trading days"""
+    daily = performance["daily"]
+    ratio = sharpe(daily["sum"], daily["sq_sum"], daily["count"])
+    return ratio * math.sqrt(365) if ratio is not None else None
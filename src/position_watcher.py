@@ -0,0 +1,125 @@
+"""
+Position Watcher for AurumBotX-v4
+Exit rules for the open position (take profit, stop loss, max holding time,
+emergency stop) and a background thread that evaluates them on every tick
+"""
+
+import threading
+from datetime import datetime
+
+DEFAULT_INTERVAL = 0.5  # seconds between price checks
+
+
+def open_position(trade):
+    """Position opened by an executed BUY trade record"""
+    return {
+        "pair": trade["pair"],
+        "side": "LONG",
+        "entry_price": trade["price"],
+        "quantity": trade["quantity"],
+        "trade_size_usd": trade["trade_size_usd"],
+        "confidence": trade.get("confidence", 0.0),
+        "opened_at": trade["timestamp"]
+    }
+
+
+def unrealized_pnl(position, price):
+    """PnL in USD of the position at price"""
+    return (price - position["entry_price"]) * position["quantity"]
+
+
+def evaluate_exit(position, price, state, config, now=None):
+    """Exit reason for the position at price, or None to keep holding
+
+    Checked in order: emergency stop (wallet equity down emergency_stop_loss_pct
+    from initial capital), stop loss, take profit, max holding time.
+    """
+    now = now or datetime.now()
+    change_pct = (price / position["entry_price"] - 1) * 100
+
+    emergency_pct = config.get("emergency_stop_loss_pct")
+    if emergency_pct:
+        equity = state["current_capital"] + unrealized_pnl(position, price)
+        if equity <= state["initial_capital"] * (1 - emergency_pct / 100):
+            return "emergency_stop"
+
+    stop_loss = config.get("stop_loss_pct")
+    if stop_loss and change_pct <= -stop_loss:
+        return "stop_loss"
+
+    take_profit = config.get("take_profit_pct")
+    if take_profit and change_pct >= take_profit:
+        return "take_profit"
+
+    max_hours = config.get("max_holding_hours")
+    if max_hours:
+        held = now - datetime.fromisoformat(position["opened_at"])
+        if held.total_seconds() >= max_hours * 3600:
+            return "max_holding_time"
+    return None
+
+
+def close_position(state, price, reason, now=None):
+    """Close the open position at price: update capital and counters, return the exit record"""
+    now = now or datetime.now()
+    position = state["open_position"]
+    pnl = unrealized_pnl(position, price)
+    trade = {
+        "timestamp": now.isoformat(),
+        "pair": position["pair"],
+        "action": "SELL",
+        "price": price,
+        "quantity": position["quantity"],
+        "trade_size_usd": position["trade_size_usd"],
+        "confidence": position.get("confidence", 0.0),
+        "reasoning": f"Exit: {reason}",
+        "entry_price": position["entry_price"],
+        "opened_at": position["opened_at"],
+        "pnl": pnl,
+        "pnl_pct": (price / position["entry_price"] - 1) * 100,
+        "result": "won" if pnl > 0 else "lost",
+        "exit_reason": reason
+    }
+    state["current_capital"] += pnl
+    if pnl > 0:
+        state["winning_trades"] += 1
+    else:
+        state["losing_trades"] += 1
+    state["open_position"] = None
+    if reason == "emergency_stop":
+        state["emergency_stop"] = True
+    state["trade_history"].append(trade)
+    return trade
+
+
+class PositionWatcher:
+    """Calls tick() every interval seconds on a daemon thread until stopped"""
+
+    def __init__(self, tick, interval=DEFAULT_INTERVAL, on_error=None):
+        self.tick = tick
+        self.interval = interval
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="position-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+
+    def stop(self):
+        """Stop the thread (waits for the current tick)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
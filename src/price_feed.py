@@ -0,0 +1,211 @@
+"""
+Price Feed for AurumBotX-v4
+Opt-in websocket market data: allMids and trades streamed into an in-memory
+price bus that the runner, the position watcher and the API read without
+network calls
+
+PriceBus       latest mids + recent trades per coin, thread-safe
+WebsocketFeed  subscribes through Info(skip_ws=False), reconnects and
+               resubscribes when the stream goes quiet or the socket dies
+ReplayInfo     stand-in for the websocket Info that replays recorded
+               messages (JSON lines of {"channel": ..., "data": ...})
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+STALE_AFTER = 10.0   # seconds without a message before mids are considered stale
+TRADES_KEEP = 200    # recent trades kept per coin
+
+
+class PriceBus:
+    """Latest market data pushed by a feed"""
+
+    def __init__(self, trades_keep=TRADES_KEEP):
+        self.mids = {}
+        self.updated_at = None  # time.monotonic() of the last mids update
+        self.version = 0
+        self.trades = defaultdict(lambda: deque(maxlen=trades_keep))
+        self._cond = threading.Condition()
+
+    def publish_mids(self, mids):
+        """Replace the mids (allMids always carries every coin)"""
+        with self._cond:
+            self.mids = dict(mids)  # readers keep a consistent dict
+            self.updated_at = time.monotonic()
+            self.version += 1
+            self._cond.notify_all()
+
+    def publish_trades(self, trades):
+        """Append trades ({coin, side, px, sz, time, ...}) to their coin's ring"""
+        with self._cond:
+            for trade in trades:
+                self.trades[trade["coin"]].append(trade)
+
+    def age(self):
+        """Seconds since the last mids update (None if nothing received yet)"""
+        if self.updated_at is None:
+            return None
+        return time.monotonic() - self.updated_at
+
+    def is_fresh(self, max_age=STALE_AFTER):
+        age = self.age()
+        return age is not None and age < max_age
+
+    def last_trade(self, coin):
+        """Most recent trade of coin, or None"""
+        with self._cond:
+            ring = self.trades.get(coin)
+            return ring[-1] if ring else None
+
+    def wait(self, version, timeout=None):
+        """Block until mids newer than version arrive (or timeout); returns the current version"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version, timeout)
+            return self.version
+
+
+class WebsocketFeed:
+    """Streams allMids and per-pair trades into a PriceBus, reconnecting when needed"""
+
+    def __init__(self, bus, info_factory, pairs=(), stale_after=STALE_AFTER, check_interval=2.0,
+                 backoff_max=60.0, log=None):
+        self.bus = bus
+        self.info_factory = info_factory  # returns a websocket-enabled Info (or ReplayInfo)
+        self.pairs = list(pairs)
+        self.stale_after = stale_after
+        self.check_interval = check_interval
+        self.backoff_max = backoff_max
+        self.log = log or (lambda message, level="INFO": None)
+        self.info = None
+        self.connected_at = None
+        self.last_message_at = None
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _on_mids(self, message):
+        self.last_message_at = time.monotonic()
+        self.bus.publish_mids(message["data"]["mids"])
+
+    def _on_trades(self, message):
+        self.last_message_at = time.monotonic()
+        self.bus.publish_trades(message["data"])
+
+    def _connect(self):
+        self.last_message_at = None  # a message from the previous socket must not mark this one stale
+        info = self.info_factory()
+        info.subscribe({"type": "allMids"}, self._on_mids)
+        for pair in self.pairs:
+            info.subscribe({"type": "trades", "coin": pair}, self._on_trades)
+        self.info = info
+        self.connected_at = time.monotonic()
+
+    def _disconnect(self):
+        info, self.info = self.info, None
+        if info is not None:
+            try:
+                info.disconnect_websocket()
+            except Exception:
+                pass
+
+    def _healthy(self):
+        if self.info is None:
+            return False
+        manager = getattr(self.info, "ws_manager", None)
+        if manager is not None and not manager.is_alive():
+            return False  # socket thread ended (connection dropped)
+        last = self.last_message_at or self.connected_at
+        return time.monotonic() - last < self.stale_after
+
+    def start(self):
+        """Connect and start the watchdog thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ws-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            if not self._healthy():
+                if self.info is not None:
+                    self.log("📡 Market stream stale or closed - reconnecting", "WARNING")
+                    self.reconnects += 1
+                self._disconnect()
+                try:
+                    self._connect()
+                    self.log(f"📡 Market stream subscribed: allMids + trades for {len(self.pairs)} pairs")
+                    delay = 1.0
+                except Exception as e:
+                    self.log(f"❌ Market stream connection failed: {e} - retrying in {delay:.0f}s", "ERROR")
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, self.backoff_max)
+                    continue
+            self._stop.wait(self.check_interval)
+
+    def stop(self):
+        """Stop the watchdog and close the socket"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._disconnect()
+
+
+class ReplayInfo:
+    """Replays recorded websocket messages through the Info subscribe API"""
+
+    def __init__(self, messages, interval=0.0, loop=False):
+        self.messages = list(messages)
+        self.interval = interval
+        self.loop = loop
+        self.mids = {}
+        self._callbacks = defaultdict(list)  # channel -> callbacks
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load messages from a JSON-lines recording"""
+        with open(path, "r") as f:
+            return cls([json.loads(line) for line in f if line.strip()], **kwargs)
+
+    def subscribe(self, subscription, callback):
+        channel = subscription["type"]
+        coin = subscription.get("coin")
+        self._callbacks[channel].append((coin, callback))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._play, name="ws-replay", daemon=True)
+            self._thread.start()
+        return len(self._callbacks[channel])
+
+    def _dispatch(self, message):
+        channel = message.get("channel")
+        if channel == "allMids":
+            self.mids = message["data"]["mids"]
+        for coin, callback in list(self._callbacks.get(channel, [])):
+            if coin is None or (message["data"] and message["data"][0].get("coin") == coin):
+                callback(message)
+
+    def _play(self):
+        while not self._stop.is_set():
+            for message in self.messages:
+                if self._stop.wait(self.interval):
+                    return
+                self._dispatch(message)
+            if not self.loop:
+                return
+
+    def disconnect_websocket(self):
+        self._stop.set()
+
+    # REST calls used by MarketSnapshot, answered from the replayed data
+    def all_mids(self):
+        return dict(self.mids)
+
+    def meta(self):
+        return {"universe": [{"name": name} for name in self.mids]}
@@ -0,0 +1,102 @@
+"""
+Shared Snapshot for AurumBotX-v4
+Market snapshot (all_mids + meta) published by a coordinator process into
+shared memory and read by worker processes without network calls
+
+Layout of the shared block:
+    [seq: u64][length: u64][payload: JSON {"mids": {...}, "meta": {...}, "published_at": ...}]
+The writer bumps seq to an odd value while writing and to the next even value
+when done (seqlock); readers retry on an odd or changed seq.
+"""
+
+import json
+import struct
+import time
+from multiprocessing import shared_memory
+
+HEADER = struct.Struct("<QQ")
+DEFAULT_SIZE = 4 * 1024 * 1024  # bytes; all_mids + meta are a few tens of KB
+
+
+class SharedSnapshotWriter:
+    """Owns the shared block and publishes snapshots into it"""
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.seq = 0
+        HEADER.pack_into(self.shm.buf, 0, 0, 0)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, mids, meta):
+        """Write a new snapshot (raises ValueError if it does not fit)"""
+        payload = json.dumps({"mids": mids, "meta": meta, "published_at": time.time()},
+                             separators=(",", ":")).encode()
+        if HEADER.size + len(payload) > self.shm.size:
+            raise ValueError(f"Snapshot of {len(payload)} bytes exceeds shared block of {self.shm.size}")
+        buf = self.shm.buf
+        HEADER.pack_into(buf, 0, self.seq + 1, 0)  # odd: write in progress
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        self.seq += 2
+        HEADER.pack_into(buf, 0, self.seq, len(payload))
+
+    def publish_snapshot(self, snapshot):
+        """Publish a MarketSnapshot's current mids and asset metadata"""
+        self.publish(snapshot.mids, {"universe": list(snapshot.assets.values())})
+
+    def close(self):
+        """Release and remove the shared block"""
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedSnapshotInfo:
+    """Read side: answers all_mids()/meta() like Info, from the shared block"""
+
+    def __init__(self, name, retries=100):
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.retries = retries
+        self._seq = None
+        self._data = {"mids": {}, "meta": {"universe": []}, "published_at": None}
+
+    def _read(self):
+        """Latest consistent snapshot (parsed once per published version)"""
+        buf = self.shm.buf
+        for _ in range(self.retries):
+            seq, length = HEADER.unpack_from(buf, 0)
+            if seq == self._seq:
+                return self._data
+            if seq % 2 or length == 0:
+                if seq == 0:
+                    return self._data  # nothing published yet
+                time.sleep(0.0005)
+                continue
+            payload = bytes(buf[HEADER.size:HEADER.size + length])
+            if HEADER.unpack_from(buf, 0)[0] != seq:
+                continue  # overwritten while copying
+            try:
+                self._data = json.loads(payload)
+            except ValueError:
+                continue
+            self._seq = seq
+            return self._data
+        return self._data
+
+    def all_mids(self):
+        return self._read()["mids"]
+
+    def meta(self):
+        return self._read()["meta"]
+
+    def age(self):
+        """Seconds since the coordinator published the current snapshot"""
+        published_at = self._read().get("published_at")
+        return time.time() - published_at if published_at else None
+
+    def close(self):
+        self.shm.close()
@@ -0,0 +1,340 @@
+"""
+State Store for AurumBotX-v4
+Wallet state as a compact snapshot plus an append-only trade/event journal
+
+<wallet>_state.json    scalar fields only, checkpointed by atomic rename
+<wallet>_journal.jsonl one event per line:
+                       {"event": "trade", "data": {...trade record...}}
+                       {"event": "state", "data": {...changed fields...}}
+                       {"event": "performance", "data": {...changed buckets...}}
+
+Saving appends only the new trades, the changed fields and the performance
+buckets those trades touched, so its cost does not grow with trade_history.
+Loading replays the journal to rebuild the history. Once the state and
+performance events pass STATE_COMPACT_BYTES the journal is rewritten as the
+trades plus one full state event.
+
+Events overwrite values, so replaying them from any offset up to the
+snapshot's journal_offset gives the same state.
+"""
+
+import json
+import os
+import threading
+
+from performance import PERFORMANCE_KEY, apply_delta, performance_delta
+
+HISTORY_KEY = "trade_history"
+JOURNAL_SUFFIX = "_journal.jsonl"
+STATE_SUFFIX = "_state.json"
+CHECKPOINT_EVERY = int(os.getenv("STATE_CHECKPOINT_EVERY", "50"))  # saves between snapshots
+STATE_BACKEND = os.getenv("STATE_BACKEND", "journal")  # journal | sqlite
+STATE_FSYNC = os.getenv("STATE_FSYNC", "false").lower() == "true"
+STATE_COMPACT_BYTES = int(os.getenv("STATE_COMPACT_BYTES", str(4 * 1024 * 1024)))  # state/performance events
+TRADE_PREFIX = b'{"event":"trade",'
+
+_MISSING = object()
+
+
+def journal_path_for(state_file):
+    """Journal path that belongs to a <wallet>_state.json snapshot"""
+    state_file = str(state_file)
+    if state_file.endswith(STATE_SUFFIX):
+        return state_file[:-len(STATE_SUFFIX)] + JOURNAL_SUFFIX
+    return state_file + ".journal"
+
+
+def write_json_atomic(path, data, fsync=True):
+    """Write JSON to a temp file and rename it over path"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _scalars(state):
+    return {key: value for key, value in state.items() if key != HISTORY_KEY}
+
+
+def _fields(state):
+    """Scalars compared field by field on save (performance is journaled per bucket)"""
+    return {key: value for key, value in state.items() if key not in (HISTORY_KEY, PERFORMANCE_KEY)}
+
+
+def _event_line(event, data):
+    return json.dumps({"event": event, "data": data}, separators=(",", ":"))
+
+
+class StateStore:
+    """Snapshot + journal persistence for one wallet"""
+
+    def __init__(self, state_file, checkpoint_every=CHECKPOINT_EVERY, compact_bytes=STATE_COMPACT_BYTES):
+        self.state_file = str(state_file)
+        self.journal_file = journal_path_for(state_file)
+        self.checkpoint_every = checkpoint_every
+        self.compact_bytes = compact_bytes
+        self._persisted = {}
+        self._performance = None  # aggregates object last journaled (in-place updates are deltas)
+        self._event_bytes = 0  # journal bytes of state/performance events
+        self._trade_count = 0
+        self._saves_since_checkpoint = 0
+        self._state = None
+        self._signature = None
+        self._torn_at = None
+        self._lock = threading.RLock()
+
+    def _file_signature(self):
+        """(snapshot mtime, journal size) used to detect writes by other processes"""
+        try:
+            snapshot_mtime = os.stat(self.state_file).st_mtime_ns
+        except OSError:
+            snapshot_mtime = None
+        try:
+            journal_size = os.path.getsize(self.journal_file)
+        except OSError:
+            journal_size = 0
+        return snapshot_mtime, journal_size
+
+    def load(self, migrate=True):
+        """Load state (snapshot + journal replay); None if nothing is stored"""
+        with self._lock:
+            # Nothing changed on disk since our own last write: reuse the live object
+            if self._state is not None and self._signature == self._file_signature():
+                return self._state
+
+            snapshot = None
+            if os.path.exists(self.state_file):
+                with open(self.state_file, "r") as f:
+                    snapshot = json.load(f)
+
+            if snapshot is not None and HISTORY_KEY in snapshot and "journal_offset" not in snapshot:
+                # Legacy full-JSON state: move its history into the journal
+                state = snapshot
+                if not migrate:
+                    return state
+                self._migrate(state)
+                return state
+
+            if snapshot is None and not os.path.exists(self.journal_file):
+                return None
+
+            state = dict(snapshot or {})
+            state.pop("journal_offset", None)
+            state.pop("trade_count", None)
+            offset = (snapshot or {}).get("journal_offset", 0)
+            if offset > self._file_signature()[1]:
+                offset = 0  # snapshot from before a compaction: the rewritten journal ends with the full state
+            state[HISTORY_KEY] = self._replay(state, offset)
+
+            self._persisted = json.loads(json.dumps(_fields(state)))  # detached copy
+            self._performance = state.get(PERFORMANCE_KEY)
+            self._trade_count = len(state[HISTORY_KEY])
+            self._state = state
+            self._signature = self._file_signature()
+            return state
+
+    def _replay(self, state, offset):
+        """Rebuild trade history and apply state events written after offset"""
+        trades = []
+        self._event_bytes = 0
+        if not os.path.exists(self.journal_file):
+            return trades
+        position = 0
+        with open(self.journal_file, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Torn final line (crash mid-append, or a write in progress): ignore it;
+                    # the writer cuts it off before its next append
+                    self._torn_at = position
+                    break
+                is_trade = raw.startswith(TRADE_PREFIX)
+                if not is_trade:
+                    self._event_bytes += len(raw)
+                if is_trade or position >= offset:  # events before offset are in the snapshot
+                    event = json.loads(raw)
+                    if event.get("event") == "trade":
+                        trades.append(event["data"])
+                    elif event.get("event") == "state":
+                        state.update(event["data"])
+                    elif event.get("event") == "performance" and state.get(PERFORMANCE_KEY) is not None:
+                        apply_delta(state[PERFORMANCE_KEY], event["data"])
+                position += len(raw)
+        return trades
+
+    def save(self, state, checkpoint=False):
+        """Append new trades, changed fields and touched buckets; checkpoint/compact periodically"""
+        with self._lock:
+            history = state.get(HISTORY_KEY, [])
+            new_trades = history[self._trade_count:]
+            lines = [_event_line("trade", trade) for trade in new_trades]
+            fields = _fields(state)
+            changed = {key: value for key, value in fields.items()
+                       if self._persisted.get(key, _MISSING) != value}
+            performance = state.get(PERFORMANCE_KEY)
+            if performance is not self._performance:
+                changed[PERFORMANCE_KEY] = performance  # replaced (new wallet, rebuilt): journal it whole
+            elif performance is not None and new_trades:
+                lines.append(_event_line("performance", performance_delta(performance, new_trades)))
+            if changed:
+                lines.append(_event_line("state", changed))
+
+            if lines:
+                if self._torn_at is not None:
+                    with open(self.journal_file, "r+b") as f:
+                        f.truncate(self._torn_at)
+                    self._torn_at = None
+                with open(self.journal_file, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                    if STATE_FSYNC:
+                        f.flush()
+                        os.fsync(f.fileno())
+                self._event_bytes += sum(len(line.encode()) + 1 for line in lines[len(new_trades):])
+
+            self._persisted = json.loads(json.dumps(fields))  # detached copy
+            self._performance = performance
+            self._trade_count = len(history)
+            self._state = state
+            self._saves_since_checkpoint += 1
+
+            if self._event_bytes >= self.compact_bytes:
+                self.compact(state)
+            elif checkpoint or self._saves_since_checkpoint >= self.checkpoint_every \
+                    or not os.path.exists(self.state_file):
+                self.checkpoint(state)
+            self._signature = self._file_signature()
+
+    def _write_journal_tmp(self, state, with_state):
+        """Write the journal's trades (plus one full state event) to a temp file: (path, trades end, size)"""
+        tmp_path = f"{self.journal_file}.tmp"
+        with open(tmp_path, "w") as f:
+            for trade in state.get(HISTORY_KEY, []):
+                f.write(_event_line("trade", trade) + "\n")
+            offset = f.tell()
+            if with_state:
+                f.write(_event_line("state", _scalars(state)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            return tmp_path, offset, f.tell()
+
+    def _migrate(self, state):
+        """Move a legacy full-JSON state's history into a new journal, then replace the snapshot"""
+        with self._lock:
+            # Journal rewritten whole, not appended to: a crash before the snapshot is replaced
+            # leaves the legacy file in place and the next start redoes the migration exactly
+            tmp_path, offset, _ = self._write_journal_tmp(state, with_state=False)
+            os.replace(tmp_path, self.journal_file)
+            self._persisted = json.loads(json.dumps(_fields(state)))  # detached copy
+            self._performance = state.get(PERFORMANCE_KEY)
+            self._trade_count = len(state.get(HISTORY_KEY, []))
+            self._event_bytes = 0
+            self._torn_at = None
+            self._state = state
+            self.checkpoint(state, offset)
+
+    def compact(self, state):
+        """Rewrite the journal as its trades plus one full state event, then checkpoint"""
+        with self._lock:
+            tmp_path, offset, size = self._write_journal_tmp(state, with_state=True)
+            # Snapshot first: replaying any suffix of the old journal over it is still exact
+            self.checkpoint(state, offset)
+            os.replace(tmp_path, self.journal_file)
+            self._torn_at = None
+            self._event_bytes = size - offset
+            self._signature = self._file_signature()
+
+    def checkpoint(self, state, offset=None):
+        """Write the compact snapshot (no history) covering the journal up to offset (default: all of it)"""
+        with self._lock:
+            snapshot = _scalars(state)
+            if offset is None:
+                offset = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+            snapshot["journal_offset"] = offset
+            snapshot["trade_count"] = len(state.get(HISTORY_KEY, []))
+            write_json_atomic(self.state_file, snapshot)
+            self._saves_since_checkpoint = 0
+            self._signature = self._file_signature()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(state_file):
+    """Get the process-wide store for a snapshot path (journal or SQLite backend)"""
+    state_file = str(state_file)
+    with _stores_lock:
+        store = _stores.get(state_file)
+        if store is None:
+            if STATE_BACKEND == "sqlite":
+                from trade_db import SQLiteStateStore, wallet_from_state_file
+                store = SQLiteStateStore(get_trade_db(os.path.dirname(state_file)),
+                                         wallet_from_state_file(state_file), legacy_file=state_file)
+            else:
+                store = StateStore(state_file)
+            _stores[state_file] = store
+        return store
+
+
+_dbs = {}
+
+
+def get_trade_db(state_dir):
+    """Get the shared TradeDB for a state directory (None unless STATE_BACKEND=sqlite)"""
+    if STATE_BACKEND != "sqlite":
+        return None
+    from trade_db import TradeDB, default_db_path
+    path = default_db_path(state_dir or ".")
+    db = _dbs.get(path)
+    if db is None:
+        db = _dbs[path] = TradeDB(path)
+    return db
+
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def state_version(state_file):
+    """Cheap change token for a wallet state: file stats, or the SQLite row version"""
+    state_file = str(state_file)
+    db = get_trade_db(os.path.dirname(state_file))
+    if db is not None:
+        from trade_db import wallet_from_state_file
+        return db.state_version(wallet_from_state_file(state_file))
+    return _stat_signature(state_file), _stat_signature(journal_path_for(state_file))
+
+
+def state_file_sizes(state_file):
+    """Bytes on disk of a wallet state: {"snapshot", "journal"}, or {"sqlite"} for the shared database"""
+    state_file = str(state_file)
+    if STATE_BACKEND == "sqlite":
+        from trade_db import default_db_path
+        paths = {"sqlite": default_db_path(os.path.dirname(state_file) or ".")}
+    else:
+        paths = {"snapshot": state_file, "journal": journal_path_for(state_file)}
+    sizes = {}
+    for name, path in paths.items():
+        signature = _stat_signature(path)
+        sizes[name] = signature[1] if signature else 0
+    return sizes
+
+
+def read_state(state_file):
+    """Load a wallet state (snapshot + journal) for read-only consumers"""
+    return get_store(state_file).load(migrate=False)
+
+
+def checkpoint_all():
+    """Checkpoint every store that holds a loaded state (e.g. on shutdown)"""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        if getattr(store, "_state", None) is not None:
+            store.checkpoint(store._state)
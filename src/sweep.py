@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Parameter Sweep for AurumBotX-v4
+Backtests many variants of a wallet config in parallel and ranks them
+
+Market data and signals are computed once, written as .npy files under the
+cache directory and memory-mapped read-only by every worker process. Each
+finished variant is appended to <cache>/results.jsonl keyed on the data
+fingerprint and the variant, so re-runs only backtest new variants.
+
+Parameters (repeat --param):
+    min_confidence=55,60,65           grid values (random search picks one)
+    stop_loss_pct=1:4                 range (random search only, uniform)
+    position_sizing.TURTLE=0.01,0.02  nested key
+    level_thresholds*=0.9,1,1.2       scale every value of a dict-valued key
+
+position_sizing and level_thresholds only shape results with level sizing:
+sweeping either switches the run to --sizing level.
+
+Usage: python src/sweep.py [CONFIG] --param KEY=VALUES [--param ...] [--samples N] [--seed S]
+                           [--workers N] [--rank METRIC] [--top N] [--csv FILE] [backtest options]
+"""
+
+import argparse
+import copy
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from backtest import Backtest, add_market_arguments, load_backtest
+
+SWEEP_CACHE_DIR = os.getenv("SWEEP_CACHE_DIR", "./sweep_cache")
+RANK_METRICS = {  # metric -> True if higher is better
+    "return_pct": True,
+    "sharpe_daily": True,
+    "sharpe_per_trade": True,
+    "win_rate": True,
+    "max_drawdown_pct": False
+}
+LEVEL_SIZING_KEYS = ("position_sizing", "level_thresholds")  # ignored by fixed sizing
+SUMMARY_KEYS = ("final_capital", "return_pct", "max_drawdown_pct", "trades", "won", "lost", "win_rate",
+                "sharpe_per_trade", "sharpe_daily", "exits", "emergency_stop")
+
+_backtest = None  # per worker process, memory-mapped
+
+
+def parse_param(spec):
+    """'key=1,2,3' -> (key, [1, 2, 3]); 'key=lo:hi' -> (key, (lo, hi))"""
+    key, _, values = spec.partition("=")
+    if not key or not values:
+        raise ValueError(f"Invalid --param {spec!r} (expected KEY=V1,V2 or KEY=LO:HI)")
+    if ":" in values:
+        lo, hi = values.split(":", 1)
+        return key, (float(lo), float(hi))
+    return key, [json.loads(value) for value in values.split(",")]
+
+
+def expand_variants(params, samples=None, seed=0):
+    """Override dicts: full grid, or `samples` random draws"""
+    keys = list(params)
+    if not samples:
+        ranges = [key for key in keys if isinstance(params[key], tuple)]
+        if ranges:
+            raise ValueError(f"Ranges need random search (--samples): {', '.join(ranges)}")
+        return [dict(zip(keys, values)) for values in itertools.product(*(params[key] for key in keys))]
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(samples):
+        variant = {}
+        for key in keys:
+            choice = params[key]
+            variant[key] = round(rng.uniform(*choice), 4) if isinstance(choice, tuple) else rng.choice(choice)
+        variants.append(variant)
+    return variants
+
+
+def apply_overrides(config, overrides):
+    """Copy of config with dotted keys set and 'key*' dict values scaled"""
+    variant = copy.deepcopy(config)
+    for key, value in overrides.items():
+        if key.endswith("*"):
+            target = variant[key[:-1]]
+            for name in target:
+                target[name] = target[name] * value
+            continue
+        *parents, name = key.split(".")
+        target = variant
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[name] = value
+    return variant
+
+
+def data_fingerprint(backtest, extra):
+    """Hash of the replayed arrays plus the options that shape the results"""
+    digest = hashlib.sha1(json.dumps(extra, sort_keys=True).encode())
+    market = backtest.market
+    digest.update(json.dumps([market.pairs, market.interval, backtest.decider_name]).encode())
+    for values in (market.ts, market.open, market.high, market.low, market.close, backtest.buy, backtest.confidence):
+        digest.update(np.ascontiguousarray(values).data)
+    return digest.hexdigest()
+
+
+def variant_key(fingerprint, config):
+    return hashlib.sha1(json.dumps([fingerprint, config], sort_keys=True).encode()).hexdigest()
+
+
+def load_results(path):
+    """Cached results: {key: result}"""
+    results = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # truncated last line of an interrupted run
+                results[result["key"]] = result
+    except OSError:
+        pass
+    return results
+
+
+def _init_worker(data_dir):
+    global _backtest
+    _backtest = Backtest.load(data_dir)
+
+
+def _run_variant(key, overrides, config, sizing, cycle_interval):
+    report = _backtest.run(config, sizing=sizing, cycle_interval=cycle_interval)
+    return {"key": key, "overrides": overrides, **{name: report[name] for name in SUMMARY_KEYS}}
+
+
+def run_sweep(backtest, config, variants, sizing="fixed", cycle_interval=None, workers=None,
+              cache_dir=SWEEP_CACHE_DIR, progress=None):
+    """Backtest every variant not cached yet; returns the results of all variants (cached + new)"""
+    swept = sorted({key for overrides in variants for key in overrides if key.startswith(LEVEL_SIZING_KEYS)})
+    if swept and sizing != "level":
+        sizing = "level"
+        if progress:
+            progress(f"⚖️  {', '.join(swept)} only apply with level sizing - using --sizing level")
+    fingerprint = data_fingerprint(backtest, {"sizing": sizing, "cycle_interval": cycle_interval})
+    data_dir = os.path.join(cache_dir, "data", fingerprint[:16])
+    if not os.path.exists(os.path.join(data_dir, "meta.json")):
+        backtest.save(data_dir)
+    results_path = os.path.join(cache_dir, "results.jsonl")
+    cached = load_results(results_path)
+
+    results, pending, seen = [], {}, set()
+    for overrides in variants:
+        key = variant_key(fingerprint, apply_overrides(config, overrides))
+        if key in seen:
+            continue  # random search drew the same variant twice
+        seen.add(key)
+        if key in cached:
+            results.append(cached[key])
+        else:
+            pending[key] = overrides
+    if progress:
+        progress(f"🧮 {len(variants)} variants: {len(results)} cached, {len(pending)} to backtest")
+    if not pending:
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context("spawn")  # workers map the .npy files instead of inheriting copies
+    with open(results_path, "a") as out, ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)), mp_context=context,
+            initializer=_init_worker, initargs=(data_dir,)) as pool:
+        futures = [pool.submit(_run_variant, key, overrides, apply_overrides(config, overrides), sizing,
+                               cycle_interval)
+                   for key, overrides in pending.items()]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            out.write(json.dumps(result, default=str) + "\n")
+            out.flush()
+            results.append(result)
+            if progress and (done % 50 == 0 or done == len(futures)):
+                progress(f"   {done}/{len(futures)} done")
+    return results
+
+
+def rank(results, metric="return_pct"):
+    """Results sorted best first (undefined metrics last)"""
+    higher = RANK_METRICS[metric]
+    defined = [r for r in results if r.get(metric) is not None]
+    undefined = [r for r in results if r.get(metric) is None]
+    return sorted(defined, key=lambda r: r[metric], reverse=higher) + undefined
+
+
+def format_table(results, keys, top=20):
+    """Ranked results as a text table"""
+    fmt = lambda value: "n/a" if value is None else (f"{value:.4g}" if isinstance(value, float) else str(value))
+    header = ["#"] + keys + ["Return %", "Max DD %", "Trades", "Win %", "Sharpe/d"]
+    rows = [[str(i)] + [fmt(r["overrides"].get(key)) for key in keys] +
+            [f"{r['return_pct']:+.2f}", f"{r['max_drawdown_pct']:.2f}", str(r["trades"]),
+             f"{r['win_rate']:.1f}", fmt(r["sharpe_daily"])]
+            for i, r in enumerate(results[:top], 1)]
+    widths = [max(len(row[col]) for row in [header] + rows) for col in range(len(header))]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in [header] + rows]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AurumBotX Parameter Sweep")
+    add_market_arguments(parser)
+    parser.add_argument("--param", action="append", required=True, help="KEY=V1,V2,... or KEY=LO:HI")
+    parser.add_argument("--samples", type=int, default=None, help="Random search with N samples (default: grid)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--rank", choices=sorted(RANK_METRICS), default="return_pct")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--cache-dir", default=SWEEP_CACHE_DIR)
+    parser.add_argument("--csv", default=None, help="Write every ranked result to this CSV file")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Command line entry point"""
+    args = parse_args()
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    try:
+        params = dict(parse_param(spec) for spec in args.param)
+        variants = expand_variants(params, args.samples, args.seed)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    started = time.monotonic()
+    backtest = load_backtest(args, config)
+    results = run_sweep(backtest, config, variants, sizing=args.sizing, cycle_interval=args.cycle_interval,
+                        workers=args.workers, cache_dir=args.cache_dir, progress=print)
+    ranked = rank(results, args.rank)
+
+    print(f"\n🏆 Top {min(args.top, len(ranked))} of {len(ranked)} by {args.rank}")
+    print(format_table(ranked, list(params), args.top))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(params) + list(SUMMARY_KEYS))
+            for r in ranked:
+                writer.writerow([r["overrides"].get(key) for key in params] + [r.get(name) for name in SUMMARY_KEYS])
+        print(f"💾 Results saved: {args.csv}")
+    print(f"⏱️  Sweep took {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Trade DB for AurumBotX-v4
+Optional SQLite backend for wallet state and trade history, shared by the
+runner and the API server (enable with STATE_BACKEND=sqlite)
+
+Trades are indexed by timestamp, pair and action, and are paginated by
+keyset on their per-wallet sequence number (0-based position in trade_history).
+
+Usage: python src/trade_db.py migrate [STATE_FILE ...]
+       python src/trade_db.py stats
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from performance import PERFORMANCE_KEY, new_performance, performance_delta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallet_state (
+    wallet TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    trade_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS trades (
+    wallet TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    pair TEXT,
+    action TEXT,
+    price REAL,
+    confidence REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (wallet, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades (wallet, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_pair ON trades (wallet, pair, seq);
+CREATE INDEX IF NOT EXISTS idx_trades_action ON trades (wallet, action, seq);
+CREATE TABLE IF NOT EXISTS performance (
+    wallet TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (wallet, scope, key)
+) WITHOUT ROWID;
+"""
+
+HISTORY_KEY = "trade_history"
+PERFORMANCE_SCOPES = (("by_pair", "pair"), ("by_day", "day"))  # performance dict key -> scope column
+
+
+def default_db_path(state_dir):
+    """Default database location inside the state directory"""
+    return os.getenv("STATE_DB", os.path.join(state_dir, "aurumbot.db"))
+
+
+class TradeDB:
+    """Thin SQLite wrapper with one connection per thread (WAL mode)"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- state -------------------------------------------------------------
+
+    def load_state(self, wallet, with_history=True):
+        """Load wallet state (with trade_history if requested); None if absent"""
+        row = self.connection().execute(
+            "SELECT data, trade_count FROM wallet_state WHERE wallet = ?", (wallet,)).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row["data"])
+        performance = self.load_performance(wallet)
+        if performance is not None:
+            state[PERFORMANCE_KEY] = performance
+        if with_history:
+            rows = self.connection().execute(
+                "SELECT data FROM trades WHERE wallet = ? ORDER BY seq", (wallet,))
+            state[HISTORY_KEY] = [json.loads(r["data"]) for r in rows]
+        return state
+
+    def load_performance(self, wallet):
+        """Performance aggregates reassembled from their buckets; None if none are stored"""
+        rows = self.connection().execute(
+            "SELECT scope, key, data FROM performance WHERE wallet = ?", (wallet,)).fetchall()
+        if not rows:
+            return None
+        performance = new_performance()
+        scopes = {scope: name for name, scope in PERFORMANCE_SCOPES}
+        for row in rows:
+            if row["scope"] in scopes:
+                performance[scopes[row["scope"]]][row["key"]] = json.loads(row["data"])
+            else:
+                performance[row["scope"]] = json.loads(row["data"])
+        return performance
+
+    def save_state(self, wallet, state, new_trades=(), first_seq=0, performance=None, replace_performance=False):
+        """Upsert the scalar state, new trades and performance buckets in one transaction"""
+        # performance: whole aggregates (replace_performance) or the buckets a performance_delta() touched
+        scalars = {key: value for key, value in state.items() if key not in (HISTORY_KEY, PERFORMANCE_KEY)}
+        trade_count = first_seq + len(new_trades)
+        conn = self.connection()
+        with conn:
+            self._insert_trades(conn, wallet, new_trades, first_seq)
+            if performance is not None:
+                self._write_performance(conn, wallet, performance, replace_performance)
+            conn.execute(
+                "INSERT INTO wallet_state (wallet, data, trade_count, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(wallet) DO UPDATE SET data = excluded.data, "
+                "trade_count = excluded.trade_count, updated_at = excluded.updated_at",
+                (wallet, json.dumps(scalars), trade_count, scalars.get("updated_at")))
+
+    def _write_performance(self, conn, wallet, performance, replace):
+        if replace:
+            conn.execute("DELETE FROM performance WHERE wallet = ?", (wallet,))
+        rows = [(wallet, "overall", "", json.dumps(performance["overall"])),
+                (wallet, "daily", "", json.dumps(performance["daily"]))]
+        for name, scope in PERFORMANCE_SCOPES:
+            rows.extend((wallet, scope, key, json.dumps(bucket)) for key, bucket in performance[name].items())
+        conn.executemany(
+            "INSERT INTO performance (wallet, scope, key, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(wallet, scope, key) DO UPDATE SET data = excluded.data", rows)
+
+    def _insert_trades(self, conn, wallet, trades, first_seq):
+        conn.executemany(
+            "INSERT OR IGNORE INTO trades (wallet, seq, timestamp, pair, action, price, confidence, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(wallet, first_seq + i, trade.get("timestamp", ""), trade.get("pair"), trade.get("action"),
+              trade.get("price"), trade.get("confidence"), json.dumps(trade))
+             for i, trade in enumerate(trades)])
+
+    def trade_count(self, wallet):
+        """Number of trades recorded for wallet (None if the wallet is unknown)"""
+        row = self.connection().execute(
+            "SELECT trade_count FROM wallet_state WHERE wallet = ?", (wallet,)).fetchone()
+        return row["trade_count"] if row else None
+
+    def state_version(self, wallet):
+        """(trade_count, updated_at) of the stored state, None if absent"""
+        row = self.connection().execute(
+            "SELECT trade_count, updated_at FROM wallet_state WHERE wallet = ?", (wallet,)).fetchone()
+        return (row["trade_count"], row["updated_at"]) if row else None
+
+    # -- trade queries ------------------------------------------------------
+
+    def get_trade(self, wallet, seq):
+        """Get one trade by its position in trade_history"""
+        row = self.connection().execute(
+            "SELECT data FROM trades WHERE wallet = ? AND seq = ?", (wallet, seq)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def list_trades(self, wallet, after=None, limit=50, pair=None, action=None, since=None, until=None, offset=0):
+        """Page of trades ordered by seq, starting after the `after` cursor (keyset)"""
+        clauses = ["wallet = ?"]
+        params = [wallet]
+        if after is not None:
+            clauses.append("seq > ?")
+            params.append(after)
+        if pair:
+            clauses.append("pair = ?")
+            params.append(pair)
+        if action:
+            clauses.append("action = ?")
+            params.append(action)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        params.extend((limit, offset))
+        rows = self.connection().execute(
+            f"SELECT seq, data FROM trades WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ? OFFSET ?", params)
+        trades = []
+        last_seq = None
+        for row in rows:
+            trades.append(json.loads(row["data"]))
+            last_seq = row["seq"]
+        return trades, last_seq
+
+    def count_trades(self, wallet, pair=None, action=None, since=None, until=None):
+        """Count trades matching the filters (uses the same indexes)"""
+        clauses = ["wallet = ?"]
+        params = [wallet]
+        for column, op, value in (("pair", "=", pair), ("action", "=", action),
+                                  ("timestamp", ">=", since), ("timestamp", "<", until)):
+            if value:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return self.connection().execute(
+            f"SELECT COUNT(*) FROM trades WHERE {' AND '.join(clauses)}", params).fetchone()[0]
+
+
+class SQLiteStateStore:
+    """StateStore-compatible persistence backed by TradeDB"""
+
+    def __init__(self, db, wallet, legacy_file=None):
+        self.db = db
+        self.wallet = wallet
+        self.legacy_file = legacy_file
+        self._trade_count = 0
+        self._performance = None  # aggregates object last saved (in-place updates are deltas)
+        self._state = None
+        self._version = None
+        self._lock = threading.RLock()
+
+    def load(self, migrate=True):
+        """Load state and full trade history; None if the wallet is unknown"""
+        with self._lock:
+            # Reuse the live object while the stored version is the one we hold
+            version = self.db.state_version(self.wallet)
+            if self._state is not None and version == self._version:
+                return self._state
+            state = self.db.load_state(self.wallet)
+            if state is None and migrate and self.legacy_file and os.path.exists(self.legacy_file):
+                # First start on SQLite: import the existing JSON state once
+                migrate_state_files(self.db, [self.legacy_file])
+                state = self.db.load_state(self.wallet)
+            if state is not None:
+                self._trade_count = len(state[HISTORY_KEY])
+                self._performance = state.get(PERFORMANCE_KEY)
+                self._state = state
+                self._version = (self._trade_count, state.get("updated_at"))
+            return state
+
+    def save(self, state, checkpoint=False):
+        """Insert new trades, upsert the scalar state and the touched buckets (O(1) per save)"""
+        with self._lock:
+            history = state.get(HISTORY_KEY, [])
+            new_trades = history[self._trade_count:]
+            performance = state.get(PERFORMANCE_KEY)
+            replace = performance is not self._performance
+            if performance is not None and not replace:
+                performance = performance_delta(performance, new_trades) if new_trades else None
+            self.db.save_state(self.wallet, state, new_trades, self._trade_count,
+                               performance=performance, replace_performance=replace)
+            self._trade_count = len(history)
+            self._performance = state.get(PERFORMANCE_KEY)
+            self._state = state
+            self._version = (self._trade_count, state.get("updated_at"))
+
+    def checkpoint(self, state):
+        """Nothing to compact: every save is already durable"""
+
+
+def wallet_from_state_file(state_file):
+    """Wallet name from a <wallet>_state.json path"""
+    name = os.path.basename(str(state_file))
+    return name[:-len("_state.json")] if name.endswith("_state.json") else name
+
+
+def migrate_state_files(db, state_files):
+    """Import *_state.json files (legacy JSON or snapshot + journal) into db"""
+    from state_store import StateStore
+
+    results = []
+    for state_file in state_files:
+        state = StateStore(state_file).load(migrate=False)
+        if state is None or "wallet_name" not in state:
+            continue  # not a wallet state file
+        wallet = state.get("wallet_name") or wallet_from_state_file(state_file)
+        history = state.get(HISTORY_KEY, [])
+        # INSERT OR IGNORE: re-running is safe
+        db.save_state(wallet, state, history, 0, performance=state.get(PERFORMANCE_KEY), replace_performance=True)
+        results.append((state_file, wallet, len(history)))
+    return results
+
+
+def main():
+    """Command line entry point"""
+    state_dir = os.getenv("STATE_DIR", "./hyperliquid_trading")
+    db = TradeDB(default_db_path(state_dir))
+    args = sys.argv[1:]
+
+    if args and args[0] == "migrate":
+        state_files = args[1:] or sorted(glob.glob(os.path.join(state_dir, "*_state.json")))
+        for state_file, wallet, trades in migrate_state_files(db, state_files):
+            print(f"✅ {state_file}: wallet {wallet}, {trades} trades imported into {db.path}")
+    elif args and args[0] == "stats":
+        for row in db.connection().execute("SELECT wallet, trade_count, updated_at FROM wallet_state ORDER BY wallet"):
+            print(f"{row['wallet']:>30} {row['trade_count']:>10} trades  updated {row['updated_at']}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
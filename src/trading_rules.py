@@ -0,0 +1,58 @@
+"""
+Trading Rules for AurumBotX-v4
+Pure decision rules shared by execute_cycle and the offline backtest:
+trend classification, signal filters, trading level and position sizing
+"""
+
+TREND_THRESHOLD_PCT = 2.0  # |24h change| above this is a trend, below it sideways
+RISK_PER_TRADE_PCT = 0.01  # fixed sizing: 1% of current capital per trade
+MIN_TRADE_USD = 1.0
+QUANTITY_DECIMALS = 4  # simulated exchange precision
+
+LEVELS = ("TURTLE", "RABBIT", "CHEETAH", "LION", "WHALE")
+
+
+def trend_from_change(change_24h):
+    """BULLISH / BEARISH / SIDEWAYS from the 24h change in percent"""
+    if change_24h > TREND_THRESHOLD_PCT:
+        return "BULLISH"
+    if change_24h < -TREND_THRESHOLD_PCT:
+        return "BEARISH"
+    return "SIDEWAYS"
+
+
+def signal_filter(analysis, trend, min_confidence):
+    """Why an AI signal is not traded ("hold", "low_confidence", "bear_market"), or None to trade"""
+    if analysis["action"] == "HOLD":
+        return "hold"
+    if analysis["confidence"] < min_confidence:
+        return "low_confidence"
+    if trend == "BEARISH" and analysis["action"] == "BUY":
+        return "bear_market"
+    return None
+
+
+def trading_level(capital, config):
+    """Highest level whose capital threshold (config level_thresholds) is reached"""
+    level = LEVELS[0]
+    thresholds = config.get("level_thresholds", {})
+    for name in LEVELS[1:]:
+        if name in thresholds and capital >= thresholds[name]:
+            level = name
+    return level
+
+
+def position_size_usd(capital, config=None):
+    """Position size in USD: the level's position_sizing fraction when a config is given, else 1%"""
+    if config and config.get("position_sizing"):
+        sizing = config["position_sizing"]
+        return capital * sizing.get(trading_level(capital, config), RISK_PER_TRADE_PCT)
+    return capital * RISK_PER_TRADE_PCT
+
+
+def order_quantity(size_usd, price):
+    """Quantity rounded to exchange precision, or None if below the minimum trade"""
+    quantity = round(size_usd / price, QUANTITY_DECIMALS)
+    if quantity * price < MIN_TRADE_USD:
+        return None
+    return quantity
@@ -5,59 +5,159 @@ Version: 4.1 Hyperliquid
 Environment: Hyperliquid Testnet + Oracle Cloud
 """
 
+import argparse
 import json
+import signal
+import threading
 import time
 import sys
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from openai import OpenAI
-from hyperliquid.info import Info
-import pandas as pd
-from hyperliquid.exchange import Exchange
-from hyperliquid.utils import constants
-from eth_account import Account
-import ta
+# hyperliquid, eth_account, openai and numpy are imported on first use: a cycle that returns early never loads them
 
+from bot_logger import BotLogger
+from candle_store import CandleStore
+from decision_cache import DecisionCache, decision_key
+from indicators import RSIEngine, compute_rsi
+from call_recorder import CallHarness
+from cycle_profiler import CycleProfiler
+from llm_client import chat_completion, get_client, get_llm_stats, set_transport
+from market_snapshot import MarketSnapshot
+from metrics import REGISTRY, span
+from performance import PERFORMANCE_KEY, build_performance, new_performance, record_trade
+from position_watcher import PositionWatcher, close_position, evaluate_exit, open_position, unrealized_pnl
+from price_feed import PriceBus, ReplayInfo, WebsocketFeed
+from state_store import checkpoint_all, get_store, state_file_sizes
+from trading_rules import order_quantity, position_size_usd, signal_filter, trend_from_change
 
 # Configuration
-CONFIG_FILE = sys.argv[1] if len(sys.argv) > 1 else "config/hyperliquid_testnet_10k.json"
+CONFIG_FILE = "config/hyperliquid_testnet_10k.json"
 STATE_DIR = os.getenv("STATE_DIR", "./hyperliquid_trading")
 LOG_DIR = os.getenv("LOG_DIR", "./logs")
+CYCLE_INTERVAL = os.getenv("CYCLE_INTERVAL")  # seconds, overrides config cycle_interval_hours
+MARKET_SNAPSHOT_TTL = float(os.getenv("MARKET_SNAPSHOT_TTL", "5"))
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "6"))  # pairs analyzed in parallel (LLM_MAX_CONCURRENCY default)
+CANDLE_DIR = os.getenv("CANDLE_DIR", os.path.join(STATE_DIR, "candles"))
+CANDLE_INTERVAL = os.getenv("CANDLE_INTERVAL", "1h")
+CANDLE_BACKFILL = os.getenv("CANDLE_BACKFILL", "true").lower() == "true"
+CANDLE_WRITER = True  # False in sharded worker processes: the coordinator samples and backfills candles
+MARKET_FEED = os.getenv("MARKET_FEED", "rest")  # rest | ws (daemon mode: stream mids/trades over websocket)
+MARKET_FEED_REPLAY = os.getenv("MARKET_FEED_REPLAY")  # JSON-lines recording replayed instead of the websocket
+POSITION_CHECK_INTERVAL = float(os.getenv("POSITION_CHECK_INTERVAL", "0.5"))  # seconds, 0 disables the watcher
+LOG_BUFFER_LINES = int(os.getenv("LOG_BUFFER_LINES", "64"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1"))  # seconds
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))  # size rotation, 0 = daily only
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_JSON = os.getenv("LOG_JSON", "true").lower() == "true"  # structured .jsonl next to the .log
+CALL_RECORD_FILE = os.getenv("CALL_RECORD_FILE")  # record Info REST + LLM calls to this JSON-lines file
+CALL_REPLAY_FILE = os.getenv("CALL_REPLAY_FILE")  # serve them from a recording instead (offline runs)
+CALL_REPLAY_LATENCY = os.getenv("CALL_REPLAY_LATENCY", "original")  # original | zero | scale factor
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(STATE_DIR, "metrics"))  # read by api_server /metrics
+METRICS_FILE = os.path.join(METRICS_DIR, "runner.json")  # dumped after every cycle
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", "0"))  # profile the first N cycles (SIGUSR1: the next N, default 3)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")  # sample (folded stacks) | cprofile (.prof)
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))  # seconds between stack samples
+AI_MODEL = "gemini-1.5-flash"  # Aggiornato al modello più recente e performante
+
+# Daemon control (set from signal handlers)
+SHUTDOWN_EVENT = threading.Event()
+RELOAD_EVENT = threading.Event()
+PROFILE_EVENT = threading.Event()  # SIGUSR1 received (the sharded coordinator forwards it to its workers)
+SHUTDOWN_SIGNAL = None  # signal number that set SHUTDOWN_EVENT
+
+# Per-wallet locks serializing state changes between cycles and the position watcher
+_state_locks = {}
+_state_locks_guard = threading.Lock()
+
+# Shared by every cycle (and every wallet in multi-wallet mode), created on first use
+_analysis_pool = None
 
 # Ensure directories exist
 os.makedirs(STATE_DIR, exist_ok=True)
 os.makedirs(LOG_DIR, exist_ok=True)
 
-def log(message, level="INFO"):
-    """Log message to file and stdout"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_message = f"[{timestamp}] [{level}] {message}"
-    print(log_message)
-    
-    # Write to log file
-    log_file = os.path.join(LOG_DIR, f"hyperliquid_trading_{datetime.now().strftime('%Y%m%d')}.log")
-    with open(log_file, "a") as f:
-        f.write(log_message + "\n")
+def create_logger(prefix="hyperliquid_trading"):
+    """Buffered console + file logger configured from the LOG_* settings"""
+    return BotLogger(
+        LOG_DIR, prefix,
+        buffer_size=LOG_BUFFER_LINES,
+        flush_interval=LOG_FLUSH_INTERVAL,
+        max_bytes=LOG_MAX_BYTES,
+        backups=LOG_BACKUPS,
+        json_lines=LOG_JSON
+    )
+
+# Buffered console + file logging (the daemon starts a background writer)
+LOGGER = create_logger()
+
+# AI decision cache (DECISION_CACHE_TTL=0 disables it, empty DECISION_CACHE_FILE keeps it in memory)
+DECISION_CACHE = DecisionCache(
+    ttl=float(os.getenv("DECISION_CACHE_TTL", "900")),
+    max_entries=int(os.getenv("DECISION_CACHE_SIZE", "1024")),
+    path=os.getenv("DECISION_CACHE_FILE", os.path.join(STATE_DIR, "decision_cache.json")) or None
+)
+
+# Local OHLCV history, built from sampled mids, backfill and bulk imports
+CANDLE_STORE = CandleStore(CANDLE_DIR)
+
+# Per-symbol incremental RSI state, restored across restarts
+RSI_ENGINE = RSIEngine(window=14, path=os.path.join(STATE_DIR, "rsi_engine.json"))
+
+# Record / replay of exchange and LLM calls (deterministic offline benchmarks and regression runs)
+CALL_HARNESS = None
+if CALL_RECORD_FILE or CALL_REPLAY_FILE:
+    CALL_HARNESS = CallHarness(CALL_RECORD_FILE, CALL_REPLAY_FILE, CALL_REPLAY_LATENCY)
+    set_transport(CALL_HARNESS.wrap_completion(
+        lambda **kwargs: get_client().chat.completions.create(**kwargs)))
+
+# Cycle metrics (stage timings are recorded by metrics.span)
+CYCLES = REGISTRY.counter("aurum_cycles_total", "Trading cycles run, by outcome", ("wallet", "outcome"))
+CYCLE_SECONDS = REGISTRY.histogram("aurum_cycle_seconds", "Duration of execute_cycle", ("wallet",))
+SIGNALS_SKIPPED = REGISTRY.counter("aurum_signals_skipped_total", "Pairs not traded in a cycle, by reason",
+                                   ("wallet", "reason"))
+TRADES = REGISTRY.counter("aurum_trades_total", "Trades recorded", ("wallet", "action"))
+STATE_BYTES = REGISTRY.gauge("aurum_state_file_bytes", "Size of the wallet state files", ("wallet", "file"))
+
+def log(message, level="INFO", **fields):
+    """Log message to stdout and the buffered log files (extra fields go to the JSON lines)"""
+    LOGGER.log(message, level, **fields)
 
-def load_config():
+# On-demand profiling of live cycles (PROFILE_CYCLES at startup, SIGUSR1 at runtime)
+PROFILER = CycleProfiler(os.path.join(LOG_DIR, "profiles"), PROFILE_MODE, PROFILE_INTERVAL, log=log)
+if PROFILE_CYCLES:
+    PROFILER.arm(PROFILE_CYCLES)
+
+def load_config(exit_on_error=True):
     """Load configuration"""
     try:
         with open(CONFIG_FILE, "r") as f:
             return json.load(f)
     except Exception as e:
         log(f"Error loading config: {e}", "ERROR")
+        if not exit_on_error:
+            return None
         sys.exit(1)
 
+def get_state_file(wallet_name):
+    """Path of the wallet state snapshot (its journal sits next to it)"""
+    return os.path.join(STATE_DIR, f"{wallet_name}_state.json")
+
 def load_state(config):
     """Load wallet state"""
-    state_file = os.path.join(STATE_DIR, f"{config['wallet_name']}_state.json")
+    state_file = get_state_file(config['wallet_name'])
     
-    if os.path.exists(state_file):
-        try:
-            with open(state_file, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            log(f"Error loading state: {e}", "WARNING")
+    try:
+        # Snapshot + journal replay; reused in memory while the files are unchanged
+        state = get_store(state_file).load()
+        if state is not None:
+            if PERFORMANCE_KEY not in state:
+                # State written before aggregates existed: build them once from history
+                state[PERFORMANCE_KEY] = build_performance(state.get("trade_history", []))
+            return state
+    except Exception as e:
+        log(f"Error loading state: {e}", "WARNING")
     
     # Initialize new state
     return {
@@ -74,31 +174,51 @@ def load_state(config):
         "last_trade_date": None,
         "bear_market_skipped": 0,
         "low_confidence_skipped": 0,
+        "performance": new_performance(),
         "created_at": datetime.now().isoformat(),
         "updated_at": datetime.now().isoformat()
     }
 
 def save_state(state):
     """Save wallet state"""
-    config = load_config()
-    state_file = os.path.join(STATE_DIR, f"{config['wallet_name']}_state.json")
+    state_file = get_state_file(state['wallet_name'])
     
     state["updated_at"] = datetime.now().isoformat()
     
     try:
-        with open(state_file, "w") as f:
-            json.dump(state, f, indent=2)
+        # Appends new trades/changed fields to the journal; snapshot is checkpointed periodically
+        with span("state_save"):
+            get_store(state_file).save(state)
+        for name, size in state_file_sizes(state_file).items():
+            STATE_BYTES.set(size, wallet=state["wallet_name"], file=name)
         log(f"State saved: {state_file}")
     except Exception as e:
         log(f"Error saving state: {e}", "ERROR")
 
-def get_hyperliquid_info(testnet=True):
-    """Get Hyperliquid Info client"""
+def get_hyperliquid_info(testnet=True, websocket=False):
+    """Get Hyperliquid Info client (websocket=True opens the SDK's streaming connection)"""
+    from hyperliquid.info import Info
+    from hyperliquid.utils import constants
     api_url = constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
-    return Info(api_url, skip_ws=True)
+    if CALL_HARNESS is not None and not websocket:
+        return CALL_HARNESS.info(lambda: Info(api_url, skip_ws=True))
+    return Info(api_url, skip_ws=not websocket)
+
+def start_market_feed(pairs):
+    """Start the websocket (or replay) feed; returns (feed, bus)"""
+    bus = PriceBus()
+    if MARKET_FEED_REPLAY:
+        factory = lambda: ReplayInfo.from_file(MARKET_FEED_REPLAY, interval=0.5, loop=True)
+    else:
+        factory = lambda: get_hyperliquid_info(testnet=True, websocket=True)
+    feed = WebsocketFeed(bus, factory, pairs=pairs, log=log).start()
+    return feed, bus
 
 def get_hyperliquid_exchange(account_address, secret_key, testnet=True):
-    """Get Hyperliquid Exchange client"""
+    """Get Hyperliquid Exchange client (SDK and eth_account imported only here: unused by paper trading)"""
+    from eth_account import Account
+    from hyperliquid.exchange import Exchange
+    from hyperliquid.utils import constants
     api_url = constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
     
     # Create account from private key
@@ -106,69 +226,59 @@ def get_hyperliquid_exchange(account_address, secret_key, testnet=True):
     
     return Exchange(account, api_url)
 
-def get_historical_data(info, symbol, interval="1h", limit=14):
-    """Get historical klines (candles) from Hyperliquid (simulated)."""
-    # NOTE: Hyperliquid SDK used here doesn't provide klines. This is a simulation.
-    # In a real bot, use a dedicated data provider (e.g., CCXT) to get actual historical data.
-    data = {
-        'close': [87000, 87100, 87200, 87300, 87400, 87500, 87600, 87550, 87450, 87350, 87250, 87150, 87050, 87200]
+def get_historical_data(info, symbol, interval=None, limit=14, mid=None, since=None):
+    """Get the last `limit` closed candles, or all bars after `since` if more, sampling `mid` into the open bar"""
+    interval = interval or CANDLE_INTERVAL
+    series = CANDLE_STORE.series(symbol, interval)
+    
+    # Fetch only the closed bars missing since the last stored one (warm-up, downtime)
+    if CANDLE_WRITER and CANDLE_BACKFILL and info is not None:
+        try:
+            added = series.backfill(info, symbol, limit)
+            if added:
+                log(f"🕯️  Backfilled {added} {interval} candles for {symbol}")
+        except Exception as e:
+            log(f"Candle backfill failed for {symbol}: {e}", "WARNING")
+    
+    # Sample after the backfill: closing the previous sampled bar then only fills an interval
+    # the exchange did not return, it never shadows the exchange's OHLC for it
+    if CANDLE_WRITER and mid is not None:
+        try:
+            series.record(int(time.time() * 1000), mid)
+        except Exception as e:
+            log(f"Error recording candles: {e}", "WARNING")
+    
+    # Zero-copy views over the memory-mapped columns
+    bars = series.window(limit, columns=("ts", "close"))
+    if since is not None and len(bars["ts"]) and bars["ts"][0] > since:
+        # More bars arrived since `since` than the window holds (downtime + backfill): return all of them
+        import numpy as np
+        bars = series.window(None, columns=("ts", "close"))
+        start = int(np.searchsorted(bars["ts"], since, side="right"))
+        bars = {column: values[start:] for column, values in bars.items()}
+    return {
+        'timestamp': bars['ts'],
+        'close': bars['close']
     }
-    df = pd.DataFrame(data)
-    return df
 
-def calculate_rsi(df, window=14):
-    """Calculate RSI using the 'ta' library."""
-    if len(df) < window:
-        return None
-    rsi = ta.momentum.RSIIndicator(df['close'], window=window).rsi()
-    return rsi.iloc[-1]
+def calculate_rsi(data, window=14, symbol=None):
+    """Calculate RSI incrementally (same smoothing as ta's RSIIndicator)."""
+    if symbol is None or window != RSI_ENGINE.window:
+        # Stateless: recompute over the given window
+        if len(data['close']) < window:
+            return None
+        return compute_rsi(data['close'], window)
+    # Stateful: only bars newer than the last seen one are fed, O(1) per new bar
+    return RSI_ENGINE.update_series(symbol, data['timestamp'], data['close'])
 
-def get_live_price(info, symbol):
-    """Get live price from Hyperliquid"""
+def get_live_price(snapshot, symbol):
+    """Get live price from the shared market snapshot (refreshed once per cycle, not here)"""
     try:
-        # Get all mids (current prices)
-        all_mids = info.all_mids()
-        
-        # Find the symbol
-        if symbol in all_mids:
-            price = float(all_mids[symbol])
-            
-            # Get 24h stats
-            meta = info.meta()
-            universe = meta.get("universe", [])
-            
-            # Find symbol in universe
-            symbol_data = None
-            for asset in universe:
-                if asset.get("name") == symbol:
-                    symbol_data = asset
-                    break
-            
-            if symbol_data:
-                # Get funding rate as proxy for 24h change (Hyperliquid doesn't provide 24h change directly)
-                funding = symbol_data.get("funding", "0")
-                
-                return {
-                    "symbol": symbol,
-                    "price": price,
-                    "change_24h": float(funding) * 100,  # Approximate
-                    "volume": 0,  # Not easily available
-                    "high_24h": price * 1.02,  # Estimate
-                    "low_24h": price * 0.98   # Estimate
-                }
-            else:
-                return {
-                    "symbol": symbol,
-                    "price": price,
-                    "change_24h": 0,
-                    "volume": 0,
-                    "high_24h": price,
-                    "low_24h": price
-                }
-        else:
+        price_data = snapshot.get_price(symbol)
+        if price_data is None:
             log(f"Symbol {symbol} not found in market data", "ERROR")
-            return None
-            
+        return price_data
+        
     except Exception as e:
         log(f"Error fetching price for {symbol}: {e}", "ERROR")
         return None
@@ -178,22 +288,17 @@ def detect_trend(price_data):
     if not price_data:
         return "UNKNOWN"
     
-    change = price_data["change_24h"]
-    
-    if change > 2.0:
-        return "BULLISH"
-    elif change < -2.0:
-        return "BEARISH"
-    else:
-        return "SIDEWAYS"
+    return trend_from_change(price_data["change_24h"])
 
 def ai_analysis(pair, price_data, trend, trade_history, rsi_value):
     """AI-powered trading decision"""
+    # Same pair, trend, RSI band and recent history -> reuse the previous answer
+    cache_key = decision_key(pair, trend, rsi_value, trade_history, model=AI_MODEL)
+    cached = DECISION_CACHE.get(cache_key)
+    if cached:
+        return cached
+    
     try:
-        client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
         # Formatta la cronologia degli ultimi 5 trade per l'AI
         recent_trades = trade_history[-5:]
         history_text = "Nessun trade precedente registrato."
@@ -201,7 +306,7 @@ def ai_analysis(pair, price_data, trend, trade_history, rsi_value):
             history_text = "Cronologia degli ultimi trade (dal più vecchio al più recente):\n"
             for trade in recent_trades:
                 history_text += f"- {trade['timestamp'][:10]} {trade['pair']} {trade['action']} @ ${trade['price']:.2f} (Conf: {trade['confidence']:.1f}%) - Ragione: {trade['reasoning']}\n"
-             prompt = f"""
+        prompt = f"""
 Analizza i seguenti dati di mercato e la cronologia dei trade. Fornisci una raccomandazione di trading (BUY o HOLD) e una confidenza (0-100%).
 
 **Dati di Mercato:**
@@ -224,8 +329,9 @@ Analizza i seguenti dati di mercato e la cronologia dei trade. Fornisci una racc
 
 Fornisci SOLO la risposta nel formato JSON valido contenente \'action\' (BUY/HOLD), \'confidence\' (0-100%) e \'reasoning\' (spiegazione dettagliata della decisione basata sui dati e le regole).
 """
-        response = client.chat.completions.create(
-            model="gemini-1.5-flash", # Aggiornato al modello più recente e performante
+        # Shared pooled client: per-request timeout, retries, in-flight limit
+        response = chat_completion(
+            model=AI_MODEL,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=150,
             temperature=0.3
@@ -239,11 +345,13 @@ Fornisci SOLO la risposta nel formato JSON valido contenente \'action\' (BUY/HOL
             confidence = float(parts[1].strip().replace("%", ""))
             reasoning = parts[2].strip()
             
-            return {
+            decision = {
                 "action": action,
                 "confidence": confidence,
                 "reasoning": reasoning
             }
+            DECISION_CACHE.put(cache_key, decision)
+            return decision
         else:
             log(f"AI response format invalid: {result}", "WARNING")
             return None
@@ -252,14 +360,147 @@ Fornisci SOLO la risposta nel formato JSON valido contenente \'action\' (BUY/HOL
         log(f"AI analysis error: {e}", "ERROR")
         return None
 
-def execute_cycle():
-    """Execute one trading cycle"""
+def analyze_pair(snapshot, pair, trade_history, price_data):
+    """Run the independent analysis stages for one pair: trend, RSI, AI"""
+    result = {"pair": pair, "price_data": None, "trend": None, "rsi": None, "analysis": None}
+    started = time.monotonic()
+    try:
+        if not price_data:
+            log(f"Symbol {pair} not found in market data", "ERROR")
+            return result
+        result["price_data"] = price_data
+        result["trend"] = detect_trend(price_data)
+        
+        with span("candles", pair):
+            # Every bar the incremental RSI has not seen yet, not only the last 14
+            historical_data = get_historical_data(snapshot.info, pair, mid=price_data["price"],
+                                                  since=RSI_ENGINE.last_ts(pair))
+        with span("rsi", pair):
+            result["rsi"] = calculate_rsi(historical_data, symbol=pair)
+        if result["rsi"] is None:
+            return result
+        
+        with span("ai", pair):
+            result["analysis"] = ai_analysis(pair, price_data, result["trend"], trade_history, result["rsi"])
+    except Exception as e:
+        log(f"Analysis error for {pair}: {e}", "ERROR")
+    result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+def analyze_pairs(snapshot, pairs, trade_history):
+    """Analyze all pairs on a bounded thread pool, results in input order"""
+    if not pairs:
+        return []
+    # Workers only read the history; no trade is recorded until all results are in
+    recent_history = list(trade_history[-5:])
+    fields = LOGGER.bound()  # carry cycle_id into the pool threads
+    # Every pair is priced from the same mids, even if the snapshot is refreshed while the pool runs
+    with span("price"):
+        prices = snapshot.get_prices(pairs)
+    
+    def run(pair):
+        with LOGGER.context(pair=pair, **fields):
+            return analyze_pair(snapshot, pair, recent_history, prices[pair])
+    
+    return list(get_analysis_pool().map(run, pairs))
+
+def get_analysis_pool():
+    """Process-wide bounded pool for per-pair analysis"""
+    global _analysis_pool
+    with _state_locks_guard:
+        if _analysis_pool is None:
+            _analysis_pool = ThreadPoolExecutor(max_workers=max(1, ANALYSIS_WORKERS), thread_name_prefix="analysis")
+        return _analysis_pool
+
+def state_lock(wallet_name):
+    """Lock guarding one wallet's state"""
+    with _state_locks_guard:
+        lock = _state_locks.get(wallet_name)
+        if lock is None:
+            lock = _state_locks[wallet_name] = threading.RLock()
+        return lock
+
+def check_open_position(config, snapshot, state=None):
+    """Evaluate exit rules for the open position at the snapshot price; returns the exit trade if closed"""
+    with state_lock(config["wallet_name"]):
+        if state is None:
+            state = load_state(config)
+        position = state.get("open_position")
+        if not position:
+            return None
+        price_data = snapshot.get_price(position["pair"])
+        if not price_data:
+            return None
+        
+        price = price_data["price"]
+        reason = evaluate_exit(position, price, state, config)
+        if reason is None:
+            return None
+        
+        trade = close_position(state, price, reason)
+        record_trade(state[PERFORMANCE_KEY], trade)
+        TRADES.inc(wallet=config["wallet_name"], action=trade["action"])
+        log(f"🔚 Position closed ({reason}): {trade['pair']} @ ${price:,.2f} - "
+            f"PnL ${trade['pnl']:+,.2f} ({trade['pnl_pct']:+.2f}%)",
+            pair=trade["pair"], exit_reason=reason, pnl=trade["pnl"])
+        log(f"💰 Capital: ${state['current_capital']:,.2f}")
+        if reason == "emergency_stop":
+            log(f"🛑 EMERGENCY STOP: equity fell {config.get('emergency_stop_loss_pct')}% below initial capital "
+                f"- trading halted", "ERROR")
+        save_state(state)
+        return trade
+
+def watch_open_position(config, snapshot):
+    """Position watcher tick: refresh mids and evaluate exits while a position is open"""
+    state = load_state(config)
+    if not state.get("open_position"):
+        return None
+    snapshot.refresh_mids(POSITION_CHECK_INTERVAL)
+    return check_open_position(config, snapshot)
+
+def execute_cycle(config=None, snapshot=None):
+    """Execute one trading cycle (config and market snapshot are reused when given); returns its outcome"""
+    if config is None:
+        config = load_config()
+    wallet = config["wallet_name"]
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        # Held for the whole cycle: the position watcher mutates the same state object
+        with state_lock(wallet), PROFILER.profile(wallet):
+            outcome = _execute_cycle(config, snapshot)
+        return outcome
+    finally:
+        CYCLES.inc(wallet=wallet, outcome=outcome)
+        CYCLE_SECONDS.observe(time.perf_counter() - started, wallet=wallet)
+        write_metrics()
+
+def write_metrics():
+    """Dump this process's metrics for api_server /metrics"""
+    try:
+        REGISTRY.write(METRICS_FILE)
+    except Exception as e:
+        log(f"Error writing metrics: {e}", "WARNING")
+
+def daily_limit_reached(state, config):
+    """True (logged, state saved) when today's trade limit is used up"""
+    if state["daily_trades"] < config.get("max_daily_trades", 12):
+        return False
+    log(f"⏸️  Daily trade limit reached: {state['daily_trades']}/{config['max_daily_trades']}")
+    save_state(state)
+    return True
+
+def _execute_cycle(config, snapshot):
+    """Cycle body (caller holds the wallet's state lock); returns the cycle outcome"""
+    LOGGER.bind(cycle_id=uuid.uuid4().hex[:12], wallet=config["wallet_name"], pair=None)
     log("=" * 80)
     log("🔄 CYCLE START - Hyperliquid Testnet")
     log("=" * 80)
     
-    config = load_config()
-    state = load_state(config)
+    wallet = config["wallet_name"]
+    with span("state_load"):
+        state = load_state(config)
+    cache_stats = DECISION_CACHE.stats()
     
     # Reset daily counter if new day
     today = datetime.now().strftime("%Y-%m-%d")
@@ -268,144 +509,184 @@ def execute_cycle():
         state["last_trade_date"] = today
         log(f"📅 New day: {today} - Daily counter reset")
     
-    # Check daily limit
-    if state["daily_trades"] >= config.get("max_daily_trades", 12):
-        log(f"⏸️  Daily trade limit reached: {state['daily_trades']}/{config['max_daily_trades']}")
+    if state.get("emergency_stop"):
+        log("🛑 Emergency stop active - no new trades (set emergency_stop to false in the state to resume)", "ERROR")
         save_state(state)
-        return
+        return "emergency_stop"
     
-    # Check if position open
-    if state.get("open_position"):
-        log("📊 Open position detected - checking exit conditions")
-        # In production, implement position monitoring
-        # For now, just log
-        save_state(state)
-        return
+    # Nothing to exit and no trade allowed: skip the exchange entirely
+    if not state.get("open_position") and daily_limit_reached(state, config):
+        return "daily_limit"
     
     # Initialize Hyperliquid clients
+    if snapshot is None:
+        try:
+            with span("connect"):
+                snapshot = MarketSnapshot(get_hyperliquid_info(testnet=True), ttl=MARKET_SNAPSHOT_TTL)
+            log("✅ Connected to Hyperliquid Testnet")
+        except Exception as e:
+            log(f"❌ Failed to connect to Hyperliquid: {e}", "ERROR")
+            return "connect_failed"
+    
+    # One all_mids/meta fetch serves every pair of this cycle
     try:
-        info = get_hyperliquid_info(testnet=True)
-        log("✅ Connected to Hyperliquid Testnet")
+        with span("market_snapshot"):
+            snapshot.refresh()
     except Exception as e:
-        log(f"❌ Failed to connect to Hyperliquid: {e}", "ERROR")
-        return
+        log(f"❌ Failed to fetch market snapshot: {e}", "ERROR")
+        return "market_data_failed"
+    
+    # Check if position open (the daemon's watcher also checks it between cycles)
+    if state.get("open_position"):
+        log("📊 Open position detected - checking exit conditions")
+        with span("position_check"):
+            exit_trade = check_open_position(config, snapshot, state)
+        if exit_trade is None:
+            position = state["open_position"]
+            price_data = snapshot.get_price(position["pair"])
+            if price_data:
+                pnl = unrealized_pnl(position, price_data["price"])
+                log(f"⏳ Holding {position['pair']} since {position['opened_at'][:16]} - "
+                    f"unrealized PnL ${pnl:+,.2f}")
+            save_state(state)
+            return "position_open"
+        if state.get("emergency_stop"):
+            return "emergency_stop"
+    
+    # Check daily limit
+    if daily_limit_reached(state, config):
+        return "daily_limit"
     
-    # Analyze each pair
+    # Analyze each pair concurrently; rules are applied below in config order
     pairs = config.get("trading_pairs", ["BTC", "ETH", "SOL"])
     
-    for pair in pairs:
-        log(f"\n--- Analyzing {pair} ---")
-        
-        # Get live price
-        price_data = get_live_price(info, pair)
-        if not price_data:
-            log(f"❌ Failed to get price for {pair}")
-            continue
-        
-        log(f"💰 Price: ${price_data['price']:,.2f} ({price_data['change_24h']:+.2f}% 24h)")
-        
-        # Detect trend
-        trend = detect_trend(price_data)
-        log(f"📈 Trend: {trend}")
-        
-        # Technical Analysis (RSI)
-        historical_data = get_historical_data(info, pair)
-        rsi_value = calculate_rsi(historical_data)
-        
-        if rsi_value is None:
-            log(f"⚠️ Insufficient historical data for RSI on {pair} - skipping.", "WARNING")
-            continue
+    results = analyze_pairs(snapshot, pairs, state["trade_history"])
+    
+    for result in results:
+        pair = result["pair"]
+        with span("decision", pair):
+            LOGGER.bind(pair=pair)
+            log(f"\n--- Analyzing {pair} ---")
             
-        log(f"📊 RSI (14): {rsi_value:.2f}")
-        
-        # AI analysis with RSI and Sentiment
-        analysis = ai_analysis(pair, price_data, trend, state["trade_history"], rsi_value)
-        if not analysis:
-            log(f"❌ AI analysis failed for {pair}")
-            continue
-        
-        log(f"🤖 AI Recommendation: {analysis['action']} (Confidence: {analysis['confidence']:.1f}%)")
-        log(f"💭 Reasoning: {analysis['reasoning']}")
-        
-        # Check if should trade
-        min_confidence = config.get("min_confidence", 60.0)
-        
-        if analysis["action"] == "HOLD":
-            log(f"⏸️  AI recommends HOLD - skipping")
-            continue
-        
-        if analysis["confidence"] < min_confidence:
-            log(f"⚠️  Confidence {analysis['confidence']:.1f}% < {min_confidence}% threshold - skipping")
-            state["low_confidence_skipped"] += 1
-            continue
-        
-        # Bear market filter
-        if trend == "BEARISH" and analysis["action"] == "BUY":
-            log(f"🐻 Bear market detected - skipping BUY signal")
-            state["bear_market_skipped"] += 1
-            continue
-        
-        # Execute trade (simulated for testnet paper trading)
-        log(f"✅ TRADE SIGNAL: {analysis['action']} {pair}")
-        log(f"   Confidence: {analysis['confidence']:.1f}%")
-        log(f"   Price: ${price_data['price']:,.2f}")
-        log(f"   📝 NOTE: Testnet paper trading - no real funds at risk")
-        
-        # Calcola la dimensione della posizione (Position Sizing)
-        # Rischio massimo per trade: 1% del capitale corrente
-        risk_per_trade_pct = 0.01
-        
-        # Calcola la quantità di trade in USD (es. 1% del capitale)
-        trade_size_usd = state["current_capital"] * risk_per_trade_pct
-        
-        # Calcola la quantità in unità di criptovaluta
-        # Assumiamo che la dimensione della posizione sia in USD per semplicità
-        # In un bot reale, si userebbe la leva e il margine
-        quantity = trade_size_usd / price_data['price']
-        
-        # Arrotonda la quantità alla precisione supportata dall'exchange (qui simuliamo 4 decimali)
-        quantity = round(quantity, 4)
-        
-        if quantity * price_data['price'] < 1.0: # Minimo trade in USD
-            log(f"⚠️ Quantità calcolata troppo bassa ({quantity:.4f} {pair}) - trade saltato.", "WARNING")
-            continue
-        
-        # Esegui trade (simulato per testnet paper trading)
-        log(f"✅ TRADE SIGNAL: {analysis['action']} {pair}")
-        log(f"   Confidenza: {analysis['confidence']:.1f}%")
-        log(f"   Prezzo: ${price_data['price']:,.2f}")
-        log(f"   Dimensione Posizione (USD): ${trade_size_usd:,.2f}")
-        log(f"   Quantità ({pair}): {quantity:.4f}")
-        log(f"   📝 NOTE: Testnet paper trading - no real funds at risk")
-        
-        # Aggiorna stato
-        state["daily_trades"] += 1
-        state["total_trades"] += 1
-        
-        # Simula l'impatto sul capitale (per ora 0)
-        # In un bot reale, il capitale verrebbe aggiornato solo alla chiusura del trade
-        
-        # Registra trade
-        trade_record = {
-            "timestamp": datetime.now().isoformat(),
-            "pair": pair,
-            "action": analysis["action"],
-            "price": price_data['price'],
-            "quantity": quantity,
-            "trade_size_usd": trade_size_usd,
-            "confidence": analysis['confidence'],
-            "reasoning": analysis['reasoning'],
-            "trend": trend
-        }
-        state["trade_history"].append(trade_record)
-        
-        log(f"📊 Daily trades: {state['daily_trades']}/{config['max_daily_trades']}")
-        
-        # Save state
-        save_state(state)
-        
-        # Only one trade per cycle
-        break
+            # Get live price
+            price_data = result["price_data"]
+            if not price_data:
+                log(f"❌ Failed to get price for {pair}")
+                SIGNALS_SKIPPED.inc(wallet=wallet, reason="no_price")
+                continue
+            
+            log(f"💰 Price: ${price_data['price']:,.2f} ({price_data['change_24h']:+.2f}% 24h)")
+            
+            # Detect trend
+            trend = result["trend"]
+            log(f"📈 Trend: {trend}")
+            
+            # Technical Analysis (RSI)
+            rsi_value = result["rsi"]
+            
+            if rsi_value is None:
+                log(f"⚠️ Insufficient historical data for RSI on {pair} - skipping.", "WARNING")
+                SIGNALS_SKIPPED.inc(wallet=wallet, reason="no_rsi")
+                continue
+                
+            log(f"📊 RSI (14): {rsi_value:.2f}")
+            
+            # AI analysis with RSI and Sentiment
+            analysis = result["analysis"]
+            if not analysis:
+                log(f"❌ AI analysis failed for {pair}")
+                SIGNALS_SKIPPED.inc(wallet=wallet, reason="ai_failed")
+                continue
+            
+            log(f"🤖 AI Recommendation: {analysis['action']} (Confidence: {analysis['confidence']:.1f}%)",
+                action=analysis["action"], confidence=analysis["confidence"], latency_ms=result.get("latency_ms"))
+            log(f"💭 Reasoning: {analysis['reasoning']}")
+            
+            # Check if should trade
+            min_confidence = config.get("min_confidence", 60.0)
+            skip = signal_filter(analysis, trend, min_confidence)
+            if skip:
+                SIGNALS_SKIPPED.inc(wallet=wallet, reason=skip)
+            
+            if skip == "hold":
+                log(f"⏸️  AI recommends HOLD - skipping")
+                continue
+            
+            if skip == "low_confidence":
+                log(f"⚠️  Confidence {analysis['confidence']:.1f}% < {min_confidence}% threshold - skipping")
+                state["low_confidence_skipped"] += 1
+                continue
+            
+            # Bear market filter
+            if skip == "bear_market":
+                log(f"🐻 Bear market detected - skipping BUY signal")
+                state["bear_market_skipped"] += 1
+                continue
+            
+            # Execute trade (simulated for testnet paper trading)
+            log(f"✅ TRADE SIGNAL: {analysis['action']} {pair}")
+            log(f"   Confidence: {analysis['confidence']:.1f}%")
+            log(f"   Price: ${price_data['price']:,.2f}")
+            log(f"   📝 NOTE: Testnet paper trading - no real funds at risk")
+            
+            # Calcola la dimensione della posizione (Position Sizing)
+            # Rischio massimo per trade: 1% del capitale corrente
+            trade_size_usd = position_size_usd(state["current_capital"])
+            
+            # Calcola la quantità in unità di criptovaluta
+            # Assumiamo che la dimensione della posizione sia in USD per semplicità
+            # In un bot reale, si userebbe la leva e il margine
+            # Arrotondata alla precisione supportata dall'exchange (qui simuliamo 4 decimali)
+            quantity = order_quantity(trade_size_usd, price_data['price'])
+            
+            if quantity is None: # Minimo trade in USD
+                log(f"⚠️ Quantità calcolata troppo bassa ({trade_size_usd / price_data['price']:.4f} {pair}) - trade saltato.", "WARNING")
+                SIGNALS_SKIPPED.inc(wallet=wallet, reason="min_quantity")
+                continue
+            
+            # Esegui trade (simulato per testnet paper trading)
+            log(f"✅ TRADE SIGNAL: {analysis['action']} {pair}")
+            log(f"   Confidenza: {analysis['confidence']:.1f}%")
+            log(f"   Prezzo: ${price_data['price']:,.2f}")
+            log(f"   Dimensione Posizione (USD): ${trade_size_usd:,.2f}")
+            log(f"   Quantità ({pair}): {quantity:.4f}")
+            log(f"   📝 NOTE: Testnet paper trading - no real funds at risk")
+            
+            # Aggiorna stato
+            state["daily_trades"] += 1
+            state["total_trades"] += 1
+            
+            # Simula l'impatto sul capitale (per ora 0)
+            # In un bot reale, il capitale verrebbe aggiornato solo alla chiusura del trade
+            
+            # Registra trade
+            trade_record = {
+                "timestamp": datetime.now().isoformat(),
+                "pair": pair,
+                "action": analysis["action"],
+                "price": price_data['price'],
+                "quantity": quantity,
+                "trade_size_usd": trade_size_usd,
+                "confidence": analysis['confidence'],
+                "reasoning": analysis['reasoning'],
+                "trend": trend
+            }
+            state["trade_history"].append(trade_record)
+            record_trade(state[PERFORMANCE_KEY], trade_record)
+            TRADES.inc(wallet=wallet, action=analysis["action"])
+            if analysis["action"] == "BUY":
+                state["open_position"] = open_position(trade_record)
+                log(f"📌 Position opened: {pair} - TP +{config.get('take_profit_pct')}% / "
+                    f"SL -{config.get('stop_loss_pct')}% / max {config.get('max_holding_hours')}h")
+            
+            log(f"📊 Daily trades: {state['daily_trades']}/{config['max_daily_trades']}")
+            
+            # Save state
+            save_state(state)
+            
+            # Only one trade per cycle
+            break
+    LOGGER.bind(pair=None)
     
     log("\n" + "=" * 80)
     log("✅ CYCLE COMPLETE")
@@ -414,13 +695,166 @@ def execute_cycle():
     log(f"   Daily Trades: {state['daily_trades']}/{config['max_daily_trades']}")
     log(f"   Bear Market Skipped: {state['bear_market_skipped']}")
     log(f"   Low Confidence Skipped: {state['low_confidence_skipped']}")
+    llm_stats = get_llm_stats()
+    if llm_stats["requests"]:
+        log(f"   LLM: {llm_stats['requests']} requests, {llm_stats['errors']} errors "
+            f"({llm_stats['timeouts']} timeouts, {llm_stats['retries']} retries), "
+            f"avg {llm_stats['latency_avg']:.2f}s, max {llm_stats['latency_max']:.2f}s")
+    cache_now = DECISION_CACHE.stats()
+    log(f"   AI Cache: {cache_now['hits'] - cache_stats['hits']} hits / "
+        f"{cache_now['misses'] - cache_stats['misses']} misses ({cache_now['size']} entries)")
     log("=" * 80)
     
     # Save final state
     save_state(state)
+    try:
+        DECISION_CACHE.save()
+        RSI_ENGINE.save()
+    except Exception as e:
+        log(f"Error saving caches: {e}", "WARNING")
+    LOGGER.flush()
+    return "completed"
+
+def get_cycle_interval(config, override=None):
+    """Resolve cycle interval in seconds (CLI > CYCLE_INTERVAL env > config)"""
+    if override:
+        return float(override)
+    if CYCLE_INTERVAL:
+        return float(CYCLE_INTERVAL)
+    return float(config.get("cycle_interval_hours", 1)) * 3600
+
+# Signal handlers only set events: log() and PROFILER.arm() take locks the interrupted thread may hold
+def _handle_shutdown(signum, frame):
+    """Signal handler: stop the daemon after the current cycle"""
+    global SHUTDOWN_SIGNAL
+    SHUTDOWN_SIGNAL = signum
+    SHUTDOWN_EVENT.set()
+
+def _handle_reload(signum, frame):
+    """Signal handler: reload config before the next cycle"""
+    RELOAD_EVENT.set()
+
+def _handle_profile(signum, frame):
+    """Signal handler: profile the next cycles"""
+    PROFILE_EVENT.set()
+
+def request_profile():
+    """Profile the next PROFILE_CYCLES cycles (3 when unset); call between cycles, not from a signal handler"""
+    PROFILER.arm(PROFILE_CYCLES or 3)
+
+def log_shutdown_signal():
+    """Log the signal that stopped the loop (if any)"""
+    if SHUTDOWN_SIGNAL is not None:
+        log(f"🛑 {signal.Signals(SHUTDOWN_SIGNAL).name} received - shutting down")
+
+def install_signal_handlers():
+    """Install daemon signal handlers"""
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, _handle_reload)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _handle_profile)
+
+def run_daemon(interval=None, max_cycles=None):
+    """Run trading cycles in-process until a shutdown signal is received"""
+    install_signal_handlers()
+    LOGGER.start_writer()
+    
+    config = load_config()
+    cycle_interval = get_cycle_interval(config, interval)
+    snapshot = None
+    cycles = 0
+    
+    # Exits are checked between cycles on the watcher thread (it reads the current config/snapshot)
+    watched = {"config": config, "snapshot": None}
+    
+    def watch_tick():
+        if watched["snapshot"] is not None:
+            watch_open_position(watched["config"], watched["snapshot"])
+    
+    feed, bus = None, None
+    if MARKET_FEED == "ws":
+        feed, bus = start_market_feed(config.get("trading_pairs", []))
+    
+    watcher = None
+    if POSITION_CHECK_INTERVAL > 0:
+        watcher = PositionWatcher(watch_tick, interval=POSITION_CHECK_INTERVAL,
+                                  on_error=lambda e: log(f"Position watcher error: {e}", "WARNING")).start()
+    
+    log(f"🕒 Daemon mode: cycle every {cycle_interval:.0f}s")
+    
+    next_run = time.monotonic()
+    while not SHUTDOWN_EVENT.is_set():
+        if PROFILE_EVENT.is_set():
+            PROFILE_EVENT.clear()
+            request_profile()
+        if RELOAD_EVENT.is_set():
+            RELOAD_EVENT.clear()
+            new_config = load_config(exit_on_error=False)
+            if new_config:
+                config = new_config
+                cycle_interval = get_cycle_interval(config, interval)
+                log(f"🔁 Config reloaded - cycle every {cycle_interval:.0f}s")
+            else:
+                log("⚠️  Config reload failed - keeping previous config", "WARNING")
+        
+        # Connect once and reuse the client; reconnect only after a failure
+        if snapshot is None:
+            try:
+                with span("connect"):
+                    snapshot = MarketSnapshot(get_hyperliquid_info(testnet=True), ttl=MARKET_SNAPSHOT_TTL, bus=bus)
+                log("✅ Connected to Hyperliquid Testnet (client reused across cycles)")
+            except Exception as e:
+                log(f"❌ Failed to connect to Hyperliquid: {e}", "ERROR")
+        watched.update(config=config, snapshot=snapshot)
+        
+        started = time.monotonic()
+        if snapshot is not None:
+            try:
+                execute_cycle(config=config, snapshot=snapshot)
+            except Exception as e:
+                import traceback
+                log(f"❌ Cycle error: {e}", "ERROR")
+                log(traceback.format_exc(), "ERROR")
+                snapshot = None
+        cycles += 1
+        now = time.monotonic()
+        log(f"⏱️  Cycle {cycles} took {now - started:.2f}s", latency_ms=round((now - started) * 1000, 1))
+        
+        if max_cycles and cycles >= max_cycles:
+            break
+        
+        # Keep a fixed cadence; skip slots missed by a slow cycle
+        next_run += cycle_interval
+        if next_run < now:
+            next_run = now + cycle_interval
+        SHUTDOWN_EVENT.wait(next_run - now)
+    
+    log_shutdown_signal()
+    if watcher is not None:
+        watcher.stop()
+    if feed is not None:
+        feed.stop()
+    checkpoint_all()
+    log(f"👋 Daemon stopped after {cycles} cycles")
+    LOGGER.close()
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AurumBotX Hyperliquid Testnet Wallet Runner")
+    parser.add_argument("config", nargs="?", default=CONFIG_FILE, help="Config file path")
+    parser.add_argument("--daemon", action="store_true", help="Stay resident and run cycles on a schedule")
+    parser.add_argument("--interval", type=float, default=None, help="Cycle interval in seconds (daemon mode)")
+    parser.add_argument("--max-cycles", type=int, default=None, help="Stop after N cycles (daemon mode)")
+    return parser.parse_args(argv)
 
 def main():
     """Main entry point"""
+    global CONFIG_FILE
+    args = parse_args()
+    CONFIG_FILE = args.config
+    
     try:
         log("🚀 AurumBotX Hyperliquid Testnet Wallet Runner v4.1")
         log(f"📁 Config: {CONFIG_FILE}")
@@ -429,7 +863,11 @@ def main():
         log(f"🌐 Network: Hyperliquid Testnet")
         log(f"💰 Paper Trading: YES (No real funds at risk)")
         
-        execute_cycle()
+        if args.daemon:
+            run_daemon(interval=args.interval, max_cycles=args.max_cycles)
+        else:
+            execute_cycle()
+            checkpoint_all()
         
         log("✅ Execution completed successfully")
         sys.exit(0)
@@ -0,0 +1,96 @@
+"""
+Test setup for AurumBotX-v4
+The bot modules are flat modules in src/; state, logs and caches of the
+runner go to a temporary directory, FakeInfo stands in for the exchange and
+synthetic trade histories feed the state and pagination tests
+"""
+
+import math
+import os
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Read by the runner at import time: never touch ./hyperliquid_trading or ./logs from the tests
+_TEST_DIR = tempfile.mkdtemp(prefix="aurumbot-tests-")
+os.environ["STATE_DIR"] = os.path.join(_TEST_DIR, "state")
+os.environ["LOG_DIR"] = os.path.join(_TEST_DIR, "logs")
+os.environ["DECISION_CACHE_FILE"] = ""
+for name in ("CALL_RECORD_FILE", "CALL_REPLAY_FILE", "MARKET_FEED", "MARKET_FEED_REPLAY", "PROFILE_CYCLES"):
+    os.environ.pop(name, None)
+
+HOUR_MS = 3_600_000
+PRICES = {"BTC": 87000.0, "ETH": 3100.0, "SOL": 150.0}
+PAIRS = tuple(PRICES)
+
+
+class FakeInfo:
+    """Offline hyperliquid.info.Info: fixed mids and meta, hourly candles, REST calls counted"""
+
+    def __init__(self, mids=None):
+        self.mids = {name: str(price) for name, price in (mids or PRICES).items()}
+        self.calls = Counter()
+
+    def all_mids(self):
+        self.calls["all_mids"] += 1
+        return dict(self.mids)
+
+    def meta(self):
+        self.calls["meta"] += 1
+        return {"universe": [{"name": name, "szDecimals": 4, "funding": "0.0001"} for name in self.mids]}
+
+    def candles_snapshot(self, name, interval, start_time, end_time):
+        self.calls["candles_snapshot"] += 1
+        base = float(self.mids.get(name, 100.0))
+        candles = []
+        for t in range(-(-start_time // HOUR_MS) * HOUR_MS, end_time, HOUR_MS):
+            close = str(base * (1 + 0.01 * math.sin(t / HOUR_MS / 3)))
+            candles.append({"t": t, "T": t + HOUR_MS - 1, "s": name, "i": interval,
+                            "o": close, "h": close, "l": close, "c": close, "v": "1.0", "n": 1})
+        return candles
+
+
+@pytest.fixture
+def fake_info():
+    return FakeInfo()
+
+
+def synthetic_trades(count, start=datetime(2024, 1, 1), hours=6):
+    """Alternating BUY / closing SELL records, one every `hours` hours"""
+    trades = []
+    for i in range(count):
+        trade = {"timestamp": (start + timedelta(hours=hours * i)).isoformat(), "pair": PAIRS[i // 2 % 3],
+                 "action": "BUY" if i % 2 == 0 else "SELL", "price": 100.0 + i % 50, "quantity": 0.1,
+                 "trade_size_usd": 10.0, "confidence": 70.0, "reasoning": "test", "trend": "SIDEWAYS"}
+        if i % 2:
+            pnl = (i % 7 - 3) * 0.1
+            trade.update(pnl=pnl, pnl_pct=pnl * 10, result="won" if pnl > 0 else "lost", exit_reason="take_profit")
+        trades.append(trade)
+    return trades
+
+
+def synthetic_state(wallet, trades):
+    """Wallet state as the runner builds it, with aggregates for `trades`"""
+    from performance import build_performance
+    return {
+        "wallet_name": wallet, "initial_capital": 10000.0, "current_capital": 10000.0,
+        "current_level": "TURTLE", "total_trades": len(trades), "winning_trades": 0, "losing_trades": 0,
+        "trade_history": trades, "open_position": None, "daily_trades": 0, "last_trade_date": None,
+        "bear_market_skipped": 0, "low_confidence_skipped": 0, "performance": build_performance(trades),
+        "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"
+    }
+
+
+@pytest.fixture
+def make_trades():
+    return synthetic_trades
+
+
+@pytest.fixture
+def make_state():
+    return synthetic_state
@@ -0,0 +1,136 @@
+"""
+Tests for the API server response cache (ETag / 304 revalidation) and the
+trade pages served from SQLite
+"""
+
+import json
+import os
+
+import pytest
+
+import api_server
+import state_store
+from state_store import StateStore
+from trade_db import SQLiteStateStore
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Flask test client serving the state of wallet "w" from tmp_path (journal backend)"""
+    monkeypatch.setattr(api_server, "STATE_FILE", tmp_path / "w_state.json")
+    monkeypatch.setattr(api_server, "CONFIG_FILE", tmp_path / "w.json")
+    monkeypatch.setattr(api_server, "WALLET_NAME", "w")
+    monkeypatch.setattr(state_store, "STATE_BACKEND", "journal")
+    monkeypatch.setattr(state_store, "_stores", {})
+    monkeypatch.setattr(state_store, "_dbs", {})
+    api_server._response_cache.clear()
+    yield api_server.app.test_client()
+    api_server._response_cache.clear()
+
+
+@pytest.fixture
+def sqlite_api(api, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_BACKEND", "sqlite")
+    return api
+
+
+def test_etag_revalidation(api, tmp_path, make_trades, make_state):
+    trades = make_trades(30)
+    state = make_state("w", trades[:20])
+    runner = StateStore(tmp_path / "w_state.json")  # the bot process writing the state
+    runner.save(state)
+
+    first = api.get("/api/bot/trades?per_page=10")
+    assert first.status_code == 200
+    assert first.json["total"] == 20
+    etag = first.headers["ETag"]
+
+    revalidated = api.get("/api/bot/trades?per_page=10", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+    state["trade_history"].extend(trades[20:])
+    runner.save(state)
+    changed = api.get("/api/bot/trades?per_page=10", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json["total"] == 30
+
+
+def test_etag_depends_on_the_request(api, tmp_path, make_trades, make_state):
+    StateStore(tmp_path / "w_state.json").save(make_state("w", make_trades(30)))
+    first = api.get("/api/bot/trades?page=1&per_page=10")
+    second = api.get("/api/bot/trades?page=2&per_page=10", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json["trades"] == make_trades(30)[10:20]
+
+
+def test_missing_state_is_not_cached(api, tmp_path, make_trades, make_state):
+    assert api.get("/api/bot/trades").status_code == 404
+    StateStore(tmp_path / "w_state.json").save(make_state("w", make_trades(5)))
+    assert api.get("/api/bot/trades").status_code == 200
+
+
+def test_config_is_reparsed_only_when_the_file_changes(api, tmp_path):
+    path = tmp_path / "w.json"
+    path.write_text(json.dumps({"min_confidence": 60}))
+    first = api_server.load_config()
+    assert api_server.load_config() is first
+
+    path.write_text(json.dumps({"min_confidence": 65, "max_daily_trades": 12}))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert api_server.load_config() == {"min_confidence": 65, "max_daily_trades": 12}
+
+
+def test_status_revalidates_on_config_change(api, tmp_path, make_trades, make_state):
+    path = tmp_path / "w.json"
+    path.write_text(json.dumps({"min_confidence": 60}))
+    StateStore(tmp_path / "w_state.json").save(make_state("w", make_trades(5)))
+    etag = api.get("/api/bot/status").headers["ETag"]
+    assert api.get("/api/bot/status", headers={"If-None-Match": etag}).status_code == 304
+
+    path.write_text(json.dumps({"min_confidence": 70}))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    changed = api.get("/api/bot/status", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json["config"] == {"min_confidence": 70}
+
+
+def test_sqlite_pages_use_the_stored_trade_count(sqlite_api, tmp_path, monkeypatch, make_trades, make_state):
+    db = state_store.get_trade_db(str(tmp_path))
+    SQLiteStateStore(db, "w").save(make_state("w", make_trades(95)))
+    monkeypatch.setattr(db, "count_trades", lambda *args, **kwargs: pytest.fail("COUNT(*) on an unfiltered page"))
+
+    page = sqlite_api.get("/api/bot/trades?page=2&per_page=40").json
+    assert page["trades"] == make_trades(95)[40:80]
+    assert (page["total"], page["pages"], page["next_after"]) == (95, 3, 79)
+
+    cursor = sqlite_api.get("/api/bot/trades?after=79&per_page=40").json
+    assert cursor["trades"] == make_trades(95)[80:]
+    assert (cursor["total"], cursor["next_after"]) == (95, None)
+
+
+def test_sqlite_filtered_total_on_first_page_only(sqlite_api, tmp_path, monkeypatch, make_trades, make_state):
+    db = state_store.get_trade_db(str(tmp_path))
+    SQLiteStateStore(db, "w").save(make_state("w", make_trades(95)))
+    counts = []
+    count_trades = db.count_trades
+    monkeypatch.setattr(db, "count_trades", lambda *args, **kwargs: counts.append(1) or count_trades(*args, **kwargs))
+    sells = [trade for trade in make_trades(95) if trade["action"] == "SELL"]
+
+    first = sqlite_api.get("/api/bot/trades?action=SELL&per_page=20").json
+    assert first["trades"] == sells[:20]
+    assert (first["total"], first["pages"]) == (len(sells), 3)
+    assert len(counts) == 1
+
+    following = sqlite_api.get(f"/api/bot/trades?action=SELL&per_page=20&after={first['next_after']}").json
+    assert following["trades"] == sells[20:40]
+    assert (following["total"], following["pages"]) == (None, None)
+    assert len(counts) == 1
+
+
+def test_sqlite_trade_detail(sqlite_api, tmp_path, make_trades, make_state):
+    db = state_store.get_trade_db(str(tmp_path))
+    SQLiteStateStore(db, "w").save(make_state("w", make_trades(10)))
+    assert sqlite_api.get("/api/bot/trades/3").json == make_trades(10)[3]
+    assert sqlite_api.get("/api/bot/trades/10").status_code == 404
@@ -0,0 +1,167 @@
+"""
+Tests for the offline backtest on synthetic hourly candles: entries,
+watcher exits, position sizing and empty windows
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backtest import Backtest, MarketData, _iso, format_report
+from candle_store import CandleStore
+
+HOUR_MS = 3_600_000
+START = int(datetime(2024, 3, 1).timestamp() * 1000)
+SIGNAL = 30  # first bars are RSI / 24h change warm-up
+
+CONFIG = {"initial_capital": 10000.0, "min_confidence": 60.0, "take_profit_pct": 8.0, "stop_loss_pct": 2.0,
+          "max_daily_trades": 12, "cycle_interval_hours": 1}
+LEVELS = {"position_sizing": {"TURTLE": 0.05, "RABBIT": 0.1},
+          "level_thresholds": {"RABBIT": 20000}}
+
+
+class ScriptedDecider:
+    """BUY with the given confidence at chosen bars"""
+
+    name = "scripted"
+
+    def __init__(self, signals):
+        self.signals = signals  # {bar: confidence}
+
+    def decide(self, pair, ts, close, change_24h, rsi):
+        buy = np.zeros(len(ts), dtype=bool)
+        confidence = np.zeros(len(ts))
+        for bar, value in self.signals.items():
+            if bar < len(ts):
+                buy[bar] = True
+                confidence[bar] = value
+        return buy, confidence
+
+
+def candles(overrides=None, bars=60, price=100.0):
+    """Flat hourly BTC market; overrides maps bar -> {"open"/"high"/"low"/"close": price}"""
+    columns = {column: np.full(bars, price) for column in ("open", "high", "low", "close")}
+    for bar, values in (overrides or {}).items():
+        for column, value in values.items():
+            columns[column][bar] = value
+    columns["high"] = np.maximum.reduce([columns["high"], columns["open"], columns["close"]])
+    columns["low"] = np.minimum.reduce([columns["low"], columns["open"], columns["close"]])
+    ts = START + np.arange(bars, dtype=np.int64) * HOUR_MS
+    return MarketData(ts, ["BTC"], *(columns[column][None, :] for column in ("open", "high", "low", "close")), "1h")
+
+
+def backtest(market, signals=None, **config):
+    report = Backtest(market, ScriptedDecider(signals or {SIGNAL: 75.0})).run({**CONFIG, **config})
+    return report, report["trade_history"]
+
+
+def test_entry_at_the_signal_bar_close():
+    report, trades = backtest(candles(), {5: 90.0, SIGNAL: 75.0, 40: 50.0})
+    entry = trades[0]
+    assert (entry["action"], entry["pair"], entry["price"]) == ("BUY", "BTC", 100.0)
+    assert entry["timestamp"] == _iso(START + SIGNAL * HOUR_MS)
+    assert entry["trade_size_usd"] == 100.0 and entry["quantity"] == 1.0
+    assert report["low_confidence_skipped"] == 1  # bar 5 is still warming up
+    assert report["exits"] == {"end_of_data": 1}
+    assert report["trades"] == 1 and report["final_capital"] == 10000.0
+
+
+def test_bearish_signal_is_skipped():
+    report, trades = backtest(candles({bar: {"close": 90.0} for bar in range(SIGNAL, 60)}))
+    assert trades == []
+    assert report["bear_market_skipped"] == 1
+
+
+def test_take_profit_fills_at_the_level():
+    report, trades = backtest(candles({SIGNAL + 3: {"high": 109.0}}))
+    exit_trade = trades[1]
+    assert (exit_trade["exit_reason"], exit_trade["price"]) == ("take_profit", 108.0)
+    assert exit_trade["timestamp"] == _iso(START + (SIGNAL + 3) * HOUR_MS)
+    assert report["final_capital"] == pytest.approx(10008.0)
+    assert report["exits"] == {"take_profit": 1} and report["won"] == 1
+
+
+def test_stop_loss_fills_at_the_level_or_a_gapped_open():
+    _, trades = backtest(candles({SIGNAL + 3: {"low": 97.5}}))
+    assert (trades[1]["exit_reason"], trades[1]["price"]) == ("stop_loss", 98.0)
+
+    _, trades = backtest(candles({SIGNAL + 3: {"open": 95.0, "low": 94.0}}))
+    assert (trades[1]["exit_reason"], trades[1]["price"]) == ("stop_loss", 95.0)
+
+
+def test_first_level_hit_wins():
+    _, trades = backtest(candles({SIGNAL + 2: {"low": 97.0}, SIGNAL + 4: {"high": 110.0}}))
+    assert trades[1]["exit_reason"] == "stop_loss"
+
+
+def test_max_holding_fills_at_the_first_price_past_the_holding_time():
+    """Opened at the close of bar 30 with 5h max holding: the exit is the open of bar 36"""
+    crossing = SIGNAL + 6
+    market = candles({crossing - 1: {"close": 100.5}, crossing: {"open": 100.7, "close": 100.9}})
+    report, trades = backtest(market, max_holding_hours=5)
+    exit_trade = trades[1]
+    assert (exit_trade["exit_reason"], exit_trade["price"]) == ("max_holding_time", 100.7)
+    assert exit_trade["timestamp"] == _iso(START + crossing * HOUR_MS)
+    assert report["exits"] == {"max_holding_time": 1}
+
+
+def test_levels_are_checked_before_max_holding_at_the_crossing():
+    crossing = SIGNAL + 6
+    _, trades = backtest(candles({crossing: {"open": 97.0}}), max_holding_hours=5)
+    assert (trades[1]["exit_reason"], trades[1]["price"]) == ("stop_loss", 97.0)
+
+
+@pytest.mark.parametrize("bars, reason", [(SIGNAL + 6, "max_holding_time"), (SIGNAL + 5, "end_of_data")])
+def test_max_holding_at_the_end_of_the_data(bars, reason):
+    """The last bar closing at the holding time still exits on it; one bar less is end of data"""
+    report, trades = backtest(candles(bars=bars), max_holding_hours=5)
+    assert trades[1]["exit_reason"] == reason
+    assert trades[1]["timestamp"] == _iso(START + (bars - 1) * HOUR_MS)
+
+
+def test_trades_again_after_an_exit():
+    market = candles({SIGNAL + 3: {"high": 109.0}})
+    report, trades = backtest(market, {SIGNAL: 75.0, SIGNAL + 1: 75.0, SIGNAL + 5: 80.0})
+    assert [trade["action"] for trade in trades] == ["BUY", "SELL", "BUY", "SELL"]
+    assert trades[2]["timestamp"] == _iso(START + (SIGNAL + 5) * HOUR_MS)  # bar 31 fell inside the position
+
+
+def test_daily_limit():
+    signals = {SIGNAL + i: 75.0 for i in range(0, 12, 2)}
+    market = candles({SIGNAL + i + 1: {"high": 109.0} for i in range(0, 12, 2)})
+    report, trades = backtest(market, signals, max_daily_trades=2)
+    buys = [trade["timestamp"] for trade in trades if trade["action"] == "BUY"]
+    assert buys == [_iso(START + bar * HOUR_MS) for bar in (SIGNAL, SIGNAL + 2)]  # all signals on one day
+
+
+@pytest.mark.parametrize("sizing, size", [("fixed", 100.0), ("level", 500.0)])
+def test_position_sizing(sizing, size):
+    market = candles({SIGNAL + 3: {"high": 109.0}})
+    report = Backtest(market, ScriptedDecider({SIGNAL: 75.0})).run({**CONFIG, **LEVELS}, sizing=sizing)
+    assert report["trade_history"][0]["trade_size_usd"] == size
+    assert report["trade_history"][0]["level"] == "TURTLE"
+    assert report["final_capital"] == pytest.approx(10000.0 + size * 0.08)
+
+
+def test_empty_window():
+    empty = MarketData(np.empty(0, dtype=np.int64), ["BTC"], *(np.empty((1, 0)) for _ in range(4)), "1h")
+    report = Backtest(empty, ScriptedDecider({})).run(CONFIG)
+    assert (report["bars"], report["trades"], report["from"], report["exits"]) == (0, 0, None, {})
+    assert report["final_capital"] == report["initial_capital"]
+    assert report["max_drawdown_pct"] == 0.0
+    assert "0 bars" in format_report(report)
+
+
+def test_store_window_outside_the_data(tmp_path):
+    store = CandleStore(str(tmp_path))
+    market = candles(bars=48)
+    store.series("BTC", "1h").append({"ts": market.ts, "open": market.open[0], "high": market.high[0],
+                                      "low": market.low[0], "close": market.close[0], "volume": np.ones(48)})
+
+    assert len(MarketData.from_store(store, ["BTC", "ETH"], "1h")) == 48
+    late = MarketData.from_store(store, ["BTC"], "1h", start_ms=START + 100 * HOUR_MS)
+    assert len(late) == 0
+    assert Backtest(late, ScriptedDecider({})).run(CONFIG)["trades"] == 0
+    with pytest.raises(ValueError):
+        MarketData.from_store(store, ["ETH"], "1h")
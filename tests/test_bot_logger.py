@@ -0,0 +1,97 @@
+"""
+Tests for the buffered logger: batches reach the files in logging order,
+structured fields and size rotation
+"""
+
+import io
+import json
+import sys
+import threading
+from types import SimpleNamespace
+
+import bot_logger
+from bot_logger import BotLogger
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def messages(path):
+    return [line.split("] ", 2)[2] for line in read_lines(path)]
+
+
+def test_concurrent_flushes_keep_batches_in_order(tmp_path, monkeypatch):
+    """A flush stalled after taking its batch is not overtaken by a later flush"""
+    stalled = threading.Event()
+    release = threading.Event()
+    first = []
+
+    class Console(io.StringIO):
+        def flush(self):
+            if not first:
+                first.append(threading.current_thread())
+                stalled.set()
+                release.wait(5)
+
+    monkeypatch.setattr(bot_logger, "sys", SimpleNamespace(stdout=Console(), stderr=sys.stderr))
+    logger = BotLogger(str(tmp_path), "test", buffer_size=1000, flush_interval=3600, json_lines=False)
+    for i in range(3):
+        logger.log(f"batch1 {i}")
+    older = threading.Thread(target=logger.flush)
+    older.start()
+    assert stalled.wait(5)
+
+    for i in range(3):
+        logger.log(f"batch2 {i}")
+    newer = threading.Thread(target=logger.flush)
+    newer.start()
+    newer.join(0.2)  # with separate swap/write locks this flush would land first
+    release.set()
+    older.join(5)
+    newer.join(5)
+    logger.close()
+
+    (path,) = tmp_path.glob("*.log")
+    assert messages(path) == [f"batch1 {i}" for i in range(3)] + [f"batch2 {i}" for i in range(3)]
+
+
+def test_records_are_buffered_until_a_warning(tmp_path, capsys):
+    logger = BotLogger(str(tmp_path), "test", buffer_size=1000, flush_interval=3600)
+    logger.log("one")
+    assert list(tmp_path.glob("*.log")) == []
+    logger.log("two", "WARNING")
+    (path,) = tmp_path.glob("*.log")
+    assert messages(path) == ["one", "two"]
+    assert "[INFO] one" in capsys.readouterr().out
+    logger.close()
+
+
+def test_structured_fields(tmp_path, capsys):
+    logger = BotLogger(str(tmp_path), "test", buffer_size=1000, flush_interval=3600)
+    logger.bind(cycle_id="abc", wallet="w")
+    with logger.context(pair="BTC"):
+        logger.log("in pair", latency_ms=12.5)
+    logger.bind(wallet=None)
+    logger.log("after")
+    logger.close()
+
+    (path,) = tmp_path.glob("*.jsonl")
+    records = [json.loads(line) for line in read_lines(path)]
+    assert {key: records[0][key] for key in ("msg", "cycle_id", "wallet", "pair", "latency_ms")} == \
+        {"msg": "in pair", "cycle_id": "abc", "wallet": "w", "pair": "BTC", "latency_ms": 12.5}
+    assert records[1]["cycle_id"] == "abc" and "pair" not in records[1] and "wallet" not in records[1]
+
+
+def test_size_rotation(tmp_path, capsys):
+    logger = BotLogger(str(tmp_path), "test", buffer_size=1, max_bytes=200, backups=2, json_lines=False)
+    for i in range(31):  # ~80-byte lines: three per file, the last one left in the current file
+        logger.log(f"message {i:02d} " + "x" * 40)
+    logger.close()
+
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert len(names) == 3  # current file + 2 backups
+    assert any(name.endswith(".log.1") for name in names) and any(name.endswith(".log.2") for name in names)
+    (current,) = tmp_path.glob("*.log")
+    assert messages(current)[-1].startswith("message 30")
@@ -0,0 +1,148 @@
+"""
+Tests for recording Info / LLM calls and replaying them offline
+"""
+
+import json
+import time
+
+import pytest
+
+from call_recorder import CallHarness, CallReplayer, call_key, parse_latency, summarize
+
+
+class FakeInfo:
+    """Stands in for hyperliquid.info.Info"""
+
+    def __init__(self):
+        self.base_url = "https://api.hyperliquid-testnet.xyz"
+        self.fail = False
+
+    def all_mids(self):
+        if self.fail:
+            raise ConnectionError("testnet down")
+        return {"BTC": "87000.5"}
+
+    def meta(self):
+        return {"universe": [{"name": "BTC", "szDecimals": 5}]}
+
+    def candles_snapshot(self, name, interval, start_time, end_time):
+        return [{"t": start_time, "c": f"{name}-{interval}"}]
+
+
+class FakeCompletion:
+    """model_dump() like an OpenAI response"""
+
+    def __init__(self, content):
+        self.content = content
+
+    def model_dump(self, mode="json"):
+        return {"choices": [{"message": {"content": self.content}}], "usage": {"total_tokens": 42}}
+
+
+def create(**kwargs):
+    return FakeCompletion(f"answer to {kwargs['messages'][-1]['content']}")
+
+
+def chat(content):
+    return {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": content}]}
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Recording of a few Info and chat calls, one failed all_mids included"""
+    path = tmp_path / "calls.jsonl"
+    harness = CallHarness(record_file=str(path))
+    fake = FakeInfo()
+    info = harness.info(lambda: fake)
+    completion = harness.wrap_completion(create)
+
+    info.all_mids()
+    info.meta()
+    info.candles_snapshot("BTC", "1h", 1000, 2000)
+    info.candles_snapshot("ETH", "1h", 1000, 2000)
+    completion(**chat("BTC?"))
+    completion(**chat("ETH?"))
+    fake.fail = True
+    with pytest.raises(ConnectionError):
+        info.all_mids()
+    assert info.base_url == fake.base_url  # non-recorded attributes pass through
+    assert harness.recorder.count == 7
+    return path
+
+
+def test_recording_lines(recording):
+    with open(recording) as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["call"] for entry in entries] == \
+        ["all_mids", "meta", "candles_snapshot", "candles_snapshot", "chat", "chat", "all_mids"]
+    assert entries[2]["key"] == "BTC/1h"
+    assert entries[4]["response"]["choices"][0]["message"]["content"] == "answer to BTC?"
+    assert entries[6]["error"] == "ConnectionError: testnet down"
+    assert all(entry["latency"] >= 0 for entry in entries)
+
+
+def test_replay_round_trip(recording):
+    harness = CallHarness(replay_file=str(recording), latency="zero")
+    assert harness.mode == "replay"
+    info = harness.info(lambda: pytest.fail("no live Info in replay mode"))
+    completion = harness.wrap_completion(lambda **kwargs: pytest.fail("no live LLM in replay mode"))
+
+    assert info.all_mids() == {"BTC": "87000.5"}
+    assert info.meta() == FakeInfo().meta()
+    # Keyed calls: served by symbol/interval and by model + messages, whatever the order
+    assert info.candles_snapshot("ETH", "1h", 5000, 6000) == [{"t": 1000, "c": "ETH-1h"}]
+    assert info.candles_snapshot("BTC", "1h", 5000, 6000) == [{"t": 1000, "c": "BTC-1h"}]
+    assert completion(**chat("ETH?")).choices[0].message.content == "answer to ETH?"
+    assert completion(**chat("BTC?")).usage.total_tokens == 42
+
+    with pytest.raises(RuntimeError, match="testnet down"):
+        info.all_mids()  # recorded errors are raised again
+    assert info.all_mids() == {"BTC": "87000.5"}  # recording exhausted: wraps around
+
+
+def test_unknown_keys_fall_back_to_recording_order(recording):
+    harness = CallHarness(replay_file=str(recording), latency="zero")
+    info = harness.info(None)
+    assert info.candles_snapshot("SOL", "1h", 0, 1) == [{"t": 1000, "c": "BTC-1h"}]
+    assert harness.wrap_completion(None)(**chat("SOL?")).choices[0].message.content == "answer to BTC?"
+
+
+def test_missing_call_raises():
+    with pytest.raises(LookupError):
+        CallReplayer([]).call("meta")
+
+
+def test_replay_latency():
+    entries = [{"call": "meta", "key": None, "latency": 0.05, "response": {}}]
+    started = time.monotonic()
+    CallReplayer(entries, latency_scale=0).call("meta")
+    assert time.monotonic() - started < 0.04
+    started = time.monotonic()
+    CallReplayer(entries, latency_scale=1.0).call("meta")
+    assert time.monotonic() - started >= 0.05
+
+
+def test_parse_latency():
+    assert parse_latency("original") == 1.0
+    assert parse_latency("") == 1.0
+    assert parse_latency("ZERO") == 0.0
+    assert parse_latency("0.5") == 0.5
+
+
+def test_call_keys():
+    assert call_key("all_mids") is None
+    assert call_key("candles_snapshot", ("BTC", "1m", 0, 1)) == "BTC/1m"
+    assert call_key("chat", (), chat("a")) == call_key("chat", (), chat("a"))
+    assert call_key("chat", (), chat("a")) != call_key("chat", (), chat("b"))
+
+
+def test_record_and_replay_together_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CallHarness(record_file=str(tmp_path / "a"), replay_file=str(tmp_path / "b"))
+
+
+def test_summarize(recording):
+    stats = summarize(str(recording))
+    assert stats["all_mids"]["count"] == 2
+    assert stats["all_mids"]["errors"] == 1
+    assert stats["chat"]["count"] == 2
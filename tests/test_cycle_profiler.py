@@ -0,0 +1,119 @@
+"""
+Tests for the on-demand cycle profiler: arming, one output file per profiled
+cycle, and the cProfile fallback when another profiler is active
+"""
+
+import pstats
+import threading
+import time
+
+import pytest
+
+import cycle_profiler
+from cycle_profiler import CycleProfiler
+
+
+def busy_cycle(seconds=0.05):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+@pytest.fixture
+def logged():
+    return []
+
+
+def make_profiler(tmp_path, logged, mode="sample"):
+    return CycleProfiler(str(tmp_path / "profiles"), mode, interval=0.001,
+                         log=lambda message, level="INFO": logged.append((level, message)))
+
+
+def outputs(tmp_path, suffix):
+    return sorted((tmp_path / "profiles").glob(f"*{suffix}"))
+
+
+def test_unarmed_profile_is_a_no_op(tmp_path, logged):
+    profiler = make_profiler(tmp_path, logged)
+    with profiler.profile("w"):
+        busy_cycle(0.01)
+    assert profiler.remaining == 0
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_one_folded_file_per_armed_cycle(tmp_path, logged):
+    profiler = make_profiler(tmp_path, logged)
+    profiler.arm(1)
+    profiler.arm(1)  # adds to the pending count
+    assert profiler.remaining == 2
+    for _ in range(3):
+        with profiler.profile("wallet_a"):
+            busy_cycle()
+    assert profiler.remaining == 0
+
+    files = outputs(tmp_path, ".folded")
+    assert len(files) == 2 and all("_wallet_a_" in path.name for path in files)
+    stacks = files[0].read_text().splitlines()
+    assert any(line.startswith("MainThread;") and "busy_cycle (test_cycle_profiler.py:" in line for line in stacks)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in stacks)
+
+
+def test_failed_cycle_still_writes_its_profile(tmp_path, logged):
+    profiler = make_profiler(tmp_path, logged)
+    profiler.arm(1)
+    with pytest.raises(RuntimeError):
+        with profiler.profile("w"):
+            busy_cycle(0.01)
+            raise RuntimeError("cycle failed")
+    assert len(outputs(tmp_path, ".folded")) == 1
+
+
+def test_concurrent_cycles_take_one_armed_slot_each(tmp_path, logged):
+    profiler = make_profiler(tmp_path, logged)
+    profiler.arm(1)
+    barrier = threading.Barrier(4)
+
+    def cycle():
+        barrier.wait()
+        with profiler.profile("w"):
+            busy_cycle(0.01)
+
+    threads = [threading.Thread(target=cycle) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profiler.remaining == 0
+    assert len(outputs(tmp_path, ".folded")) == 1
+
+
+def test_cprofile_writes_stats(tmp_path, logged):
+    profiler = make_profiler(tmp_path, logged, mode="cprofile")
+    profiler.arm(1)
+    with profiler.profile("w"):
+        busy_cycle(0.01)
+    (path,) = outputs(tmp_path, ".prof")
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "busy_cycle" in functions
+
+
+def test_cprofile_skips_the_cycle_when_another_profiler_is_active(tmp_path, logged, monkeypatch):
+    class ActiveProfiler:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(cycle_profiler.cProfile, "Profile", ActiveProfiler)
+    profiler = make_profiler(tmp_path, logged, mode="cprofile")
+    profiler.arm(1)
+    ran = []
+    with profiler.profile("w"):
+        ran.append(True)
+    assert ran == [True]
+    assert profiler.remaining == 0
+    assert outputs(tmp_path, ".prof") == []
+    assert logged[-1][0] == "WARNING" and "not profiled" in logged[-1][1]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        CycleProfiler("profiles", "perf")
@@ -0,0 +1,117 @@
+"""
+Tests for the AI decision cache: key normalisation, TTL expiry and LRU eviction
+"""
+
+import pytest
+
+import decision_cache
+from decision_cache import DecisionCache, decision_key
+
+HISTORY = [
+    {"timestamp": "2024-03-01T10:15:00", "pair": "BTC", "action": "BUY", "price": 87000.123,
+     "confidence": 72.04, "reasoning": "first"},
+    {"timestamp": "2024-03-01T14:15:00", "pair": "ETH", "action": "BUY", "price": 3100.5,
+     "confidence": 65.0, "reasoning": "second"},
+]
+DECISION = {"action": "BUY", "confidence": 75.0, "reasoning": "oversold"}
+
+
+def key(pair="BTC", trend="BULLISH", rsi=42.0, history=HISTORY, model="m1"):
+    return decision_key(pair, trend, rsi, history, model=model)
+
+
+@pytest.mark.parametrize("rsi", [40.0, 41.3, 44.99])
+def test_rsi_values_in_the_same_band_share_a_key(rsi):
+    assert key(rsi=rsi) == key(rsi=40.0)
+
+
+@pytest.mark.parametrize("rsi", [39.99, 45.0, 70.0])
+def test_rsi_values_in_other_bands_miss(rsi):
+    assert key(rsi=rsi) != key(rsi=40.0)
+
+
+def test_nan_rsi_has_its_own_key():
+    assert key(rsi=float("nan")) == key(rsi=float("nan"))
+    assert key(rsi=float("nan")) != key(rsi=0.0)
+
+
+@pytest.mark.parametrize("changed", [
+    {"pair": "ETH"},
+    {"trend": "BEARISH"},
+    {"model": "m2"},
+    {"history": HISTORY[:1]},
+    {"history": HISTORY + [dict(HISTORY[0], timestamp="2024-03-02T09:00:00")]},
+    {"history": [dict(HISTORY[0], action="SELL"), HISTORY[1]]},
+    {"history": [dict(HISTORY[0], price=87001.0), HISTORY[1]]},
+])
+def test_changed_inputs_miss(changed):
+    assert key(**changed) != key()
+
+
+def test_history_is_normalized():
+    """Time of day, reasoning and sub-cent / sub-0.1% noise do not change the key"""
+    noisy = [dict(HISTORY[0], timestamp="2024-03-01T23:59:59", reasoning="reworded", price=87000.1249,
+                  confidence=72.01), HISTORY[1]]
+    assert key(history=noisy) == key()
+
+
+def test_only_the_last_five_trades_count():
+    recent = [dict(HISTORY[i % 2], price=100.0 + i) for i in range(5)]
+    assert key(history=[dict(HISTORY[0], pair="SOL")] + recent) == key(history=recent)
+    assert key(history=recent[1:]) != key(history=recent)
+
+
+def test_hit_returns_a_copy():
+    cache = DecisionCache(ttl=60)
+    cache.put(key(), DECISION)
+    hit = cache.get(key())
+    assert hit == DECISION
+    hit["action"] = "HOLD"
+    assert cache.get(key()) == DECISION
+    assert cache.get(key(pair="ETH")) is None
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 1}
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(decision_cache.time, "time", lambda: now[0])
+    cache = DecisionCache(ttl=60)
+    cache.put(key(), DECISION)
+    now[0] += 59.9
+    assert cache.get(key()) == DECISION
+    now[0] += 0.1
+    assert cache.get(key()) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction():
+    cache = DecisionCache(ttl=60, max_entries=2)
+    cache.put("a", DECISION)
+    cache.put("b", DECISION)
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", DECISION)
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == DECISION
+
+
+def test_disabled_cache():
+    cache = DecisionCache(ttl=0)
+    cache.put(key(), DECISION)
+    assert cache.get(key()) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_file_round_trip_drops_expired_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(decision_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "decision_cache.json")
+    cache = DecisionCache(ttl=60, path=path)
+    cache.put("old", DECISION)
+    now[0] += 30
+    cache.put("new", DECISION)
+    cache.save()
+
+    now[0] += 40  # "old" expired, "new" still valid
+    restored = DecisionCache(ttl=60, path=path)
+    assert restored.get("old") is None
+    assert restored.get("new") == DECISION
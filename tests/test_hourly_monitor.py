@@ -0,0 +1,204 @@
+"""
+Tests for the hourly monitor: incremental log scanning, the reverse block
+tail reader and the events raised from wallet state changes
+"""
+
+import json
+import os
+
+import pytest
+
+import hourly_monitor
+from hourly_monitor import LogScanner, MonitorView, tail_lines
+from performance import record_trade
+from state_store import StateStore
+
+DAY = "2024-03-01"
+
+
+def cycle_lines(count, day=DAY):
+    return "".join(f"[{day} 10:00:{i:02d}] [INFO] 🔄 CYCLE START #{i}\n[{day} 10:00:{i:02d}] [INFO] idle\n"
+                   for i in range(count))
+
+
+@pytest.fixture
+def log_files(tmp_path):
+    return str(tmp_path / "bot_output.log"), str(tmp_path / "reports" / "log_scan.json")
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_scan_reads_only_appended_bytes(log_files):
+    log_file, state_file = log_files
+    append(log_file, cycle_lines(3))
+    scanner = LogScanner(log_file, state_file)
+    assert scanner.scan() == 6
+    assert scanner.scan() == 0
+    append(log_file, cycle_lines(1, "2024-03-02"))
+    assert scanner.scan() == 2
+    assert (scanner.cycles_on(DAY), scanner.cycles_on("2024-03-02")) == (3, 1)
+    assert scanner.offset == os.path.getsize(log_file)
+
+
+def test_partial_line_is_left_for_the_next_scan(log_files):
+    log_file, state_file = log_files
+    append(log_file, cycle_lines(1) + f"[{DAY} 11:00:00] [INFO] 🔄 CYC")
+    scanner = LogScanner(log_file, state_file)
+    assert scanner.scan() == 2
+    append(log_file, "LE START #2\n")
+    assert scanner.scan() == 1
+    assert scanner.cycles_on(DAY) == 2
+
+
+def test_offset_and_counters_survive_a_restart(log_files):
+    log_file, state_file = log_files
+    append(log_file, cycle_lines(4))
+    LogScanner(log_file, state_file).scan()
+
+    restarted = LogScanner(log_file, state_file)
+    assert restarted.offset == os.path.getsize(log_file)
+    assert restarted.scan() == 0
+    assert restarted.cycles_on(DAY) == 4
+
+
+def test_state_for_another_log_file_is_ignored(log_files, tmp_path):
+    log_file, state_file = log_files
+    append(log_file, cycle_lines(2))
+    LogScanner(log_file, state_file).scan()
+    other = LogScanner(str(tmp_path / "other.log"), state_file)
+    assert (other.offset, other.cycles_by_day) == (0, {})
+
+
+def test_replaced_file_is_rescanned_from_the_start(log_files, tmp_path):
+    """Rotation puts a new file (new inode) at the path: its lines are all read"""
+    log_file, state_file = log_files
+    append(log_file, cycle_lines(5))
+    scanner = LogScanner(log_file, state_file)
+    scanner.scan()
+
+    rotated = str(tmp_path / "new.log")
+    append(rotated, cycle_lines(2) * 4)  # larger than the old offset: only the inode tells them apart
+    os.replace(log_file, log_file + ".1")
+    os.replace(rotated, log_file)
+    assert scanner.scan() == 16
+    assert scanner.cycles_on(DAY) == 8
+    assert scanner.inode == os.stat(log_file).st_ino
+    assert LogScanner(log_file, state_file).scan() == 0
+
+
+def test_truncated_file_is_rescanned(log_files):
+    log_file, state_file = log_files
+    append(log_file, cycle_lines(5))
+    scanner = LogScanner(log_file, state_file)
+    scanner.scan()
+    with open(log_file, "w", encoding="utf-8") as f:
+        f.write(cycle_lines(1))
+    assert scanner.scan() == 2
+    assert scanner.cycles_on(DAY) == 1
+
+
+def test_missing_log_scans_nothing(log_files):
+    assert LogScanner(*log_files).scan() == 0
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+@pytest.mark.parametrize("block_size", [1, 7, 64 * 1024])
+def test_tail_lines(tmp_path, trailing_newline, block_size):
+    path = tmp_path / "bot_output.log"
+    lines = [f"line {i} 💰" for i in range(50)]
+    path.write_text("\n".join(lines) + ("\n" if trailing_newline else ""), encoding="utf-8")
+    assert tail_lines(str(path), 5, block_size=block_size) == lines[-5:]
+    assert tail_lines(str(path), 1, block_size=block_size) == lines[-1:]
+    assert tail_lines(str(path), 100, block_size=block_size) == lines
+
+
+def test_tail_lines_of_an_empty_file(tmp_path):
+    path = tmp_path / "bot_output.log"
+    path.write_text("")
+    assert tail_lines(str(path), 5) == []
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    """Monitor pointed at a wallet state and config in tmp_path; returns the writer store"""
+    state_file = tmp_path / "w_state.json"
+    monkeypatch.setattr(hourly_monitor, "STATE_FILE", str(state_file))
+    monkeypatch.setattr(hourly_monitor, "CONFIG_FILE", str(tmp_path / "config.json"))
+    monkeypatch.setattr(hourly_monitor, "_config_cache", (None, 12))
+    monkeypatch.setattr(hourly_monitor, "get_bot_status", lambda: {"running": True, "pid": 1})
+    return StateStore(state_file)
+
+
+def write_config(max_daily_trades):
+    with open(hourly_monitor.CONFIG_FILE, "w") as f:
+        json.dump({"max_daily_trades": max_daily_trades}, f)
+
+
+def trade(state, action, pair="BTC", **fields):
+    """Record a trade the way the runner does and bump the daily counter"""
+    record = {"timestamp": "2024-03-01T12:00:00", "pair": pair, "action": action, "price": 100.0,
+              "quantity": 0.1, "trade_size_usd": 10.0, "confidence": 70.0, **fields}
+    state["trade_history"].append(record)
+    record_trade(state["performance"], record)
+    state["total_trades"] += 1
+    state["daily_trades"] += 1
+
+
+def test_events_for_trades_a_closed_position_and_the_daily_limit(monitor, make_trades, make_state):
+    write_config(3)
+    state = make_state("w", make_trades(4))
+    monitor.save(state)
+    view = MonitorView()
+    assert view.poll() == []
+    assert view.poll() == []  # nothing saved since
+
+    trade(state, "BUY")
+    state["open_position"] = {"pair": "BTC", "entry_price": 100.0}
+    monitor.save(state)
+    assert view.poll() == ["trade: 1 new (BUY BTC)"]
+
+    trade(state, "SELL", pnl=1.0, pnl_pct=10.0, result="won", exit_reason="take_profit")
+    state["open_position"] = None
+    monitor.save(state)
+    assert view.poll() == ["trade: 1 new (SELL BTC)", "position closed (BTC take_profit)"]
+
+    trade(state, "BUY", pair="ETH")
+    monitor.save(state)
+    assert view.poll() == ["trade: 1 new (BUY ETH)", "daily limit: 3/3 trades"]
+
+
+def test_bot_stopping_is_an_event(monitor, monkeypatch, make_trades, make_state):
+    monitor.save(make_state("w", make_trades(2)))
+    view = MonitorView()
+    view.poll()
+    monkeypatch.setattr(hourly_monitor, "get_bot_status", lambda: {"running": False, "pid": None})
+    assert view.poll() == ["bot stopped"]
+
+
+def test_daily_limit_follows_config_edits(monitor, make_trades, make_state):
+    """max_daily_trades is re-read when the config file changes, not only at startup"""
+    write_config(12)
+    state = make_state("w", make_trades(2))
+    monitor.save(state)
+    view = MonitorView()
+    view.poll()
+    assert view.max_daily_trades == 12
+
+    write_config(2)
+    trade(state, "BUY")
+    trade(state, "SELL", pnl=-1.0, pnl_pct=-10.0, result="lost")
+    monitor.save(state)
+    assert view.poll()[-1] == "daily limit: 2/2 trades"
+    assert view.max_daily_trades == 2
+
+
+def test_max_daily_trades_defaults(monitor):
+    assert hourly_monitor.load_max_daily_trades() == 12  # no config file
+    write_config(5)
+    assert hourly_monitor.load_max_daily_trades() == 5
+    with open(hourly_monitor.CONFIG_FILE, "w") as f:
+        f.write('{"max_daily_tr')  # read mid-write
+    assert hourly_monitor.load_max_daily_trades() == 5
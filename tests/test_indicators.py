@@ -0,0 +1,130 @@
+"""
+Tests for the incremental RSI: IncrementalRSI and RSIEngine must match
+ta.momentum.RSIIndicator over the same closes
+"""
+
+import random
+
+import pandas as pd
+import pytest
+import ta
+
+from indicators import IncrementalRSI, RSIEngine, compute_rsi
+
+WINDOW = 14
+TOLERANCE = 1e-8
+
+
+def random_walk(n, seed=0, start=87000.0):
+    """Reproducible price series (with some flat steps)"""
+    rng = random.Random(seed)
+    prices = [start]
+    for _ in range(n - 1):
+        step = 0.0 if rng.random() < 0.05 else rng.gauss(0, start * 0.002)
+        prices.append(max(1.0, prices[-1] + step))
+    return prices
+
+
+def ta_rsi(closes, window=WINDOW):
+    """ta's RSI of every bar (None while warming up)"""
+    values = ta.momentum.RSIIndicator(pd.Series(closes), window=window).rsi().tolist()
+    return [None if value != value else value for value in values]
+
+
+def assert_rsi_equal(value, expected):
+    if expected is None:
+        assert value is None
+    else:
+        assert value == pytest.approx(expected, abs=TOLERANCE)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_rsi_matches_ta_on_every_bar(seed):
+    closes = random_walk(500, seed=seed)
+    rsi = IncrementalRSI(WINDOW)
+    for value, expected in zip((rsi.update(close) for close in closes), ta_rsi(closes)):
+        assert_rsi_equal(value, expected)
+
+
+def test_compute_rsi_matches_ta_last_value():
+    closes = random_walk(200, seed=1)
+    assert_rsi_equal(compute_rsi(closes, WINDOW), ta_rsi(closes)[-1])
+    assert compute_rsi(closes[:WINDOW - 1], WINDOW) is None
+
+
+def test_peek_does_not_change_state():
+    closes = random_walk(50, seed=2)
+    rsi = IncrementalRSI(WINDOW)
+    for close in closes[:-1]:
+        rsi.update(close)
+    before = rsi.to_dict()
+    peeked = rsi.peek(closes[-1])
+    assert rsi.to_dict() == before
+    assert peeked == pytest.approx(rsi.update(closes[-1]))
+
+
+def test_engine_seeded_from_a_window_matches_ta():
+    closes = random_walk(300, seed=3)
+    engine = RSIEngine(WINDOW)
+    value = engine.update_series("BTC", list(range(len(closes))), closes)
+    assert_rsi_equal(value, ta_rsi(closes)[-1])
+    assert engine.last_ts("BTC") == len(closes) - 1
+
+
+def test_engine_appends_through_sliding_windows_match_ta():
+    """The runner passes the last 14 bars every cycle: only the new bar is fed"""
+    closes = random_walk(200, seed=4)
+    expected = ta_rsi(closes)
+    engine = RSIEngine(WINDOW)
+    timestamps = list(range(len(closes)))
+    engine.update_series("BTC", timestamps[:WINDOW], closes[:WINDOW])
+    for end in range(WINDOW + 1, len(closes) + 1):
+        value = engine.update_series("BTC", timestamps[end - WINDOW:end], closes[end - WINDOW:end])
+        assert_rsi_equal(value, expected[end - 1])
+
+
+def test_engine_ignores_bars_already_seen():
+    closes = random_walk(40, seed=5)
+    engine = RSIEngine(WINDOW)
+    timestamps = list(range(len(closes)))
+    first = engine.update_series("BTC", timestamps, closes)
+    count = engine.get("BTC").count
+    assert engine.update_series("BTC", timestamps[-WINDOW:], closes[-WINDOW:]) == first
+    assert engine.get("BTC").count == count
+
+
+def test_engine_after_a_gap_matches_ta():
+    """Missing candles (timestamp gap) and more new bars than the window in one update"""
+    closes = random_walk(300, seed=6)
+    expected = ta_rsi(closes)
+    hour = 3_600_000
+    timestamps = [i * hour for i in range(100)] + [(i + 48) * hour for i in range(100, 300)]
+    engine = RSIEngine(WINDOW)
+    engine.update_series("BTC", timestamps[:100], closes[:100])
+    # Downtime: 48 bars missing from the store, then 150 backfilled bars at once
+    value = engine.update_series("BTC", timestamps[:250], closes[:250])
+    assert_rsi_equal(value, expected[249])
+    value = engine.update_series("BTC", timestamps[250 - WINDOW + 1:251], closes[250 - WINDOW + 1:251])
+    assert_rsi_equal(value, expected[250])
+
+
+def test_engine_state_survives_save_and_load(tmp_path):
+    closes = random_walk(120, seed=7)
+    timestamps = list(range(len(closes)))
+    path = tmp_path / "rsi_state.json"
+    engine = RSIEngine(WINDOW, path=str(path))
+    engine.update_series("ETH", timestamps[:100], closes[:100])
+    engine.save()
+
+    restored = RSIEngine(WINDOW, path=str(path))
+    assert restored.last_ts("ETH") == 99
+    value = restored.update_series("ETH", timestamps[100 - WINDOW:], closes[100 - WINDOW:])
+    assert_rsi_equal(value, ta_rsi(closes)[-1])
+
+
+def test_engine_drops_saved_states_of_another_window(tmp_path):
+    path = tmp_path / "rsi_state.json"
+    engine = RSIEngine(WINDOW, path=str(path))
+    engine.update_series("ETH", list(range(30)), random_walk(30, seed=8))
+    engine.save()
+    assert RSIEngine(21, path=str(path)).last_ts("ETH") is None
@@ -0,0 +1,130 @@
+"""
+Tests for the shared LLM client: bounded retries with jittered backoff taken
+outside the concurrency limit
+"""
+
+import random
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+import llm_client
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def status_error(cls, status):
+    return cls(f"HTTP {status}", response=httpx.Response(status, request=REQUEST), body=None)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """One in-flight request, two retries, backoff that checks the limiter is free and never sleeps"""
+    semaphore = threading.BoundedSemaphore(1)
+    delays = []
+
+    def backoff_delay(attempt):
+        assert semaphore.acquire(blocking=False), "backoff taken while holding the concurrency slot"
+        semaphore.release()
+        delays.append(attempt)
+        return 0
+
+    monkeypatch.setattr(llm_client, "_semaphore", semaphore)
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(llm_client, "backoff_delay", backoff_delay)
+    return delays
+
+
+def flaky(errors, result="ok"):
+    """Transport raising the given errors in turn, then returning result"""
+    calls = []
+
+    def transport(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return transport, calls
+
+
+def test_retryable_errors_are_retried(monkeypatch, limiter):
+    transport, calls = flaky([openai.APIConnectionError(request=REQUEST),
+                              status_error(openai.RateLimitError, 429)])
+    monkeypatch.setattr(llm_client, "_transport", transport)
+    before = llm_client.get_llm_stats()
+
+    assert llm_client.chat_completion(model="m", messages=[]) == "ok"
+    assert len(calls) == 3
+    assert limiter == [0, 1]
+    after = llm_client.get_llm_stats()
+    assert after["requests"] - before["requests"] == 3
+    assert after["retries"] - before["retries"] == 2
+    assert after["errors"] - before["errors"] == 2
+    assert after["in_flight"] == 0
+
+
+def test_gives_up_after_max_retries(monkeypatch, limiter):
+    transport, calls = flaky([status_error(openai.InternalServerError, 503)] * 5)
+    monkeypatch.setattr(llm_client, "_transport", transport)
+    with pytest.raises(openai.InternalServerError):
+        llm_client.chat_completion(model="m", messages=[])
+    assert len(calls) == 3  # first attempt + LLM_MAX_RETRIES
+    assert limiter == [0, 1]
+
+
+def test_other_errors_are_not_retried(monkeypatch, limiter):
+    transport, calls = flaky([status_error(openai.BadRequestError, 400)])
+    monkeypatch.setattr(llm_client, "_transport", transport)
+    with pytest.raises(openai.BadRequestError):
+        llm_client.chat_completion(model="m", messages=[])
+    assert len(calls) == 1
+    assert limiter == []
+
+
+def test_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(llm_client, "_semaphore", threading.BoundedSemaphore(2))
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def transport(**kwargs):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.pop()
+        return "ok"
+
+    monkeypatch.setattr(llm_client, "_transport", transport)
+    threads = [threading.Thread(target=llm_client.chat_completion, kwargs={"messages": []}) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (openai.APITimeoutError(request=REQUEST), True),
+    (status_error(openai.RateLimitError, 429), True),
+    (status_error(openai.InternalServerError, 500), True),
+    (status_error(openai.AuthenticationError, 401), False),
+    (ValueError("bad json"), False),
+])
+def test_is_retryable(error, retryable):
+    assert llm_client.is_retryable(error) is retryable
+
+
+def test_backoff_delay_is_full_jitter(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF_MAX", 8.0)
+    random.seed(1)
+    for attempt, cap in ((0, 0.5), (1, 1.0), (3, 4.0), (10, 8.0)):
+        delays = [llm_client.backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap / 2
@@ -0,0 +1,79 @@
+"""
+Tests for the metrics registry and the Prometheus text rendering
+"""
+
+import re
+
+import pytest
+
+from metrics import Registry, read_dumps, render
+
+
+def lines_of(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative_up_to_inf():
+    registry = Registry()
+    histogram = registry.histogram("aurum_test_seconds", "Test durations", ("wallet",), buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.1, 0.5, 2.0, 20.0, 30.0):
+        histogram.observe(value, wallet="w")
+    text = render([(registry.dump(), {})])
+
+    buckets = lines_of(text, "aurum_test_seconds_bucket")
+    assert [re.search(r'le="([^"]+)"', line).group(1) for line in buckets] == ["0.1", "1.0", "10.0", "+Inf"]
+    assert [int(line.rsplit(" ", 1)[1]) for line in buckets] == [2, 3, 4, 6]  # 0.1 falls in le="0.1"
+    assert lines_of(text, "aurum_test_seconds_count") == ['aurum_test_seconds_count{wallet="w"} 6']
+    (total,) = lines_of(text, "aurum_test_seconds_sum")
+    assert float(total.rsplit(" ", 1)[1]) == pytest.approx(52.65)
+    assert "# TYPE aurum_test_seconds histogram" in text
+
+
+def test_time_observes_a_failing_block():
+    registry = Registry()
+    histogram = registry.histogram("aurum_stage_seconds", "Stages", ("stage",))
+    with pytest.raises(RuntimeError):
+        with histogram.time(stage="connect"):
+            raise RuntimeError("boom")
+    (sample,) = histogram.dump()["samples"]
+    assert sample[0] == ["connect"] and sample[1]["count"] == 1
+
+
+def test_counters_gauges_and_label_escaping():
+    registry = Registry()
+    counter = registry.counter("aurum_events_total", "Events", ("reason", "pair"))
+    counter.inc(reason='say "hi"\\\nbye')
+    counter.inc(2, reason="plain", pair="BTC")
+    registry.gauge("aurum_up", "Up").set(1)
+    assert registry.counter("aurum_events_total", "Events", ("reason", "pair")) is counter
+    text = render([(registry.dump(), {})])
+
+    assert 'aurum_events_total{reason="say \\"hi\\"\\\\\\nbye"} 1.0' in text  # empty pair label omitted
+    assert 'aurum_events_total{reason="plain",pair="BTC"} 2.0' in text
+    assert "aurum_up 1.0" in text
+    assert "# TYPE aurum_events_total counter" in text and "# TYPE aurum_up gauge" in text
+
+
+def test_dumps_of_several_processes_are_merged_by_family(tmp_path):
+    for process, amount in (("runner", 1), ("runner.worker1", 4)):
+        registry = Registry()
+        registry.counter("aurum_cycles_total", "Cycles", ("wallet",)).inc(amount, wallet="w")
+        registry.histogram("aurum_cycle_seconds", "Cycle time", buckets=(1.0,)).observe(0.5)
+        registry.write(str(tmp_path / f"{process}.json"))
+    (tmp_path / "broken.json").write_text("{")
+    api = Registry()
+    api.counter("aurum_http_requests_total", "Requests").inc()
+
+    dumps = read_dumps(tmp_path) + [(api.dump(), {"process": "api"})]
+    assert [labels["process"] for _, labels in dumps] == ["runner", "runner.worker1", "api"]
+    text = render(dumps)
+
+    assert text.count("# HELP aurum_cycles_total ") == 1 and text.count("# TYPE aurum_cycle_seconds ") == 1
+    assert lines_of(text, "aurum_cycles_total") == [
+        'aurum_cycles_total{wallet="w",process="runner"} 1.0',
+        'aurum_cycles_total{wallet="w",process="runner.worker1"} 4.0']
+    assert 'aurum_cycle_seconds_bucket{process="runner.worker1",le="+Inf"} 1' in text
+    assert 'aurum_http_requests_total{process="api"} 1.0' in text
+    updated = lines_of(text, "aurum_metrics_updated_timestamp_seconds")
+    assert [re.search(r'process="([^"]+)"', line).group(1) for line in updated] == ["runner", "runner.worker1", "api"]
+    assert not list(tmp_path.glob("*.tmp"))
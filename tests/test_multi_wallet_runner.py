@@ -0,0 +1,89 @@
+"""
+Tests for the multi-wallet runner: wallets in one process share the market
+snapshot and keep separate state
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+import wallet_runner_hyperliquid as runner
+from candle_store import CandleStore
+from decision_cache import DecisionCache
+from indicators import RSIEngine
+from multi_wallet_runner import MultiWalletRunner, load_wallet_configs, shard_of
+
+WALLETS = {"alpha": 10000.0, "beta": 4000.0}  # wallet -> initial capital
+
+
+def wallet_config(name, capital):
+    return {"wallet_name": name, "initial_capital": capital, "trading_pairs": ["BTC", "ETH"],
+            "min_confidence": 60.0, "take_profit_pct": 8.0, "stop_loss_pct": 2.0, "max_holding_hours": 24,
+            "max_daily_trades": 12, "emergency_stop_loss_pct": 30.0}
+
+
+@pytest.fixture
+def wallet_env(tmp_path, monkeypatch, fake_info):
+    """Two wallet configs, a fresh state dir and a FakeInfo exchange; the LLM answers BUY"""
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    for name, capital in WALLETS.items():
+        (config_dir / f"{name}.json").write_text(json.dumps(wallet_config(name, capital)))
+    (config_dir / "notes.json").write_text(json.dumps({"comment": "not a wallet"}))
+
+    connections = []
+
+    def connect(testnet=True, websocket=False):
+        connections.append(testnet)
+        return fake_info
+
+    (tmp_path / "state").mkdir()
+    monkeypatch.setattr(runner, "STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(runner, "CANDLE_STORE", CandleStore(str(tmp_path / "candles")))
+    monkeypatch.setattr(runner, "RSI_ENGINE", RSIEngine(14))
+    monkeypatch.setattr(runner, "DECISION_CACHE", DecisionCache(ttl=0))
+    monkeypatch.setattr(runner, "POSITION_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(runner, "get_hyperliquid_info", connect)
+    monkeypatch.setattr(llm_client, "_transport", lambda **kwargs: SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="BUY|75|test"))]))
+    return SimpleNamespace(config_dir=str(config_dir), info=fake_info, connections=connections)
+
+
+def test_wallet_configs_are_loaded_and_sharded(wallet_env):
+    configs = load_wallet_configs(wallet_env.config_dir)
+    assert sorted(configs) == sorted(WALLETS)
+    assert configs["alpha"]["config_file"].endswith("alpha.json")
+    assert {shard_of(name, 4) for name in WALLETS} <= set(range(4))
+    assert shard_of("alpha", 4) == shard_of("alpha", 4)
+
+
+def test_two_wallets_share_one_fetch_per_tick_and_keep_their_own_state(wallet_env, monkeypatch):
+    # interval 1s: alpha cycles at 0s and 1s, beta (staggered) at 0.5s and 1.5s; the snapshot
+    # alpha fetches each tick is still within TTL when beta's cycle runs
+    monkeypatch.setattr(runner, "MARKET_SNAPSHOT_TTL", 0.7)
+    events = []
+    multi = MultiWalletRunner(wallet_env.config_dir, interval=1.0, max_cycles=2, on_event=events.append)
+    assert asyncio.run(multi.run()) == 4
+
+    assert wallet_env.connections == [True]
+    assert wallet_env.info.calls["all_mids"] == 2
+    assert wallet_env.info.calls["meta"] == 2
+    assert multi.snapshot.refreshes == 2
+
+    states = {name: runner.load_state({"wallet_name": name}) for name in WALLETS}
+    for name, capital in WALLETS.items():
+        state = states[name]
+        assert state["wallet_name"] == name
+        assert state["initial_capital"] == capital
+        assert [(trade["action"], trade["pair"]) for trade in state["trade_history"]] == [("BUY", "BTC")]
+        assert state["open_position"]["pair"] == "BTC"
+    assert states["alpha"]["trade_history"][0]["trade_size_usd"] > \
+        states["beta"]["trade_history"][0]["trade_size_usd"]
+
+    trades = sorted((event["wallet"], event["action"]) for event in events if event["event"] == "trade")
+    assert trades == [("alpha", "BUY"), ("beta", "BUY")]
+    cycles = [event for event in events if event["event"] == "cycle"]
+    assert len(cycles) == 4 and all(event["ok"] for event in cycles)
@@ -0,0 +1,130 @@
+"""
+Tests for the incrementally maintained performance aggregates
+"""
+
+import copy
+import json
+import math
+import statistics
+from collections import defaultdict
+
+import pytest
+
+from performance import (apply_delta, build_performance, daily_sharpe, new_performance, performance_delta,
+                         record_trade, sharpe, summarize_bucket)
+
+
+def trade(timestamp, pair, pnl=None, size=100.0):
+    """Opening BUY record, or a closing SELL one when pnl is given"""
+    record = {"timestamp": timestamp, "pair": pair, "action": "BUY" if pnl is None else "SELL",
+              "price": 100.0, "trade_size_usd": size}
+    if pnl is not None:
+        record.update(pnl=pnl, pnl_pct=pnl / size * 100, result="won" if pnl > 0 else "lost")
+    return record
+
+
+TRADES = [
+    trade("2024-03-01T09:00:00", "BTC"),
+    trade("2024-03-01T12:00:00", "BTC", pnl=5.0),
+    trade("2024-03-01T13:00:00", "ETH"),
+    trade("2024-03-01T18:00:00", "ETH", pnl=-8.0),
+    trade("2024-03-02T09:00:00", "BTC"),
+    trade("2024-03-02T10:00:00", "BTC", pnl=2.0),
+    trade("2024-03-03T09:00:00", "SOL"),
+    trade("2024-03-03T11:00:00", "SOL", pnl=-1.0),
+]
+
+
+def detached(value):
+    return json.loads(json.dumps(value))
+
+
+def test_bucket_math():
+    performance = build_performance(TRADES)
+    overall = performance["overall"]
+    assert (overall["total"], overall["won"], overall["lost"]) == (4, 2, 2)
+    assert overall["pnl"] == pytest.approx(-2.0)
+    assert overall["peak_pnl"] == pytest.approx(5.0)
+    assert overall["max_drawdown"] == pytest.approx(8.0)  # 5 -> -3
+    returns = [0.05, -0.08, 0.02, -0.01]
+    assert overall["returns_count"] == 4
+    assert overall["returns_sum"] == pytest.approx(sum(returns))
+    assert overall["returns_sq_sum"] == pytest.approx(sum(r * r for r in returns))
+
+    btc = performance["by_pair"]["BTC"]
+    assert (btc["total"], btc["won"], btc["lost"], btc["pnl"]) == (2, 2, 0, 7.0)
+    assert btc["max_drawdown"] == 0.0
+    assert set(performance["by_day"]) == {"2024-03-01", "2024-03-02", "2024-03-03"}
+    assert performance["by_day"]["2024-03-01"]["pnl"] == pytest.approx(-3.0)
+
+
+def test_daily_moments_and_sharpe():
+    performance = build_performance(TRADES)
+    daily_pnl = [-3.0, 2.0, -1.0]
+    assert performance["daily"]["count"] == 3
+    assert performance["daily"]["sum"] == pytest.approx(sum(daily_pnl))
+    assert performance["daily"]["sq_sum"] == pytest.approx(sum(p * p for p in daily_pnl))
+    expected = statistics.mean(daily_pnl) / statistics.stdev(daily_pnl) * math.sqrt(365)
+    assert daily_sharpe(performance) == pytest.approx(expected)
+
+
+def test_sharpe_matches_sample_statistics():
+    values = [0.05, -0.08, 0.02, -0.01, 0.03]
+    expected = statistics.mean(values) / statistics.stdev(values)
+    assert sharpe(sum(values), sum(v * v for v in values), len(values)) == pytest.approx(expected)
+    assert sharpe(0.05, 0.0025, 1) is None  # fewer than two values
+    assert sharpe(0.2, 0.02, 2) is None  # no variance
+
+
+def test_summarize_bucket():
+    summary = summarize_bucket(build_performance(TRADES)["overall"])
+    assert summary["win_rate"] == 50.0
+    assert summary["pnl"] == pytest.approx(-2.0)
+    assert summarize_bucket(new_performance()["overall"])["win_rate"] == 0
+
+
+def test_incremental_matches_a_rebuild(make_trades):
+    trades = make_trades(500)
+    performance = new_performance()
+    for record in trades:
+        record_trade(performance, record)
+    rebuilt = build_performance(trades)
+    assert performance["overall"] == pytest.approx(rebuilt["overall"])
+    for pair, bucket in rebuilt["by_pair"].items():
+        assert performance["by_pair"][pair] == pytest.approx(bucket)
+    by_day = defaultdict(float)
+    for record in trades:
+        by_day[record["timestamp"][:10]] += record.get("pnl", 0.0)
+    assert performance["daily"]["sum"] == pytest.approx(sum(by_day.values()))
+    assert performance["daily"]["sq_sum"] == pytest.approx(sum(p * p for p in by_day.values()))
+
+
+def test_delta_carries_only_touched_buckets():
+    performance = build_performance(TRADES[:6])
+    record_trade(performance, TRADES[6])
+    delta = performance_delta(performance, TRADES[6:7])
+    assert set(delta["by_pair"]) == {"SOL"}
+    assert set(delta["by_day"]) == {"2024-03-03"}
+    assert delta["overall"] == performance["overall"]
+
+
+def test_delta_replay_is_idempotent():
+    """Replaying a delta once, twice or over a later state gives the same aggregates"""
+    base = build_performance(TRADES[:4])
+    replay_base = detached(base)
+    deltas = []
+    for record in TRADES[4:]:
+        record_trade(base, record)
+        deltas.append(detached(performance_delta(base, [record])))
+
+    once = copy.deepcopy(replay_base)
+    for delta in deltas:
+        apply_delta(once, detached(delta))
+    assert once == detached(base)
+
+    twice = copy.deepcopy(replay_base)
+    for delta in deltas + deltas[1:]:  # journal suffix replayed again (snapshot taken mid-way)
+        apply_delta(twice, detached(delta))
+    assert twice == detached(base)
+
+    assert apply_delta(copy.deepcopy(once), detached(deltas[-1])) == once
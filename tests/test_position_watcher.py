@@ -0,0 +1,78 @@
+"""
+Tests for the open position exit rules (TP, SL, max holding, emergency stop)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from position_watcher import close_position, evaluate_exit, open_position
+
+OPENED = datetime(2024, 3, 1, 12, 0)
+CONFIG = {"take_profit_pct": 3.0, "stop_loss_pct": 2.0, "max_holding_hours": 24, "emergency_stop_loss_pct": 10.0}
+
+
+@pytest.fixture
+def position():
+    return open_position({"pair": "BTC", "price": 100.0, "quantity": 10.0, "trade_size_usd": 1000.0,
+                          "confidence": 72.0, "timestamp": OPENED.isoformat()})
+
+
+@pytest.fixture
+def state(position):
+    return {"initial_capital": 10000.0, "current_capital": 10000.0, "winning_trades": 0, "losing_trades": 0,
+            "open_position": position, "trade_history": []}
+
+
+def exit_at(position, state, price, hours=1, config=CONFIG):
+    return evaluate_exit(position, price, state, config, now=OPENED + timedelta(hours=hours))
+
+
+@pytest.mark.parametrize("price, reason", [
+    (100.0, None),
+    (102.99, None),
+    (103.0, "take_profit"),
+    (110.0, "take_profit"),
+    (98.01, None),
+    (98.0, "stop_loss"),
+    (90.0, "stop_loss"),
+])
+def test_take_profit_and_stop_loss(position, state, price, reason):
+    assert exit_at(position, state, price) == reason
+
+
+def test_max_holding_time(position, state):
+    assert exit_at(position, state, 101.0, hours=23.9) is None
+    assert exit_at(position, state, 101.0, hours=24) == "max_holding_time"
+    assert exit_at(position, state, 103.0, hours=30) == "take_profit"  # price exits come first
+
+
+def test_emergency_stop_comes_first(position, state):
+    state["current_capital"] = 9050.0
+    assert exit_at(position, state, 99.0) is None  # equity 9040 > 9000
+    assert exit_at(position, state, 95.0) == "emergency_stop"  # equity 9000, also past the stop loss
+
+
+def test_disabled_rules(position, state):
+    assert exit_at(position, state, 50.0, hours=1000, config={}) is None
+
+
+def test_close_position_on_take_profit(position, state):
+    trade = close_position(state, 103.0, "take_profit", now=OPENED + timedelta(hours=2))
+    assert trade["pnl"] == pytest.approx(30.0)
+    assert trade["pnl_pct"] == pytest.approx(3.0)
+    assert (trade["action"], trade["result"], trade["exit_reason"]) == ("SELL", "won", "take_profit")
+    assert trade["opened_at"] == OPENED.isoformat()
+    assert state["current_capital"] == pytest.approx(10030.0)
+    assert (state["winning_trades"], state["losing_trades"]) == (1, 0)
+    assert state["open_position"] is None
+    assert state["trade_history"] == [trade]
+    assert "emergency_stop" not in state
+
+
+def test_close_position_on_emergency_stop(position, state):
+    trade = close_position(state, 80.0, "emergency_stop", now=OPENED + timedelta(hours=2))
+    assert trade["result"] == "lost"
+    assert state["current_capital"] == pytest.approx(9800.0)
+    assert (state["winning_trades"], state["losing_trades"]) == (0, 1)
+    assert state["emergency_stop"] is True
@@ -0,0 +1,181 @@
+"""
+Tests for the streamed price bus: ReplayInfo playback, WebsocketFeed
+connect / stale / reconnect and MarketSnapshot reading mids from the bus
+"""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from market_snapshot import MarketSnapshot
+from price_feed import PriceBus, ReplayInfo, WebsocketFeed
+
+PRICES = {"BTC": 87000.0, "ETH": 3100.0}
+
+
+def mids_message(scale=1.0):
+    return {"channel": "allMids", "data": {"mids": {name: str(price * scale) for name, price in PRICES.items()}}}
+
+
+def trades_message(coin, px):
+    return {"channel": "trades", "data": [{"coin": coin, "side": "B", "px": str(px), "sz": "0.1", "time": 1}]}
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Connections:
+    """info_factory handing out ReplayInfo objects; each connection streams mids scaled by its number"""
+
+    def __init__(self, interval=0.01, first_goes_quiet=False):
+        self.interval = interval
+        self.first_goes_quiet = first_goes_quiet
+        self.opened = []
+
+    def __call__(self):
+        scale = len(self.opened) + 1
+        info = ReplayInfo([mids_message(scale), trades_message("BTC", 87000.0 * scale)],
+                          interval=self.interval, loop=not (self.first_goes_quiet and scale == 1))
+        info.alive = True
+        info.ws_manager = SimpleNamespace(is_alive=lambda: info.alive)
+        self.opened.append(info)
+        return info
+
+
+def test_bus_publish_and_wait():
+    bus = PriceBus(trades_keep=2)
+    assert bus.age() is None and not bus.is_fresh()
+    done = []
+    waiter = threading.Thread(target=lambda: done.append(bus.wait(0, timeout=5)))
+    waiter.start()
+    bus.publish_mids({"BTC": "1"})
+    waiter.join(5)
+    assert done == [1]
+    assert bus.is_fresh() and bus.mids == {"BTC": "1"}
+
+    bus.publish_trades([{"coin": "BTC", "px": str(i)} for i in range(3)])
+    assert len(bus.trades["BTC"]) == 2
+    assert bus.last_trade("BTC")["px"] == "2"
+    assert bus.last_trade("ETH") is None
+    assert bus.wait(1, timeout=0.01) == 1
+
+
+def test_replay_dispatches_by_channel_and_coin(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    path.write_text("\n".join(json.dumps(m) for m in (mids_message(), trades_message("ETH", 3000.0),
+                                                      trades_message("BTC", 87000.0))) + "\n")
+    info = ReplayInfo.from_file(str(path))
+    mids, btc = [], []
+    info.subscribe({"type": "trades", "coin": "BTC"}, btc.append)
+    info.subscribe({"type": "allMids"}, mids.append)
+    info._thread.join(5)
+
+    assert [m["data"][0]["coin"] for m in btc] == ["BTC"]
+    assert info.all_mids() == mids_message()["data"]["mids"]
+    assert {asset["name"] for asset in info.meta()["universe"]} == set(PRICES)
+
+
+def test_connect_resets_the_previous_socket_activity():
+    """A fresh connection is healthy until stale_after passes, whatever the old socket last received"""
+    feed = WebsocketFeed(PriceBus(), Connections(interval=60), stale_after=10)
+    feed.last_message_at = time.monotonic() - 100
+    feed._connect()
+    assert feed.last_message_at is None
+    assert feed._healthy()
+    feed.stop()
+
+
+def test_feed_streams_into_the_bus():
+    bus = PriceBus()
+    connections = Connections()
+    feed = WebsocketFeed(bus, connections, pairs=["BTC"], check_interval=0.01).start()
+    try:
+        wait_until(lambda: bus.last_trade("BTC") is not None and bus.version > 0)
+    finally:
+        feed.stop()
+    assert bus.mids == mids_message()["data"]["mids"]
+    assert feed.reconnects == 0 and len(connections.opened) == 1
+    assert connections.opened[0]._stop.is_set()  # stop() closed the socket
+
+
+def test_quiet_stream_is_reconnected_once():
+    """The first socket goes quiet: one reconnect, then the new socket's mids reach the bus"""
+    bus = PriceBus()
+    connections = Connections(interval=0.05, first_goes_quiet=True)
+    logged = []
+    feed = WebsocketFeed(bus, connections, pairs=["BTC"], stale_after=0.3, check_interval=0.01,
+                         log=lambda message, level="INFO": logged.append(level))
+    feed.start()
+    try:
+        wait_until(lambda: bus.mids.get("BTC") == str(PRICES["BTC"] * 2))
+        time.sleep(0.2)  # before the first message of a new socket, the old one's silence does not count
+        assert len(connections.opened) == 2
+    finally:
+        feed.stop()
+    assert feed.reconnects == 1
+    assert "WARNING" in logged
+    assert connections.opened[0]._stop.is_set()
+
+
+def test_dropped_socket_is_reconnected():
+    bus = PriceBus()
+    connections = Connections()
+    feed = WebsocketFeed(bus, connections, check_interval=0.01).start()
+    try:
+        wait_until(lambda: bus.version > 0)
+        connections.opened[0].alive = False
+        wait_until(lambda: bus.mids.get("BTC") == str(PRICES["BTC"] * 2))
+    finally:
+        feed.stop()
+    assert feed.reconnects == 1
+
+
+def test_failed_connect_is_retried():
+    attempts = []
+    connections = Connections()
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("refused")
+        return connections()
+
+    feed = WebsocketFeed(PriceBus(), factory, check_interval=0.01)
+    stop_wait = feed._stop.wait
+    feed._stop.wait = lambda timeout: stop_wait(min(timeout, 0.01))  # no 1s backoff
+    feed.start()
+    try:
+        wait_until(lambda: connections.opened)
+    finally:
+        feed.stop()
+    assert len(attempts) == 2 and feed.reconnects == 0
+
+
+def test_snapshot_reads_mids_from_a_fresh_bus(fake_info):
+    info = fake_info
+    bus = PriceBus()
+    bus.publish_mids({name: str(price * 2) for name, price in PRICES.items()})
+    snapshot = MarketSnapshot(info, ttl=0, bus=bus).refresh()
+    assert snapshot.get_price("BTC")["price"] == PRICES["BTC"] * 2
+    assert snapshot.get_price("BTC")["change_24h"] == 0.01  # meta still from REST
+    assert info.calls == {"meta": 1}
+
+    snapshot.refresh()  # meta is refreshed less often while mids are streamed
+    bus.publish_mids({"BTC": "1.5"})
+    assert snapshot.refresh_mids(max_age=0).get_price("BTC")["price"] == 1.5
+    assert info.calls == {"meta": 1}
+
+
+def test_snapshot_falls_back_to_rest_when_the_bus_is_stale(fake_info):
+    info = fake_info
+    bus = PriceBus()
+    bus.publish_mids({"BTC": "1.0"})
+    bus.updated_at -= 60
+    snapshot = MarketSnapshot(info, ttl=0, bus=bus).refresh()
+    assert snapshot.get_price("BTC")["price"] == float(info.mids["BTC"])
+    assert info.calls == {"all_mids": 1, "meta": 1}
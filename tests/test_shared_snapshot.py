@@ -0,0 +1,70 @@
+"""
+Tests for the shared-memory market snapshot and its seqlock
+"""
+
+import pytest
+
+from shared_snapshot import HEADER, SharedSnapshotInfo, SharedSnapshotWriter
+
+MIDS = {"BTC": "87000.5", "ETH": "3100.25"}
+META = {"universe": [{"name": "BTC", "szDecimals": 5}, {"name": "ETH", "szDecimals": 4}]}
+
+
+@pytest.fixture
+def writer():
+    writer = SharedSnapshotWriter(size=64 * 1024)
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def reader(writer):
+    reader = SharedSnapshotInfo(writer.name, retries=3)
+    yield reader
+    reader.close()
+
+
+def test_nothing_published_yet(reader):
+    assert reader.all_mids() == {}
+    assert reader.meta() == {"universe": []}
+    assert reader.age() is None
+
+
+def test_publish_and_read(writer, reader):
+    writer.publish(MIDS, META)
+    assert reader.all_mids() == MIDS
+    assert reader.meta() == META
+    assert 0 <= reader.age() < 5
+    assert HEADER.unpack_from(writer.shm.buf, 0)[0] == 2
+
+
+def test_republish_is_picked_up(writer, reader):
+    writer.publish(MIDS, META)
+    assert reader.all_mids() == MIDS
+    writer.publish({"BTC": "88000.0"}, META)
+    assert reader.all_mids() == {"BTC": "88000.0"}
+
+
+def test_write_in_progress_serves_the_previous_snapshot(writer, reader):
+    writer.publish(MIDS, META)
+    assert reader.all_mids() == MIDS
+    seq, length = HEADER.unpack_from(writer.shm.buf, 0)
+    HEADER.pack_into(writer.shm.buf, 0, seq + 1, 0)  # writer stalled mid-publish
+    writer.shm.buf[HEADER.size:HEADER.size + 8] = b"garbage!"
+    assert reader.all_mids() == MIDS
+
+
+def test_oversized_snapshot_is_rejected(writer, reader):
+    writer.publish(MIDS, META)
+    with pytest.raises(ValueError):
+        writer.publish({str(i): "1.0" for i in range(10000)}, META)
+    assert reader.all_mids() == MIDS
+
+
+def test_close_unlinks_the_block():
+    writer = SharedSnapshotWriter(size=4096)
+    name = writer.name
+    writer.close()
+    writer.close()  # already removed: no error
+    with pytest.raises(FileNotFoundError):
+        SharedSnapshotInfo(name)
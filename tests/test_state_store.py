@@ -0,0 +1,254 @@
+"""
+Tests for the snapshot + journal state store: replay must rebuild exactly
+the state that was saved, whatever point the snapshot and journal were left at
+"""
+
+import json
+import os
+
+import pytest
+
+from performance import PERFORMANCE_KEY, build_performance, record_trade
+from state_store import StateStore, journal_path_for
+
+
+def add_trades(state, trades):
+    """Append trades the way the runner does (history + in-place aggregates)"""
+    for trade in trades:
+        state["trade_history"].append(trade)
+        record_trade(state[PERFORMANCE_KEY], trade)
+        state["total_trades"] += 1
+        state["current_capital"] += trade.get("pnl", 0.0)
+        state["updated_at"] = trade["timestamp"]
+
+
+def reload(state_file, **kwargs):
+    """State as a fresh process (no cached object) reads it back"""
+    return json.loads(json.dumps(StateStore(state_file, **kwargs).load()))
+
+
+def detached(state):
+    return json.loads(json.dumps(state))
+
+
+def journal_trades(state_file):
+    with open(journal_path_for(state_file)) as f:
+        return sum(json.loads(line)["event"] == "trade" for line in f)
+
+
+def test_round_trip(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file)
+    state = make_state("w", make_trades(10))
+    store.save(state)
+    add_trades(state, make_trades(30)[10:])
+    store.save(state)
+
+    assert reload(state_file) == detached(state)
+    assert store.load() is state  # nothing written by others: the live object is reused
+
+
+def test_missing_state_loads_none(tmp_path):
+    assert StateStore(tmp_path / "w_state.json").load() is None
+
+
+def test_snapshot_holds_no_history(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    StateStore(state_file).save(make_state("w", make_trades(20)))
+    with open(state_file) as f:
+        snapshot = json.load(f)
+    assert "trade_history" not in snapshot
+    assert snapshot["trade_count"] == 20
+    assert snapshot["journal_offset"] == os.path.getsize(journal_path_for(state_file))
+
+
+def test_unchanged_state_writes_nothing(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file)
+    state = make_state("w", make_trades(5))
+    store.save(state)
+    size = os.path.getsize(journal_path_for(state_file))
+    store.save(state)
+    assert os.path.getsize(journal_path_for(state_file)) == size
+
+
+def test_replay_after_checkpoint(tmp_path, make_trades, make_state):
+    """Events after the snapshot offset are replayed over it, including performance deltas"""
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file, checkpoint_every=3)
+    trades = make_trades(40)
+    state = make_state("w", trades[:4])
+    store.save(state)
+    for i in range(4, 40):
+        add_trades(state, [trades[i]])
+        state["daily_trades"] = i % 5
+        store.save(state)
+
+    restored = reload(state_file)
+    assert restored == detached(state)
+    assert restored[PERFORMANCE_KEY] == detached(build_performance(trades))
+    assert journal_trades(state_file) == 40
+
+
+def test_another_process_sees_new_saves(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    writer = StateStore(state_file, checkpoint_every=1000)
+    reader = StateStore(state_file)
+    state = make_state("w", make_trades(10))
+    writer.save(state)
+    assert len(reader.load()["trade_history"]) == 10
+
+    add_trades(state, make_trades(12)[10:])
+    writer.save(state)
+    assert detached(reader.load()) == detached(state)
+
+
+def test_torn_final_line_is_ignored_and_cut(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    trades = make_trades(12)
+    state = make_state("w", trades[:10])
+    StateStore(state_file, checkpoint_every=1).save(state)
+    with open(journal_path_for(state_file), "a") as f:
+        f.write('{"event":"trade","data":{"pair":"BT')  # crash mid-append
+
+    store = StateStore(state_file)
+    state = store.load()
+    assert len(state["trade_history"]) == 10
+    add_trades(state, trades[10:])
+    store.save(state)
+    assert reload(state_file) == detached(state)
+
+
+def test_legacy_json_state_is_migrated(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    state = make_state("w", make_trades(25))
+    with open(state_file, "w") as f:
+        json.dump(state, f)
+
+    assert StateStore(state_file).load(migrate=False) == detached(state)
+    assert not os.path.exists(journal_path_for(state_file))
+    StateStore(state_file).load()
+    with open(state_file) as f:
+        assert "trade_history" not in json.load(f)
+    assert reload(state_file) == detached(state)
+    assert journal_trades(state_file) == 25
+
+
+def test_migration_interrupted_before_the_snapshot(tmp_path, monkeypatch, make_trades, make_state):
+    """A crash after the journal is written redoes the migration without duplicating trades"""
+    state_file = tmp_path / "w_state.json"
+    state = make_state("w", make_trades(25))
+    with open(state_file, "w") as f:
+        json.dump(state, f)
+
+    def crash(self, state, offset=None):
+        raise OSError("killed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(StateStore, "checkpoint", crash)
+        with pytest.raises(OSError):
+            StateStore(state_file).load()
+    with open(state_file) as f:
+        assert "trade_history" in json.load(f)  # still the legacy file
+
+    assert reload(state_file) == detached(state)  # migrates again
+    assert reload(state_file) == detached(state)  # snapshot + journal
+    assert journal_trades(state_file) == 25
+
+
+def test_save_appends_only_new_trades_and_deltas(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file, checkpoint_every=1000)
+    trades = make_trades(1001)
+    state = make_state("w", trades[:1000])
+    store.save(state)
+    journal = journal_path_for(state_file)
+    size = os.path.getsize(journal)
+
+    add_trades(state, trades[1000:])
+    store.save(state)
+    with open(journal, "rb") as f:
+        f.seek(size)
+        events = [json.loads(line) for line in f]
+
+    assert [event["event"] for event in events] == ["trade", "performance", "state"]
+    assert events[0]["data"] == trades[1000]
+    assert set(events[1]["data"]["by_pair"]) == {trades[1000]["pair"]}
+    assert "trade_history" not in events[2]["data"] and PERFORMANCE_KEY not in events[2]["data"]
+    assert os.path.getsize(journal) - size < 2000  # O(1) per save, not O(history)
+
+
+def test_replaced_performance_is_journaled_whole(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file, checkpoint_every=1000)
+    trades = make_trades(20)
+    state = make_state("w", trades)
+    store.save(state)
+    state[PERFORMANCE_KEY] = build_performance(trades[:10])
+    store.save(state)
+    assert reload(state_file)[PERFORMANCE_KEY] == detached(state[PERFORMANCE_KEY])
+
+
+def test_compaction_keeps_state(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file, checkpoint_every=7, compact_bytes=20000)
+    trades = make_trades(300)
+    state = make_state("w", trades[:2])
+    store.save(state)
+    for trade in trades[2:]:
+        add_trades(state, [trade])
+        store.save(state)
+
+    journal = journal_path_for(state_file)
+    with open(journal) as f:
+        events = [json.loads(line)["event"] for line in f]
+    assert events.count("trade") == 300
+    assert events.count("state") + events.count("performance") < 2 * (300 - 2)  # rewritten at least once
+    restored = reload(state_file)
+    assert restored == detached(state)
+    assert restored[PERFORMANCE_KEY] == detached(build_performance(trades))
+
+
+def test_snapshot_offset_past_compacted_journal(tmp_path, make_trades, make_state):
+    """A snapshot older than the compaction (offset beyond the new journal end) replays from 0"""
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file, checkpoint_every=1000)
+    trades = make_trades(60)
+    state = make_state("w", trades[:2])
+    store.save(state)
+    for trade in trades[2:]:
+        add_trades(state, [trade])
+        store.save(state)
+    store.checkpoint(state)
+    with open(state_file) as f:
+        stale_snapshot = f.read()
+
+    state["current_level"] = "SHARK"
+    store.compact(state)
+    with open(state_file, "w") as f:
+        f.write(stale_snapshot)  # snapshot a reader picked up before the compaction
+    stale = json.loads(stale_snapshot)
+    assert stale["journal_offset"] > os.path.getsize(journal_path_for(state_file))
+
+    assert reload(state_file) == detached(state)
+
+
+def test_crash_before_compacted_journal_rename(tmp_path, make_trades, make_state):
+    """New snapshot over the old journal: replaying the old journal's suffix is still exact"""
+    state_file = tmp_path / "w_state.json"
+    store = StateStore(state_file, checkpoint_every=1000)
+    trades = make_trades(60)
+    state = make_state("w", trades[:2])
+    store.save(state)
+    for trade in trades[2:]:
+        add_trades(state, [trade])
+        store.save(state)
+    journal = journal_path_for(state_file)
+    with open(journal, "rb") as f:
+        old_journal = f.read()
+
+    store.compact(state)
+    with open(journal, "wb") as f:
+        f.write(old_journal)
+
+    assert reload(state_file) == detached(state)
@@ -0,0 +1,78 @@
+"""
+Tests for the parameter sweep: variant expansion, overrides and level sizing
+for swept position_sizing / level_thresholds
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backtest import Backtest, MarketData
+from sweep import apply_overrides, expand_variants, parse_param, rank, run_sweep
+
+HOUR_MS = 3_600_000
+CONFIG = {"initial_capital": 10000.0, "min_confidence": 60.0, "take_profit_pct": 8.0, "stop_loss_pct": 2.0,
+          "max_daily_trades": 12, "cycle_interval_hours": 1,
+          "position_sizing": {"TURTLE": 0.02, "RABBIT": 0.04}, "level_thresholds": {"RABBIT": 10500}}
+
+
+class BuyAt:
+    name = "buy_at"
+
+    def __init__(self, *bars):
+        self.bars = bars
+
+    def decide(self, pair, ts, close, change_24h, rsi):
+        buy = np.isin(np.arange(len(ts)), self.bars)
+        return buy, np.where(buy, 80.0, 0.0)
+
+
+@pytest.fixture
+def backtest():
+    """Flat hourly market: BUY at bar 30, take profit at bar 33, BUY again at bar 40 (end of data)"""
+    bars = 48
+    closes = np.full((1, bars), 100.0)
+    highs = closes.copy()
+    highs[0, 33] = 109.0
+    ts = int(datetime(2024, 3, 1).timestamp() * 1000) + np.arange(bars, dtype=np.int64) * HOUR_MS
+    return Backtest(MarketData(ts, ["BTC"], closes, highs, closes, closes, "1h"), BuyAt(30, 40))
+
+
+def test_parse_and_expand():
+    assert parse_param("min_confidence=55,60") == ("min_confidence", [55, 60])
+    assert parse_param("stop_loss_pct=1:3") == ("stop_loss_pct", (1.0, 3.0))
+    with pytest.raises(ValueError):
+        parse_param("min_confidence")
+    params = dict([parse_param("a=1,2"), parse_param("b=3,4,5")])
+    assert len(expand_variants(params)) == 6
+    with pytest.raises(ValueError):
+        expand_variants({"stop_loss_pct": (1.0, 3.0)})
+    sampled = expand_variants({"stop_loss_pct": (1.0, 3.0)}, samples=5, seed=1)
+    assert sampled == expand_variants({"stop_loss_pct": (1.0, 3.0)}, samples=5, seed=1)
+    assert all(1.0 <= variant["stop_loss_pct"] <= 3.0 for variant in sampled)
+
+
+def test_apply_overrides():
+    variant = apply_overrides(CONFIG, {"position_sizing*": 2, "level_thresholds.RABBIT": 11000, "min_confidence": 65})
+    assert variant["position_sizing"] == {"TURTLE": 0.04, "RABBIT": 0.08}
+    assert variant["level_thresholds"] == {"RABBIT": 11000}
+    assert variant["min_confidence"] == 65
+    assert CONFIG["position_sizing"]["TURTLE"] == 0.02  # the base config is not touched
+
+
+def test_swept_position_sizing_uses_level_sizing(backtest, tmp_path):
+    """With the default fixed sizing two position_sizing variants would report the same numbers"""
+    messages = []
+    variants = [{"position_sizing*": 0.5}, {"position_sizing*": 2}]
+    results = run_sweep(backtest, CONFIG, variants, workers=2, cache_dir=str(tmp_path), progress=messages.append)
+
+    by_scale = {result["overrides"]["position_sizing*"]: result for result in results}
+    assert by_scale[0.5]["final_capital"] == pytest.approx(10000.0 + 100.0 * 0.08)  # 1% of capital
+    assert by_scale[2]["final_capital"] == pytest.approx(10000.0 + 400.0 * 0.08)  # 4% of capital
+    assert rank(results)[0]["overrides"] == {"position_sizing*": 2}
+    assert any("level sizing" in message for message in messages)
+
+    again = run_sweep(backtest, CONFIG, variants, cache_dir=str(tmp_path), progress=messages.append)
+    assert messages[-1].endswith("2 cached, 0 to backtest")
+    assert sorted(result["key"] for result in again) == sorted(result["key"] for result in results)
@@ -0,0 +1,126 @@
+"""
+Tests for the SQLite backend: keyset pages must walk every trade once, with
+and without filters, and the state store must round-trip through the database
+"""
+
+import json
+
+import pytest
+
+from performance import PERFORMANCE_KEY, build_performance, record_trade
+from state_store import StateStore
+from trade_db import SQLiteStateStore, TradeDB, migrate_state_files
+
+
+@pytest.fixture
+def db(tmp_path, make_trades, make_state):
+    db = TradeDB(tmp_path / "aurumbot.db")
+    trades = make_trades(257)
+    db.save_state("w", make_state("w", trades), trades, 0)
+    db.save_state("other", make_state("other", trades[:10]), trades[:10], 0)
+    return db
+
+
+def walk(db, wallet, limit, **filters):
+    """All trades reached by following the keyset cursor page after page"""
+    pages = []
+    after = None
+    while True:
+        trades, last_seq = db.list_trades(wallet, after=after, limit=limit, **filters)
+        if not trades:
+            return pages
+        pages.append(trades)
+        after = last_seq
+
+
+@pytest.mark.parametrize("limit", [1, 50, 256, 257, 1000])
+def test_keyset_pages_cover_every_trade_once(db, make_trades, limit):
+    pages = walk(db, "w", limit)
+    assert [trade for page in pages for trade in page] == make_trades(257)
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_keyset_cursor_is_the_trade_seq(db, make_trades):
+    trades, last_seq = db.list_trades("w", after=99, limit=10)
+    assert trades == make_trades(257)[100:110]
+    assert last_seq == 109
+    assert db.get_trade("w", 109) == trades[-1]
+
+
+def test_page_past_the_end_is_empty(db):
+    assert db.list_trades("w", after=256, limit=10) == ([], None)
+    assert db.list_trades("unknown", limit=10) == ([], None)
+
+
+def test_offset_pages_match_keyset_pages(db):
+    keyset = walk(db, "w", 40)
+    for number, page in enumerate(keyset):
+        assert db.list_trades("w", limit=40, offset=number * 40)[0] == page
+
+
+@pytest.mark.parametrize("filters", [
+    {"pair": "ETH"},
+    {"action": "SELL"},
+    {"pair": "SOL", "action": "BUY"},
+    {"since": "2024-01-10T00:00:00", "until": "2024-01-20T00:00:00"},
+])
+def test_filtered_keyset_pages(db, make_trades, filters):
+    def matches(trade):
+        return (trade["pair"] == filters.get("pair", trade["pair"])
+                and trade["action"] == filters.get("action", trade["action"])
+                and trade["timestamp"] >= filters.get("since", "")
+                and trade["timestamp"] < filters.get("until", "9999"))
+
+    expected = [trade for trade in make_trades(257) if matches(trade)]
+    pages = walk(db, "w", 7, **filters)
+    assert [trade for page in pages for trade in page] == expected
+    assert db.count_trades("w", **filters) == len(expected)
+
+
+def test_counts(db):
+    assert db.trade_count("w") == 257
+    assert db.count_trades("w") == 257
+    assert db.trade_count("other") == 10
+    assert db.trade_count("unknown") is None
+
+
+def test_appended_trades_extend_the_walk(db, make_trades, make_state):
+    trades = make_trades(300)
+    db.save_state("w", make_state("w", trades), trades[257:], 257)
+    assert [trade for page in walk(db, "w", 64) for trade in page] == trades
+    assert db.trade_count("w") == 300
+
+
+def detached(state):
+    return json.loads(json.dumps(state))
+
+
+def test_sqlite_store_round_trip(tmp_path, make_trades, make_state):
+    db = TradeDB(tmp_path / "aurumbot.db")
+    store = SQLiteStateStore(db, "w")
+    trades = make_trades(50)
+    state = make_state("w", trades[:20])
+    store.save(state)
+    for trade in trades[20:]:
+        state["trade_history"].append(trade)
+        record_trade(state[PERFORMANCE_KEY], trade)
+        state["total_trades"] += 1
+        store.save(state)
+
+    restored = SQLiteStateStore(db, "w").load()
+    assert detached(restored) == detached(state)
+    assert detached(restored[PERFORMANCE_KEY]) == detached(build_performance(trades))
+    assert db.trade_count("w") == 50
+    assert db.load_state("w", with_history=False).get("trade_history") is None
+
+
+def test_sqlite_migration_from_journal(tmp_path, make_trades, make_state):
+    state_file = tmp_path / "w_state.json"
+    state = make_state("w", make_trades(30))
+    StateStore(state_file).save(state)
+    db = TradeDB(tmp_path / "aurumbot.db")
+
+    assert migrate_state_files(db, [str(state_file)]) == [(str(state_file), "w", 30)]
+    migrate_state_files(db, [str(state_file)])  # re-running is safe
+    assert detached(SQLiteStateStore(db, "w").load()) == detached(state)
+    assert db.trade_count("w") == 30
@@ -0,0 +1,134 @@
+"""
+Tests for the wallet runner cycle: concurrent per-pair analysis against a
+FakeInfo exchange and a stubbed LLM transport, and no-op cycles that never
+reach the exchange
+"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+import wallet_runner_hyperliquid as runner
+from candle_store import CandleStore
+from decision_cache import DecisionCache
+from indicators import RSIEngine
+from market_snapshot import MarketSnapshot
+
+
+def completion(content):
+    """Chat completion shaped like the OpenAI response the runner reads"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def prompt_pair(kwargs):
+    return re.search(r"Pair: (\w+)", kwargs["messages"][0]["content"]).group(1)
+
+
+@pytest.fixture
+def cycle_env(tmp_path, monkeypatch, fake_info):
+    """Fresh candle store, RSI engine and decision cache; LLM answers BUY unless a test overrides it"""
+    monkeypatch.setattr(runner, "CANDLE_STORE", CandleStore(str(tmp_path / "candles")))
+    monkeypatch.setattr(runner, "RSI_ENGINE", RSIEngine(14))
+    monkeypatch.setattr(runner, "DECISION_CACHE", DecisionCache(ttl=0))
+    monkeypatch.setattr(llm_client, "_transport", lambda **kwargs: completion("BUY|75|test"))
+    return SimpleNamespace(info=fake_info, snapshot=MarketSnapshot(fake_info).refresh())
+
+
+def test_analyze_pairs_runs_pairs_concurrently_in_input_order(cycle_env, monkeypatch):
+    pairs = ["BTC", "ETH", "SOL"]
+    delays = {"BTC": 0.2, "ETH": 0.1, "SOL": 0.0}  # completes in reverse order
+    all_in_flight = threading.Barrier(len(pairs), timeout=5)
+    finished = []
+
+    def transport(**kwargs):
+        pair = prompt_pair(kwargs)
+        all_in_flight.wait()  # raises BrokenBarrierError unless the three LLM calls overlap
+        time.sleep(delays[pair])
+        finished.append(pair)
+        return completion(f"BUY|{70 + pairs.index(pair)}|{pair} signal")
+
+    monkeypatch.setattr(llm_client, "_transport", transport)
+    results = runner.analyze_pairs(cycle_env.snapshot, pairs, [])
+
+    assert finished == ["SOL", "ETH", "BTC"]
+    assert [result["pair"] for result in results] == pairs
+    for i, (pair, result) in enumerate(zip(pairs, results)):
+        assert result["price_data"]["price"] == float(cycle_env.info.mids[pair])
+        assert result["rsi"] is not None
+        assert result["analysis"] == {"action": "BUY", "confidence": 70.0 + i, "reasoning": f"{pair} signal"}
+
+
+def test_analyze_pairs_keeps_the_slot_of_a_failed_pair(cycle_env):
+    results = runner.analyze_pairs(cycle_env.snapshot, ["BTC", "DOGE", "ETH"], [])
+    assert [result["pair"] for result in results] == ["BTC", "DOGE", "ETH"]
+    assert results[1]["price_data"] is None and results[1]["analysis"] is None
+    assert results[0]["analysis"]["action"] == results[2]["analysis"]["action"] == "BUY"
+
+
+def test_analyze_pairs_does_not_refetch_market_data(cycle_env):
+    assert runner.analyze_pairs(cycle_env.snapshot, [], []) == []
+    runner.analyze_pairs(cycle_env.snapshot, ["BTC", "ETH", "SOL"], [])
+    assert cycle_env.info.calls["all_mids"] == 1
+    assert cycle_env.info.calls["meta"] == 1
+
+
+@pytest.fixture
+def wallet(tmp_path, monkeypatch, fake_info):
+    """Wallet config with its state in tmp_path; connecting to the exchange is counted"""
+    monkeypatch.setattr(runner, "STATE_DIR", str(tmp_path))
+    connects = []
+
+    def connect(testnet=True, websocket=False):
+        connects.append(testnet)
+        return fake_info
+
+    monkeypatch.setattr(runner, "get_hyperliquid_info", connect)
+    config = {"wallet_name": "noop", "initial_capital": 10000.0, "trading_pairs": ["BTC"], "min_confidence": 60.0,
+              "take_profit_pct": 8.0, "stop_loss_pct": 2.0, "max_holding_hours": 24, "max_daily_trades": 2}
+    return SimpleNamespace(config=config, connects=connects, info=fake_info)
+
+
+def save_wallet_state(config, **fields):
+    state = runner.load_state(config)
+    state.update(last_trade_date=datetime.now().strftime("%Y-%m-%d"), **fields)
+    runner.save_state(state)
+
+
+def test_daily_limit_cycle_skips_the_exchange(wallet):
+    save_wallet_state(wallet.config, daily_trades=2)
+    assert runner.execute_cycle(wallet.config) == "daily_limit"
+    assert wallet.connects == [] and not wallet.info.calls
+
+
+def test_emergency_stop_cycle_skips_the_exchange(wallet):
+    save_wallet_state(wallet.config, emergency_stop=True)
+    assert runner.execute_cycle(wallet.config) == "emergency_stop"
+    assert wallet.connects == [] and not wallet.info.calls
+
+
+def test_daily_limit_with_an_open_position_still_checks_exits(wallet):
+    position = {"pair": "BTC", "entry_price": float(wallet.info.mids["BTC"]), "quantity": 0.001,
+                "trade_size_usd": 87.0, "confidence": 75.0, "opened_at": datetime.now().isoformat()}
+    save_wallet_state(wallet.config, daily_trades=2, open_position=position)
+    assert runner.execute_cycle(wallet.config) == "position_open"
+    assert wallet.connects == [True]
+    assert wallet.info.calls["all_mids"] == 1
+
+
+def test_runner_import_defers_heavy_modules(tmp_path):
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+    code = ("import sys; import wallet_runner_hyperliquid; "
+            "print(sorted(m for m in ('hyperliquid', 'eth_account', 'openai', 'httpx', 'numpy', 'pandas') "
+            "if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=src, STATE_DIR=str(tmp_path / "state"), LOG_DIR=str(tmp_path / "logs"))
+    output = subprocess.run([sys.executable, "-c", code], env=env, cwd=str(tmp_path), capture_output=True,
+                            text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]"